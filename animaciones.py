@@ -0,0 +1,231 @@
+import argparse
+import logging
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+
+from digestion import digerir_lote
+from gel import CUADROS, CacheLRU, clave_gel, codificar_animacion, renderizar_animacion
+
+# animaciones de la corrida del gel (gel.renderizar_animacion) codificadas una sola vez por
+# configuración de carriles: se buscan primero en memoria (compartida por las sesiones del
+# proceso), después en disco y solo si no están se dibujan; la app las pide únicamente cuando
+# alguien abre la animación, y este script (o un hilo de fondo de la app) puede dejarlas
+# hechas de antemano para todo el catálogo
+# uso: python animaciones.py [--catalogo catalogo.db] [--max-enzimas 2] [--procesos 4]
+
+log = logging.getLogger(__name__)
+
+RUTA_ANIMACIONES = "animaciones"
+
+# st.image muestra los GIF animados tal cual (los demás formatos los recodifica a una imagen fija)
+FORMATO = "GIF"
+ANCHO = 500
+
+# combinaciones precalculadas por molécula: hasta este número de enzimas
+MAX_ENZIMAS = 2
+
+# pausa entre configuraciones del hilo de fondo de la app, para no competir con las sesiones
+PAUSA_FONDO = 0.05
+
+# tope del directorio de animaciones (~2000 animaciones de 500 px): al pasarlo se borran las
+# usadas hace más tiempo
+MAX_BYTES_DISCO = 256 * 1024 * 1024
+
+cache_animaciones = CacheLRU(max_entradas=64, max_bytes=64 * 1024 * 1024)
+
+
+def carriles(adn, enzimas):
+    # los mismos carriles que arma la app: uno por enzima y la digestión combinada (si hay cortes)
+    fragmentos = digerir_lote([(adn, (e,)) for e in enzimas] + [(adn, tuple(enzimas))])
+    resultado = {e: f.tolist() for e, f in zip(enzimas, fragmentos)}
+    if len(fragmentos[-1]):
+        resultado["Combinada"] = fragmentos[-1].tolist()
+    return resultado
+
+
+def _ordenados(diccionario_carriles):
+    # carriles de las enzimas en orden alfabético y la combinada al final: el mismo archivo
+    # sirve para cualquier orden en que se elijan las enzimas (y es el que deja el precálculo)
+    return {n: diccionario_carriles[n] for n in sorted(diccionario_carriles, key=lambda n: (n == "Combinada", n))}
+
+
+def _archivo(diccionario_carriles, ruta, formato, ancho):
+    clave = clave_gel(diccionario_carriles, animacion=formato, ancho=ancho, cuadros=CUADROS)
+    return clave, os.path.join(ruta, f"{clave}.{formato.lower()}")
+
+
+def _escribir(archivo, datos):
+    # temporal + reemplazo: otro proceso nunca lee una animación a medias
+    directorio = os.path.dirname(os.path.abspath(archivo))
+    os.makedirs(directorio, exist_ok=True)
+    descriptor, temporal = tempfile.mkstemp(dir=directorio, prefix=".animacion_")
+    try:
+        with os.fdopen(descriptor, "wb") as f:
+            f.write(datos)
+        os.replace(temporal, archivo)
+    except BaseException:
+        os.unlink(temporal)
+        raise
+
+
+def _dibujar(diccionario_carriles, archivo, formato, ancho):
+    datos = codificar_animacion(renderizar_animacion(diccionario_carriles, ancho=ancho), formato)
+    try:
+        _escribir(archivo, datos)
+    except OSError as e:
+        log.warning("no se pudo guardar la animación en %s: %s", archivo, e)
+    return datos
+
+
+def recortar_disco(ruta=RUTA_ANIMACIONES, max_bytes=MAX_BYTES_DISCO):
+    # borra las animaciones usadas hace más tiempo (fecha de modificación, que se renueva al
+    # leerlas) hasta quedar por debajo de max_bytes; devuelve cuántas borró
+    try:
+        entradas = [e for e in os.scandir(ruta) if e.name.endswith((".gif", ".webp")) and e.is_file()]
+    except OSError:
+        return 0
+    archivos = []
+    for entrada in entradas:
+        try:
+            estado = entrada.stat()
+        except OSError:
+            continue
+        archivos.append((estado.st_mtime, estado.st_size, entrada.path))
+    total = sum(tamano for _, tamano, _ in archivos)
+    borradas = 0
+    for _, tamano, archivo in sorted(archivos):
+        if total <= max_bytes:
+            break
+        try:
+            os.unlink(archivo)
+        except OSError:
+            continue
+        total -= tamano
+        borradas += 1
+    return borradas
+
+
+def animacion(diccionario_carriles, ruta=RUTA_ANIMACIONES, formato=FORMATO, ancho=ANCHO):
+    # bytes de la animación; solo se dibuja si no está ni en memoria ni en disco
+    diccionario_carriles = _ordenados(diccionario_carriles)
+    clave, archivo = _archivo(diccionario_carriles, ruta, formato, ancho)
+    datos = cache_animaciones.obtener(clave)
+    if datos is not None:
+        return datos
+    try:
+        with open(archivo, "rb") as f:
+            datos = f.read()
+        os.utime(archivo)
+    except OSError:
+        datos = _dibujar(diccionario_carriles, archivo, formato, ancho)
+        recortar_disco(ruta)
+    cache_animaciones.guardar(clave, datos)
+    return datos
+
+
+def configuraciones(moleculas, max_enzimas=MAX_ENZIMAS, enzimas=None):
+    # (nombre, carriles) para cada molécula y cada combinación de hasta max_enzimas enzimas (las
+    # dadas o, si no, las que cortan la molécula), en orden alfabético como las ofrece la app;
+    # moleculas: iterable de (nombre, adn)
+    for nombre, adn in moleculas:
+        lista = sorted(enzimas or adn["sitios"])
+        for r in range(1, min(max_enzimas, len(lista)) + 1):
+            for combo in combinations(lista, r):
+                yield nombre, _ordenados(carriles(adn, combo))
+
+
+def _dibujar_trabajo(argumentos):
+    _dibujar(*argumentos)
+
+
+def precalcular(
+    moleculas,
+    ruta=RUTA_ANIMACIONES,
+    formato=FORMATO,
+    ancho=ANCHO,
+    max_enzimas=MAX_ENZIMAS,
+    enzimas=None,
+    procesos=1,
+    pausa=0.0,
+    max_bytes=MAX_BYTES_DISCO,
+):
+    # deja en disco las animaciones que falten (sin pasar de max_bytes); devuelve cuántas se
+    # dibujaron, cuántas ya estaban y cuántas se borraron para respetar el tope
+    resumen = {"nuevas": 0, "existentes": 0, "borradas": 0}
+    pendientes = []
+    for nombre, diccionario_carriles in configuraciones(moleculas, max_enzimas, enzimas):
+        _, archivo = _archivo(diccionario_carriles, ruta, formato, ancho)
+        if os.path.exists(archivo):
+            resumen["existentes"] += 1
+        else:
+            pendientes.append((diccionario_carriles, archivo, formato, ancho))
+
+    if procesos > 1 and len(pendientes) > 1:
+        with ProcessPoolExecutor(procesos) as pool:
+            for i, _ in enumerate(pool.map(_dibujar_trabajo, pendientes, chunksize=8), 1):
+                if i % 100 == 0:
+                    log.info("%d/%d animaciones", i, len(pendientes))
+    else:
+        for i, trabajo in enumerate(pendientes, 1):
+            _dibujar_trabajo(trabajo)
+            if i % 100 == 0:
+                log.info("%d/%d animaciones", i, len(pendientes))
+            if pausa:
+                time.sleep(pausa)
+    resumen["nuevas"] = len(pendientes)
+    resumen["borradas"] = recortar_disco(ruta, max_bytes)
+    return resumen
+
+
+def precalcular_en_fondo(moleculas, ruta=RUTA_ANIMACIONES, max_enzimas=MAX_ENZIMAS, enzimas=None):
+    # un hilo de fondo (uno por proceso, lo lanza la app) con una pausa entre animaciones;
+    # moleculas es una función, así el catálogo se lee en el hilo y no al arrancar la página
+    def ejecutar():
+        try:
+            resumen = precalcular(moleculas(), ruta, max_enzimas=max_enzimas, enzimas=enzimas, pausa=PAUSA_FONDO)
+            log.info(
+                "animaciones precalculadas: %d nuevas, %d ya estaban, %d borradas por el tope",
+                resumen["nuevas"], resumen["existentes"], resumen["borradas"],
+            )
+        except Exception:
+            log.exception("falló el precálculo de animaciones")
+
+    hilo = threading.Thread(target=ejecutar, name="animaciones", daemon=True)
+    hilo.start()
+    return hilo
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precalcula las animaciones del gel para las moléculas de la app")
+    parser.add_argument("--ruta", default=RUTA_ANIMACIONES, help="directorio de las animaciones")
+    parser.add_argument("--catalogo", help="índice de catalogo.py con más moléculas")
+    parser.add_argument("--max-enzimas", type=int, default=MAX_ENZIMAS, help="enzimas por combinación")
+    parser.add_argument("--enzimas", help="enzimas a combinar, separadas por comas (por defecto, las que cortan cada molécula)")
+    parser.add_argument("--procesos", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--max-mb", type=int, default=MAX_BYTES_DISCO // 2**20, help="tope del directorio en MB")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+
+    from moleculas import adn_db
+    moleculas = list(adn_db.items())
+    if args.catalogo:
+        from catalogo import Catalogo
+        catalogo = Catalogo(args.catalogo)
+        moleculas += [(n, catalogo.molecula(n)) for n in catalogo.nombres() if n not in adn_db]
+    inicio = time.perf_counter()
+    enzimas = [e.strip() for e in args.enzimas.split(",") if e.strip()] if args.enzimas else None
+    resumen = precalcular(
+        moleculas, args.ruta, max_enzimas=args.max_enzimas, enzimas=enzimas, procesos=args.procesos, max_bytes=args.max_mb * 2**20
+    )
+    print(
+        f"nuevas: {resumen['nuevas']}  ya estaban: {resumen['existentes']}  borradas por el tope: {resumen['borradas']}  "
+        f"({time.perf_counter() - inicio:.1f} s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
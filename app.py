@@ -1,10 +1,30 @@
 import streamlit as st
-from PIL import Image, ImageDraw, ImageFont
-import requests
 import base64
-import pandas as pd
-from datetime import datetime
-import os
+import hmac
+from animaciones import animacion, precalcular_en_fondo
+from datetime import date, datetime
+from moleculas import adn_db as adn_base
+from sitios import leer_fasta, molecula_desde_secuencia
+from banco import banco_preguntas, clave_configuracion, juego_valido
+from calificacion import TOLERANCIA, ErrorHoja, calificar_hoja, dificultad, leer_hoja
+from catalogo import catalogo
+from digestion import digerir, resultado_digestion
+from gel import gel_png
+from mapas import calificar_mapa, digestiones, mismo_mapa, resolver_mapa
+from ia import (
+    PREGUNTAS_BASE, call_openai, call_openai_stream, explicar_con_ia, explicar_con_ia_stream, mensajes_preguntas,
+    partes_explicacion, partes_preguntas, secreto, streaming_activo
+)
+from metricas import metricas
+from precarga import ESPERA_TOMA, cancelar_todas, lanzar, precarga_activa, tomar
+from resultados import (
+    COLUMNAS, contar_resultados, exportar, guardar_resultado, migrar_csv, rango_fechas, resumen_general, resumen_por
+)
+st.set_page_config(
+    page_title="Simulador de digestión y gel de agarosa",
+    page_icon="🧬",
+)
+
 # Configuración de la página
 st.markdown(
     """
@@ -24,23 +44,16 @@ st.markdown(
     unsafe_allow_html=True
 )
 
-st.set_page_config(
-    page_title="Simulador de digestión y gel de agarosa",
-    page_icon="🧬",
-)
-
-# encabezado con logo y texto
-logo = Image.open("logo_pucmm.png")
-
+# encabezado con logo y texto (el logo se lee y codifica una sola vez por proceso)
 def get_image_base64(path):
     with open(path, "rb") as f:
         data = f.read()
     return base64.b64encode(data).decode()
 
-logo_base64 = get_image_base64("logo_pucmm.png")
-
-st.markdown(
-    f"""
+@st.cache_resource
+def encabezado_html():
+    logo_base64 = get_image_base64("logo_pucmm.png")
+    return f"""
     <div style='text-align: center; line-height: 1.5; margin-bottom: 10px;'>
         <img src='data:image/png;base64,{logo_base64}' width='120'>
         <h4 style='margin: 8px 0 0 0;'>Pontificia Universidad Católica Madre y Maestra (PUCMM)</h4>
@@ -51,9 +64,41 @@ st.markdown(
         </p>
     </div>
     <hr>
-    """,
-    unsafe_allow_html=True
-)
+    """
+
+st.markdown(encabezado_html(), unsafe_allow_html=True)
+
+# resultados en SQLite; el CSV de versiones anteriores se importa una sola vez por proceso
+@st.cache_resource
+def preparar_resultados():
+    return migrar_csv()
+
+preparar_resultados()
+
+# métricas de rendimiento: si METRICAS_ARCHIVO está en los secrets, se escriben ahí en formato
+# de texto de Prometheus cada METRICAS_INTERVALO segundos (un hilo por proceso)
+@st.cache_resource
+def exportar_metricas():
+    ruta = secreto("METRICAS_ARCHIVO")
+    if ruta:
+        metricas.exportar_cada(ruta, float(secreto("METRICAS_INTERVALO", 15)))
+
+exportar_metricas()
+
+# con ANIMACIONES_PRECARGA, un hilo de fondo deja hechas en disco las animaciones del gel de las
+# moléculas de ejemplo y del catálogo con las enzimas de ejemplo (una vez por proceso; las que
+# ya están no se repiten)
+def moleculas_precarga():
+    return list(adn_base.items()) + [(n, catalogo.molecula(n)) for n in catalogo.nombres() if n not in adn_base]
+
+@st.cache_resource
+def precargar_animaciones():
+    if secreto("ANIMACIONES_PRECARGA", False):
+        enzimas = sorted({enz for adn in adn_base.values() for enz in adn["sitios"]})
+        precalcular_en_fondo(moleculas_precarga, max_enzimas=int(secreto("ANIMACIONES_MAX_ENZIMAS", 2)), enzimas=enzimas)
+
+precargar_animaciones()
+
 # Estilo para títulos
 subtitle_style = "font-size: 1.5em; margin-top: 15px; margin-bottom: 5px; font-weight: 600;"
 
@@ -64,230 +109,278 @@ st.markdown(
 )
 st.write("Simulador con IA: gel, explicación, preguntas personalizadas y tutor virtual")
 
-# Base de datos de ADN y sitios de corte
-adn_db = {
-    "ADN lineal 4000 pb (1 sitio EcoRI)": {
-        "tipo": "lineal",
-        "longitud": 4000,
-        "sitios": {"EcoRI": [2000]},
-    },
-    "ADN lineal 4000 pb (2 sitios EcoRI)": {
-        "tipo": "lineal",
-        "longitud": 4000,
-        "sitios": {"EcoRI": [1000, 3000]},
-    },
-    "ADN circular 5000 pb (2 sitios EcoRI)": {
-        "tipo": "circular",
-        "longitud": 5000,
-        "sitios": {"EcoRI": [1200, 3700]},
-    },
-    "ADN lineal 6000 pb (2 sitios HindIII)": {
-        "tipo": "lineal",
-        "longitud": 6000,
-        "sitios": {"HindIII": [1500, 4500]},
-    },
-    "ADN circular 8000 pb (3 sitios BamHI)": {
-        "tipo": "circular",
-        "longitud": 8000,
-        "sitios": {"BamHI": [1000, 4000, 7000]},
-    },
-    "ADN lineal 5000 pb (1 sitio HindIII, 1 sitio EcoRI)": {
-        "tipo": "lineal",
-        "longitud": 5000,
-        "sitios": {"HindIII": [1200], "EcoRI": [3800]},
-    },
-    "ADN circular 7000 pb (1 sitio BamHI)": {
-        "tipo": "circular",
-        "longitud": 7000,
-        "sitios": {"BamHI": [3500]},
-    },
-    "Plásmido pBR322 (4361 pb, 2 sitios EcoRI y 1 HindIII)": {
-        "tipo": "circular",
-        "longitud": 4361,
-        "sitios": {"EcoRI": [600, 3200], "HindIII": [1500]},
-    },
-}
-
-enzimas_disponibles = sorted({enz for adn in adn_db.values() for enz in adn["sitios"].keys()})
+# Base de datos de ADN y sitios de corte (copia por sesión: las secuencias cargadas se añaden aquí)
+adn_db = dict(adn_base)
+
+# molécula propia: los sitios se buscan en la secuencia en lugar de escribirse a mano
+@st.cache_data(show_spinner=False, max_entries=16)
+def cargar_fasta(contenido, tipo):
+    moleculas = {}
+    for nombre, secuencia in leer_fasta(contenido.decode("ascii", "ignore")):
+        moleculas[f"{nombre} ({len(secuencia)} pb, {tipo})"] = molecula_desde_secuencia(secuencia, tipo)
+    return moleculas
+
+with st.expander("Cargar mi propia secuencia (FASTA o texto)"):
+    archivo_fasta = st.file_uploader("Archivo de secuencia", type=["fa", "fasta", "fna", "txt"])
+    tipo_fasta = st.radio("Topología de la molécula", ["lineal", "circular"], horizontal=True)
+    if archivo_fasta is not None:
+        adn_db.update(cargar_fasta(archivo_fasta.getvalue(), tipo_fasta))
+
+# catálogo indexado (python catalogo.py <directorio>): nombres y enzimas salen del índice
+# y cada molécula se lee solo cuando se elige
+enzimas_base = sorted({enz for adn in adn_db.values() for enz in adn["sitios"].keys()})
+enzimas_disponibles = sorted(set(enzimas_base).union(catalogo.enzimas()))
 
 #UI de selección
-adn_sel = st.selectbox("1. Elige la molécula de ADN", list(adn_db.keys()))
-adn_info = adn_db[adn_sel]
+adn_sel = st.selectbox(
+    "1. Elige la molécula de ADN",
+    list(adn_db.keys()) + [n for n in catalogo.nombres() if n not in adn_db]
+)
+adn_info = adn_db[adn_sel] if adn_sel in adn_db else catalogo.molecula(adn_sel)
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def secuencia_fasta(nombre):
+    # (primeras bases, archivo FASTA) de una molécula del catálogo, leída una vez por molécula
+    secuencia = catalogo.secuencia(nombre)
+    return secuencia[:600] + ("…" if len(secuencia) > 600 else ""), f">{nombre}\n{secuencia}\n"
+
+if "archivo" in adn_info:
+    with st.expander("Ver secuencia"):
+        st.caption(f"{adn_info['longitud']} pb · {adn_info['tipo']} · {adn_info['archivo']}")
+        # el contenido del expander se ejecuta aunque esté cerrado: la secuencia solo se lee si se pide
+        if st.toggle("Mostrar la secuencia", key=f"ver_secuencia_{adn_sel}"):
+            inicio, fasta = secuencia_fasta(adn_sel)
+            st.code(inicio)
+            st.download_button("Descargar en FASTA", fasta, file_name=f"{adn_info['archivo']}.fasta", mime="text/plain")
 
 enzimas_sel = st.multiselect(
     "2. Elige la(s) enzima(s) de restricción",
     enzimas_disponibles,
-    default=[enzimas_disponibles[0]] if enzimas_disponibles else []
+    default=[enzimas_base[0]] if enzimas_base else []
 )
 
 st.markdown(f"<h2 style='{subtitle_style}'>Resultado simulado</h2>", unsafe_allow_html=True)
 
-#funciones de digestión
-def digest_lineal(longitud, cortes):
-    cortes_ordenados = sorted(cortes)
-    fragmentos = []
-    inicio = 0
-    pasos = []
-    for c in cortes_ordenados:
-        frag = c - inicio
-        fragmentos.append(frag)
-        pasos.append(f"Fragmento desde {inicio} pb hasta {c} pb → {frag} pb")
-        inicio = c
-    ultimo = longitud - inicio
-    fragmentos.append(ultimo)
-    pasos.append(f"Fragmento desde {inicio} pb hasta {longitud} pb → {ultimo} pb")
-    return fragmentos, pasos
-
-def digest_circular(longitud, cortes):
-    if len(cortes) == 1:
-        pasos = [f"ADN circular con 1 corte en {cortes[0]} pb → se linealiza → 1 fragmento de {longitud} pb"]
-        return [longitud], pasos
-    cortes_ordenados = sorted(cortes)
-    fragmentos = []
-    pasos = []
-    for i in range(len(cortes_ordenados)):
-        actual = cortes_ordenados[i]
-        siguiente = cortes_ordenados[(i + 1) % len(cortes_ordenados)]
-        if siguiente > actual:
-            frag = siguiente - actual
-            desc = f"Segmento entre {actual} pb y {siguiente} pb → {frag} pb"
+# inicializar session_state para la retro
+if "retro_ia" not in st.session_state:
+    st.session_state["retro_ia"] = None
+
+# cada panel interactivo es un fragmento: sus botones y campos solo vuelven a ejecutar ese panel,
+# no la digestión, el gel ni el resto de la página
+
+@st.fragment
+def panel_prediccion(adn_info, enzimas_sel, frags_comb):
+    pred = st.number_input(
+        "¿Cuántos fragmentos creías que iban a salir en la digestión combinada?",
+        min_value=0,
+        step=1,
+        value=len(frags_comb) if frags_comb else 0,
+        key="pred_fragmentos"
+    )
+
+    # precarga opcional: la explicación se pide en segundo plano para esta selección y predicción
+    precargas = st.session_state.setdefault("precargas", {})
+    clave_retro = (adn_info["tipo"], tuple(enzimas_sel), tuple(frags_comb or []), pred)
+    if precarga_activa():
+        lanzar(precargas, "retro_ia", clave_retro, partes_explicacion, adn_info["tipo"], enzimas_sel, frags_comb or [], pred)
+
+    retro_mostrada = False
+    if st.button("Evaluar mi respuesta con IA", key="btn_retro_ia"):
+        precargada = tomar(precargas, "retro_ia", clave_retro)
+        if precargada:
+            st.session_state["retro_ia"] = precargada
+        elif streaming_activo():
+            # se muestra a medida que llega y el texto completo queda guardado para los reruns
+            st.session_state["retro_ia"] = st.write_stream(explicar_con_ia_stream(
+                adn_info["tipo"],
+                enzimas_sel,
+                frags_comb if frags_comb else [],
+                pred,
+                usar_cache=True
+            ))
+            retro_mostrada = True
         else:
-            frag = (longitud - actual) + siguiente
-            desc = f"Segmento entre {actual} pb y fin ({longitud}) + inicio hasta {siguiente} pb → {frag} pb"
-        fragmentos.append(frag)
-        pasos.append(desc)
-    return fragmentos, pasos
-
-def digerir(adn, enzimas):
-    cortes = []
-    for e in enzimas:
-        cortes.extend(adn["sitios"].get(e, []))
-    if not cortes:
-        return [], []
-    if adn["tipo"] == "lineal":
-        return digest_lineal(adn["longitud"], cortes)
-    else:
-        return digest_circular(adn["longitud"], cortes)
-
-# función para generar imagen de gel
-def generar_gel_multicarril(diccionario_carriles, ancho_carril=120, alto=400, espacio=20, scale=2):
-    ancho_carril *= scale
-    alto *= scale
-    espacio *= scale
-
-    marcador_fragmentos = [10000, 8000, 6000, 5000, 4000, 3000, 2000, 1000]
-    carriles = {"Marcador": marcador_fragmentos}
-    carriles.update(diccionario_carriles)
-
-    n = len(carriles)
-    ancho_total = n * ancho_carril + (n + 1) * espacio
-    img = Image.new("RGB", (ancho_total, alto), "black")
-    draw = ImageDraw.Draw(img)
-
-    try:
-        small_font = ImageFont.truetype("arial.ttf", 12 * scale)
-    except:
-        small_font = ImageFont.load_default()
-
-    max_pb_global = max(max(frag) for frag in carriles.values() if frag)
-
-    x_actual = espacio
-    for nombre, fragmentos in carriles.items():
-        x1 = x_actual
-        x2 = x_actual + ancho_carril
-
-        draw.rectangle(
-            [x1 + ancho_carril*0.3, 30*scale, x2 - ancho_carril*0.3, alto - 30*scale],
-            outline="grey",
-            width=1*scale
-        )
+            st.session_state["retro_ia"] = explicar_con_ia(
+                adn_info["tipo"],
+                enzimas_sel,
+                frags_comb if frags_comb else [],
+                pred,
+                usar_cache=True
+            )
 
-        if fragmentos:
-            for f in sorted(fragmentos, reverse=True):
-                rel = f / max_pb_global
-                y = int(50*scale + (1 - rel) * (alto - 80*scale))
+    if st.session_state["retro_ia"] and not retro_mostrada:
+        st.write(st.session_state["retro_ia"])
 
-                if nombre not in ("Marcador", "Combinada"):
-                    y += ((hash(nombre) % 8) - 4) * scale
 
-                draw.rectangle([x1 + 15*scale, y - 4*scale, x2 - 15*scale, y + 4*scale], fill="white")
+@st.fragment
+def panel_animacion(carriles_exp):
+    # la animación solo se busca (o se dibuja, una vez por configuración) si el estudiante la abre
+    if st.toggle("▶️ Ver cómo migran las bandas durante la corrida", key="ver_animacion"):
+        with st.spinner("Preparando la animación…"), metricas.tramo("animacion"):
+            datos = animacion(carriles_exp)
+        st.image(datos, caption="Corrida del gel: las bandas pequeñas avanzan más rápido que las grandes", width=500)
+
+
+@st.fragment
+def panel_pasos(adn_sel, enzimas_sel, digestion):
+    # solo se redactan los pasos de la página visible; cambiar de página no repite la digestión
+    st.write(f"**Molécula:** {adn_sel}")
+    st.write(f"**Enzimas:** {', '.join(enzimas_sel)}")
+    for aviso in digestion.avisos():
+        st.info(aviso)
+    paginas = digestion.paginas()
+    pagina = 1
+    if paginas > 1:
+        # la clave cambia con el número de páginas, así una página guardada nunca queda fuera de rango
+        pagina = st.number_input(f"Página (de {paginas})", min_value=1, max_value=paginas, value=1, step=1, key=f"pagina_pasos_{paginas}")
+    st.markdown("\n".join("- " + paso for paso in digestion.pagina(pagina)))
+    st.write("La suma de los fragmentos debe dar la longitud total del ADN.")
+
+
+# ejercicio inverso: con las bandas de cada enzima sola y de todas juntas, el estudiante ubica
+# los sitios; se califica digiriendo su mapa y el solucionador (con tiempo máximo) da todos los mapas posibles
+# en circular la fase de cada enzima respecto del origen es libre y con 4 enzimas el
+# solucionador no termina a tiempo
+MAX_ENZIMAS_MAPA = {"lineal": 4, "circular": 3}
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def mapas_posibles(longitud, tipo, bandas):
+    return resolver_mapa(longitud, tipo, dict(bandas))
+
+
+def leer_posiciones(texto):
+    return [int(x) for x in texto.replace(";", ",").replace(" ", ",").split(",") if x.strip()]
+
+
+@st.fragment
+def panel_mapa(adn_sel, adn_info, enzimas_sel):
+    maximo = MAX_ENZIMAS_MAPA[adn_info["tipo"]]
+    if len(enzimas_sel) > maximo:
+        st.info(f"El ejercicio de mapa admite hasta {maximo} enzimas en ADN {adn_info['tipo']}.")
+        return
+    bandas = digestiones(adn_info, enzimas_sel)
+    sin_corte = [combo[0] for combo, b in bandas.items() if len(combo) == 1 and not b]
+    if sin_corte:
+        st.info(f"Para armar el mapa todas las enzimas deben cortar esta molécula (no cortan: {', '.join(sin_corte)}).")
+        return
+
+    longitud, tipo = adn_info["longitud"], adn_info["tipo"]
+    st.write(f"ADN {tipo} de {longitud} pb. Bandas obtenidas en cada digestión:")
+    for combo, b in bandas.items():
+        st.write(f"- **{' + '.join(combo)}** → {', '.join(str(x) + ' pb' for x in sorted(b, reverse=True))}")
+    st.caption("Escribe las posiciones de corte de cada enzima (en pb, separadas por comas).")
+
+    propuesta = {}
+    for enz in sorted(enzimas_sel):
+        propuesta[enz] = st.text_input(f"Sitios de {enz}", key=f"mapa_{adn_sel}_{enz}")
+
+    if st.button("Comprobar mi mapa"):
+        try:
+            propuesta = {enz: leer_posiciones(texto) for enz, texto in propuesta.items()}
+        except ValueError:
+            st.warning("Las posiciones deben ser números enteros separados por comas.")
+            return
+        if any(not p or min(p) < 0 or max(p) > longitud for p in propuesta.values()):
+            st.warning(f"Cada enzima necesita al menos una posición entre 0 y {longitud}.")
+            return
+        acierto, detalle = calificar_mapa(longitud, tipo, bandas, propuesta)
+        for combo, (coincide, obtenido) in detalle.items():
+            marca = "✅" if coincide else "❌"
+            st.write(f"{marca} **{' + '.join(combo)}** → tu mapa da {', '.join(str(x) + ' pb' for x in sorted(obtenido, reverse=True))}")
+        if not acierto:
+            st.error("Tu mapa no explica todas las bandas.")
+        elif mismo_mapa(propuesta, {enz: adn_info["sitios"][enz] for enz in enzimas_sel}, longitud, tipo):
+            st.success("¡Correcto! Tu mapa coincide con el de la molécula (salvo espejo o giro).")
+        else:
+            st.success("Tu mapa explica todas las bandas, aunque no es el de la molécula: estas digestiones no alcanzan para distinguirlos.")
 
-                if nombre == "Marcador":
-                    draw.text((x2 + 5*scale, y - 6*scale), f"{f}", fill="white", font=small_font)
+    if st.button("Ver todos los mapas posibles"):
+        with metricas.tramo("mapa"):
+            mapas, completo = mapas_posibles(longitud, tipo, tuple(bandas.items()))
+        if not completo:
+            st.warning("Se agotó el tiempo de búsqueda: la lista puede estar incompleta.")
+        st.write(f"{len(mapas)} mapa(s) compatibles con las bandas (sin contar espejos{' ni giros' if tipo == 'circular' else ''}):")
+        st.dataframe([{enz: ", ".join(map(str, cortes)) for enz, cortes in m.items()} for m in mapas])
 
-        draw.text((x1 + 5*scale, alto - 25*scale), nombre[:10], fill="white", font=small_font)
 
-        x_actual += ancho_carril + espacio
+@st.fragment
+def panel_preguntas(adn_sel, adn_info, enzimas_sel, frags_comb):
+    # inicializamos en session_state
+    if "preguntas_ia" not in st.session_state:
+        st.session_state["preguntas_ia"] = ""
 
-    return img
+    precargas = st.session_state.setdefault("precargas", {})
+    clave_preguntas = (adn_sel, adn_info["tipo"], tuple(enzimas_sel), tuple(frags_comb or []))
+    clave_banco = clave_configuracion(adn_sel, adn_info["tipo"], enzimas_sel, frags_comb)
+    usadas = st.session_state.setdefault("preguntas_usadas", set())
+    if precarga_activa() and not banco_preguntas.disponibles(clave_banco, usadas):
+        lanzar(precargas, "preguntas_ia", clave_preguntas, partes_preguntas, adn_sel, adn_info["tipo"], enzimas_sel, frags_comb)
 
-# función para explicar con IA
-def explicar_con_ia(tipo_adn, enzimas, fragmentos, prediccion_estudiante=None):
-    api_key = st.secrets.get("OPENAI_API_KEY")
-    base = (
-        "La(s) enzima(s) seleccionada(s) reconoce(n) sitios específicos en el ADN. "
-        "Cada corte genera un fragmento nuevo. En ADN lineal: fragmentos = cortes + 1. "
-        "En ADN circular: fragmentos = número de cortes (si es 1, se ve una sola banda). "
-        "El carril marcador sirve para comparar tamaños."
-    )
-    if not api_key:
-        return base
-
-    feedback_part = ""
-    if prediccion_estudiante is not None:
-        feedback_part = f"""
-El estudiante predijo {prediccion_estudiante} fragmentos.
-El resultado real fue {len(fragmentos)} fragmentos.
-Da retroalimentación breve, amable, diciendo si acertó o en qué se equivocó.
-"""
-
-    prompt = f"""
-Eres un docente de biología molecular. Explica este resultado de digestión.
-- Tipo de ADN: {tipo_adn}
-- Enzimas usadas: {', '.join(enzimas) if enzimas else 'no especificadas'}
-- Fragmentos obtenidos (pb): {fragmentos}
-{feedback_part}
-Incluye por qué el marcador ayuda a estimar tamaños.
-Usa lenguaje sencillo para estudiantes de ciencias de la salud.
-"""
-
-    endpoint = "https://api.openai.com/v1/chat/completions"
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json"
-    }
-    body = {
-        "model": "gpt-4o-mini",
-        "messages": [{"role": "user", "content": prompt}],
-        "temperature": 0.4
-    }
+    if st.button("Generar preguntas nuevas"):
+        # primero un juego del banco que el estudiante aún no haya visto; la IA solo cuando se agotan
+        sacado = banco_preguntas.sacar(clave_banco, usadas)
+        if sacado:
+            resp = sacado[1]
+            usadas.add(sacado[0])
+        else:
+            resp = tomar(precargas, "preguntas_ia", clave_preguntas, espera=ESPERA_TOMA) or call_openai(
+                mensajes_preguntas(adn_sel, adn_info["tipo"], enzimas_sel, frags_comb)
+            )
+            if juego_valido(resp):
+                usadas.add(banco_preguntas.agregar(clave_banco, resp.strip())[0])
 
-    try:
-        resp = requests.post(endpoint, headers=headers, json=body, timeout=10)
-        data = resp.json()
-        if "error" in data:
-            # si hay error de cuota o modelo, devolvemos el base
-            return base
-        return data["choices"][0]["message"]["content"]
-    except Exception:
-        return base
+        if resp:
+            st.session_state["preguntas_ia"] = resp
+        else:
+            # fallback sin IA
+            st.session_state["preguntas_ia"] = PREGUNTAS_BASE
+
+    # mostrar lo último generado
+    if st.session_state["preguntas_ia"]:
+        st.text(st.session_state["preguntas_ia"])
+
+
+@st.fragment
+def panel_tutor(adn_sel, adn_info, enzimas_sel, frags_comb):
+    pregunta_est = st.text_input("Tu pregunta al tutor")
+    if st.button("Preguntar a la IA"):
+        if pregunta_est.strip():
+            contexto = f"ADN: {adn_sel}. Tipo: {adn_info['tipo']}. Enzimas: {', '.join(enzimas_sel)}. Fragmentos: {frags_comb}."
+            mensajes = [
+                {"role": "system", "content": "Eres un tutor de biología molecular, paciente y claro."},
+                {"role": "user", "content": f"Contexto del experimento: {contexto}"},
+                {"role": "user", "content": f"Pregunta del estudiante: {pregunta_est}"}
+            ]
+            respaldo = "No pude consultar a la IA, pero: en un ADN lineal, fragmentos = cortes + 1."
+            if streaming_activo():
+                st.write_stream(call_openai_stream(mensajes, respaldo, usar_cache=True))
+            else:
+                resp = call_openai(mensajes, usar_cache=True)
+                if resp:
+                    st.write(resp)
+                else:
+                    st.write(respaldo)
+        else:
+            st.warning("Escribe una pregunta primero.")
 
-# inicializar session_state para la retro
-if "retro_ia" not in st.session_state:
-    st.session_state["retro_ia"] = None
 
 # lógica principal
+frags_comb = []
 if not enzimas_sel:
+    cancelar_todas(st.session_state.get("precargas", {}))
     st.warning("Selecciona al menos una enzima para simular.")
 else:
-    # carriles por enzima
-    carriles_exp = {}
-    for enz in enzimas_sel:
-        frags_enz, _ = digerir(adn_info, [enz])
-        carriles_exp[enz] = frags_enz
-
-    # carril combinado
-    frags_comb, pasos_comb = digerir(adn_info, enzimas_sel)
+    with metricas.tramo("digestion"):
+        # carriles por enzima, en orden alfabético como los de la animación
+        carriles_exp = {}
+        for enz in sorted(enzimas_sel):
+            frags_enz, _ = digerir(adn_info, [enz])
+            carriles_exp[enz] = frags_enz
+
+        # carril combinado
+        digestion_comb = resultado_digestion(adn_info, enzimas_sel)
+        frags_comb = digestion_comb.tolist()
     if frags_comb:
         carriles_exp["Combinada"] = frags_comb
         st.success(f"Digestión combinada → {len(frags_comb)} fragmento(s): {', '.join(str(f)+' pb' for f in frags_comb)}")
@@ -295,131 +388,30 @@ else:
         st.warning("Para esta combinación no hay sitios definidos en el prototipo.")
 
     # mostrar gel
-    img = generar_gel_multicarril(carriles_exp, scale=2)
+    with metricas.tramo("gel"):
+        img = gel_png(carriles_exp, ancho=500)
     st.image(
         img,
         caption="Gel de agarosa simulado (Marcador + carriles de digestión)",
-        use_container_width=False,
         width=500
     )
+    panel_animacion(carriles_exp)
 
    #predicción del estudiante
     st.markdown(f"<h2 style='{subtitle_style}'> Tu predicción</h2>", unsafe_allow_html=True)
-
-    pred = st.number_input(
-        "¿Cuántos fragmentos creías que iban a salir en la digestión combinada?",
-        min_value=0,
-        step=1,
-        value=len(frags_comb) if frags_comb else 0,
-        key="pred_fragmentos"
-    )
-
-    if st.button("Evaluar mi respuesta con IA", key="btn_retro_ia"):
-        st.session_state["retro_ia"] = explicar_con_ia(
-            adn_info["tipo"],
-            enzimas_sel,
-            frags_comb if frags_comb else [],
-            pred
-        )
-
-    if st.session_state["retro_ia"]:
-        st.write(st.session_state["retro_ia"])
+    panel_prediccion(adn_info, enzimas_sel, frags_comb)
 
     # explicación paso a paso
     with st.expander(" Ver explicación paso a paso"):
-        st.write(f"**Molécula:** {adn_sel}")
-        st.write(f"**Enzimas:** {', '.join(enzimas_sel)}")
-        for paso in pasos_comb:
-            st.write("• " + paso)
-        st.write("La suma de los fragmentos debe dar la longitud total del ADN.")
+        panel_pasos(adn_sel, enzimas_sel, digestion_comb)
+
+    # mapa de restricción
+    with st.expander("🗺️ Arma el mapa de restricción"):
+        panel_mapa(adn_sel, adn_info, enzimas_sel)
     
-    # función para llamar a OpenAI
-    def call_openai(messages, temperature=0.4):
-        api_key = st.secrets.get("OPENAI_API_KEY")
-        if not api_key:
-            return None  # indicamos que no hay IA
-        
-        endpoint = "https://api.openai.com/v1/chat/completions"
-        headers = {
-            "Authorization": f"Bearer {api_key}",
-            "Content-Type": "application/json"
-        }
-        body = {
-            "model": "gpt-4o-mini",
-            "messages": messages,
-            "temperature": temperature
-        }
-        try:
-            resp = requests.post(endpoint, headers=headers, json=body, timeout=15)
-            data = resp.json()
-            if "error" in data:
-                st.error(f"Error de la API: {data['error'].get('message')}")
-                return None
-            return data["choices"][0]["message"]["content"]
-        except Exception as e:
-            st.error(f"No se pudo conectar a la API: {e}")
-            return None
    #preguntas generadas por IA
     st.markdown(f"<h2 style='{subtitle_style}'> Preguntas generadas por IA sobre este experimento</h2>", unsafe_allow_html=True)
-    # inicializamos en session_state
-    if "preguntas_ia" not in st.session_state:
-        st.session_state["preguntas_ia"] = ""
-
-    if st.button("Generar preguntas nuevas"):
-        contexto = f"""
-ADN seleccionado: {adn_sel}
-Tipo de ADN: {adn_info['tipo']}
-Enzimas usadas: {', '.join(enzimas_sel) if enzimas_sel else 'ninguna'}
-Fragmentos obtenidos: {frags_comb if frags_comb else 'sin cortes'}
-"""
-        
-        resp = call_openai([
-            {
-                "role": "system",
-                "content": "Eres un profesor de biología molecular que crea ejercicios cortos y claros."
-            },
-            {
-                "role": "user",
-                "content": f"""
-Con el siguiente contexto de una práctica de digestión con enzimas de restricción:
-
-{contexto}
-
-Genera de 3 a 4 preguntas diferentes cada vez.
-- Mezcla tipos de pregunta: definición, aplicación, '¿qué pasaría si...?', e interpretación del gel.
-- Después de cada pregunta escribe la respuesta correcta en una línea aparte.
-- Usa este formato exactamente:
-
-P1: ...
-R1: ...
-P2: ...
-R2: ...
-P3: ...
-R3: ...
-P4: ...
-R4: ...
-
-No expliques, solo preguntas y respuestas.
-"""
-            }
-        ])
-
-        if resp:
-            st.session_state["preguntas_ia"] = resp
-        else:
-            # fallback sin IA
-            st.session_state["preguntas_ia"] = (
-                "P1: ¿Cuántos fragmentos se obtienen si hay dos cortes en un ADN lineal?\n"
-                "R1: Se obtienen 3 fragmentos.\n"
-                "P2: ¿Para qué sirve el marcador de peso molecular?\n"
-                "R2: Para estimar el tamaño de los fragmentos.\n"
-                "P3: Si una enzima no tiene sitio en el ADN elegido, ¿qué ocurre?\n"
-                "R3: No hay digestión con esa enzima."
-            )
-
-    # mostrar lo último generado
-    if st.session_state["preguntas_ia"]:
-        st.text(st.session_state["preguntas_ia"])
+    panel_preguntas(adn_sel, adn_info, enzimas_sel, frags_comb)
 
 
     # comparación de enzimas
@@ -432,112 +424,250 @@ No expliques, solo preguntas y respuestas.
     # tutor virtual contextual
     st.markdown(f"<h2 style='{subtitle_style}'>💬 Tutor virtual contextual</h2>", unsafe_allow_html=True)
     st.write("Haz una pregunta sobre este resultado (por ejemplo: por qué hay 3 fragmentos si son 2 enzimas).")
-    pregunta_est = st.text_input("Tu pregunta al tutor")
-    if st.button("Preguntar a la IA"):
-        if pregunta_est.strip():
-            contexto = f"ADN: {adn_sel}. Tipo: {adn_info['tipo']}. Enzimas: {', '.join(enzimas_sel)}. Fragmentos: {frags_comb}."
-            resp = call_openai([
-                {"role": "system", "content": "Eres un tutor de biología molecular, paciente y claro."},
-                {"role": "user", "content": f"Contexto del experimento: {contexto}"},
-                {"role": "user", "content": f"Pregunta del estudiante: {pregunta_est}"}
-            ])
-            if resp:
-                st.write(resp)
-            else:
-                st.write("No pude consultar a la IA, pero: en un ADN lineal, fragmentos = cortes + 1.")
-        else:
-            st.warning("Escribe una pregunta primero.")
+    panel_tutor(adn_sel, adn_info, enzimas_sel, frags_comb)
             
 
 # recogemos satisfacción y uso de IA
 st.markdown(f"<h3 style='{subtitle_style}'>📝 Evalúa esta práctica</h3>", unsafe_allow_html=True)
-satisfaccion = st.slider("¿Qué tan útil te pareció la explicación de la app/IA?", 1, 5, 4)
-uso_ia = st.checkbox("Usé alguna función de IA (tutor, preguntas, explicación)", value=True)
-
-# datos anónimos
-nombre_est = st.text_input("Las respuestas son anónimas", value="anónimo")
-
-if st.button("Guardar mi resultado"):
-    registro = {
-        "fecha": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "estudiante": nombre_est,
-        "adn": adn_sel,
-        "enzimas": ", ".join(enzimas_sel),
-        "fragmentos_reales": len(frags_comb) if frags_comb else 0,
-        "prediccion": pred,
-        "acierto": int(pred == (len(frags_comb) if frags_comb else 0)),
-        "satisfaccion": satisfaccion,
-        "uso_ia": int(uso_ia),
-    }
 
-    if os.path.exists("resultados_app.csv"):
-        df_prev = pd.read_csv("resultados_app.csv")
-        df_new = pd.concat([df_prev, pd.DataFrame([registro])], ignore_index=True)
-    else:
-        df_new = pd.DataFrame([registro])
+@st.fragment
+def formulario_evaluacion(adn_sel, enzimas_sel, frags_comb):
+    satisfaccion = st.slider("¿Qué tan útil te pareció la explicación de la app/IA?", 1, 5, 4)
+    uso_ia = st.checkbox("Usé alguna función de IA (tutor, preguntas, explicación)", value=True)
+
+    # datos anónimos
+    nombre_est = st.text_input("Las respuestas son anónimas", value="anónimo")
+
+    if st.button("Guardar mi resultado"):
+        pred = st.session_state.get("pred_fragmentos", 0)
+        registro = {
+            "fecha": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "estudiante": nombre_est,
+            "adn": adn_sel,
+            "enzimas": ", ".join(enzimas_sel),
+            "fragmentos_reales": len(frags_comb) if frags_comb else 0,
+            "prediccion": pred,
+            "acierto": int(pred == (len(frags_comb) if frags_comb else 0)),
+            "satisfaccion": satisfaccion,
+            "uso_ia": int(uso_ia),
+        }
 
-    df_new.to_csv("resultados_app.csv", index=False)
-    st.success("✅ Resultado guardado")
+        with metricas.tramo("guardado"):
+            guardar_resultado(registro)
+        # el panel de indicadores se actualiza con una ejecución completa
+        st.session_state["resultado_guardado"] = True
+        st.rerun()
+
+    if st.session_state.pop("resultado_guardado", False):
+        st.success("✅ Resultado guardado")
+
+formulario_evaluacion(adn_sel, enzimas_sel, frags_comb)
 
 
 st.markdown(f"<h2 style='{subtitle_style}'>📊 Resultados del piloto / indicadores</h2>", unsafe_allow_html=True)
 
-if os.path.exists("resultados_app.csv"):
-    df = pd.read_csv("resultados_app.csv")
-
-    # valores base
-    total_registros = len(df)
-    aciertos_pct = df["acierto"].mean() * 100 if "acierto" in df.columns else 0
-    satisf_prom = df["satisfaccion"].mean() if "satisfaccion" in df.columns else 0
-    adopcion_pct = df["uso_ia"].mean() * 100 if "uso_ia" in df.columns else 0
-
-    # fila de métricas
-    col1, col2, col3, col4 = st.columns(4)
-    with col1:
-        st.metric("Simulaciones registradas", total_registros)
-    with col2:
-        st.metric("Aciertos en predicción", f"{aciertos_pct:.1f} %")
-    with col3:
-        st.metric("Satisfacción media", f"{satisf_prom:.2f} / 5")
-    with col4:
-        st.metric("Uso de IA", f"{adopcion_pct:.1f} %")
-
-    st.markdown(f"<h3 style='{subtitle_style}'>📈 Barras de progreso</h3>", unsafe_allow_html=True)
-    st.write("Nivel de logro respecto a la meta propuesta (ej. 70% aciertos, 60% uso IA).")
-    st.write("Aciertos")
-    st.progress(min(int(aciertos_pct), 100))
-    st.write("Uso de IA")
-    st.progress(min(int(adopcion_pct), 100))
-
-    st.markdown(f"<h3 style='{subtitle_style}'>🧬 ADN más usado</h3>", unsafe_allow_html=True)
-    if "adn" in df.columns:
-        st.dataframe(df["adn"].value_counts().head(5).reset_index().rename(
-            columns={"index": "ADN", "adn": "veces"}
-        ))
-    else:
-        st.write("No hay datos de ADN aún.")
+@st.fragment
+@metricas.tramo("panel")
+def panel_resultados():
+    resumen = resumen_general()
+    if resumen["registros"] > 0:
+        # valores base (resúmenes mantenidos al guardar cada registro)
+        total_registros = resumen["registros"]
+        aciertos_pct = resumen["acierto"] * 100
+        satisf_prom = resumen["satisfaccion"]
+        adopcion_pct = resumen["uso_ia"] * 100
+
+        # fila de métricas
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("Simulaciones registradas", total_registros)
+        with col2:
+            st.metric("Aciertos en predicción", f"{aciertos_pct:.1f} %")
+        with col3:
+            st.metric("Satisfacción media", f"{satisf_prom:.2f} / 5")
+        with col4:
+            st.metric("Uso de IA", f"{adopcion_pct:.1f} %")
+
+        st.markdown(f"<h3 style='{subtitle_style}'>📈 Barras de progreso</h3>", unsafe_allow_html=True)
+        st.write("Nivel de logro respecto a la meta propuesta (ej. 70% aciertos, 60% uso IA).")
+        st.write("Aciertos")
+        st.progress(min(int(aciertos_pct), 100))
+        st.write("Uso de IA")
+        st.progress(min(int(adopcion_pct), 100))
+
+        st.markdown(f"<h3 style='{subtitle_style}'>🧬 ADN más usado</h3>", unsafe_allow_html=True)
+        top_adn = resumen_por("resumen_adn", limite=5)
+        if len(top_adn):
+            st.dataframe(top_adn[["grupo", "registros"]].rename(columns={"grupo": "ADN", "registros": "veces"}))
+        else:
+            st.write("No hay datos de ADN aún.")
+
+        st.markdown(f"<h3 style='{subtitle_style}'> Enzimas más usadas</h3>", unsafe_allow_html=True)
+        top_enzimas = resumen_por("resumen_enzimas", limite=5)
+        if len(top_enzimas):
+            st.dataframe(top_enzimas[["grupo", "registros"]].rename(columns={"grupo": "Enzimas", "registros": "veces"}))
+        else:
+            st.write("No hay datos de enzimas aún.")
+
+        with st.expander("Resumen por día y por molécula"):
+            columnas = {"grupo": "Día", "registros": "registros", "acierto": "aciertos", "satisfaccion": "satisfacción", "uso_ia": "uso IA"}
+            st.dataframe(resumen_por("resumen_dia", orden="grupo DESC").rename(columns=columnas))
+            st.dataframe(resumen_por("resumen_adn").rename(columns={**columnas, "grupo": "ADN"}))
 
-    st.markdown(f"<h3 style='{subtitle_style}'> Enzimas más usadas</h3>", unsafe_allow_html=True)
-    if "enzimas" in df.columns:
-        st.dataframe(df["enzimas"].value_counts().head(5).reset_index().rename(
-            columns={"index": "Enzimas", "enzimas": "veces"}
-        ))
     else:
-        st.write("No hay datos de enzimas aún.")
+        st.info("Aún no hay datos guardados. Cuando los estudiantes usen la app y se guarden los resultados, aquí verás el panel.")
+
+    # descarga bajo demanda: el archivo solo se genera cuando alguien lo pide
+    if contar_resultados() > 0:
+        with st.expander("⬇️ Descargar resultados (CSV o Parquet)"):
+            primer_dia, ultimo_dia = rango_fechas()
+            try:
+                rango_def = (date.fromisoformat(primer_dia), date.fromisoformat(ultimo_dia))
+            except (TypeError, ValueError):
+                rango_def = (date.today(), date.today())
+            rango = st.date_input("Rango de fechas", value=rango_def)
+            columnas_exp = st.multiselect("Columnas", COLUMNAS, default=COLUMNAS)
+            formato_exp = st.radio("Formato", ["CSV", "Parquet"], horizontal=True)
+            desde = rango[0] if len(rango) > 0 else None
+            hasta = rango[1] if len(rango) > 1 else desde
+            filtros_exp = (desde, hasta, tuple(columnas_exp), formato_exp)
+
+            if not columnas_exp:
+                st.caption("Elige al menos una columna para preparar el archivo.")
+            if st.button("Preparar archivo", key="btn_exportar", disabled=not columnas_exp):
+                try:
+                    datos_exp = exportar(formato_exp.lower(), desde, hasta, columnas_exp)
+                    st.session_state["exportacion"] = (filtros_exp, datos_exp)
+                except ImportError:
+                    st.warning("Para exportar en Parquet hace falta instalar pyarrow en el servidor.")
+
+            # el archivo preparado solo se ofrece mientras los filtros no cambien
+            exportacion = st.session_state.get("exportacion")
+            if exportacion and exportacion[0] == filtros_exp:
+                extension = "parquet" if formato_exp == "Parquet" else "csv"
+                st.download_button(
+                    f"Descargar resultados_app.{extension}",
+                    exportacion[1],
+                    file_name=f"resultados_app.{extension}",
+                    mime="application/vnd.apache.parquet" if extension == "parquet" else "text/csv",
+                )
+    else:
+        st.info("Aún no hay archivo de resultados en este servidor. Vuelve a generar datos y luego descárgalos.")
+        st.caption("⚠️ Recuerda: en Streamlit Cloud el archivo se borra cuando el servidor se reinicia o pasa tiempo sin uso.")
+
+panel_resultados()
+
+
+# paneles para docentes: solo aparecen si PANEL_DOCENTE_CLAVE está en los secrets; la clave
+# se pide una vez por sesión
+def acceso_docente(clave_docente, clave_campo):
+    if st.session_state.get("docente"):
+        return True
+    clave = st.text_input("Clave de docente", type="password", key=clave_campo)
+    if not clave:
+        return False
+    if not hmac.compare_digest(clave.encode("utf-8"), str(clave_docente).encode("utf-8")):
+        st.error("Clave incorrecta.")
+        return False
+    st.session_state["docente"] = True
+    return True
+
+
+@st.fragment
+def panel_rendimiento(clave_docente):
+    with st.expander("⏱️ Rendimiento de la app (docentes)"):
+        if not acceso_docente(clave_docente, "clave_docente"):
+            return
+
+        filas = metricas.resumen()
+        if not filas:
+            st.info("Todavía no hay medidas en este proceso.")
+            return
+        st.caption("Tiempos de todas las sesiones desde que arrancó el servidor (percentiles estimados por cubos).")
+        st.dataframe(
+            [{k: v for k, v in fila.items() if k != "cubos"} for fila in filas],
+            column_config={c: st.column_config.NumberColumn(format="%.1f") for c in ("media_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms")},
+        )
 
-else:
-    st.info("Aún no hay datos guardados. Cuando los estudiantes usen la app y se guarden los resultados, aquí verás el panel.")
+        nombres = [", ".join(f"{k}={v}" for k, v in fila.items() if k in ("tramo", "modo", "estado")) for fila in filas]
+        elegido = st.selectbox("Histograma", range(len(filas)), format_func=lambda i: nombres[i])
+        limites = [f"≤ {l * 1000:g} ms" for l in metricas.limites] + [f"> {metricas.limites[-1] * 1000:g} ms"]
+        st.vega_lite_chart(
+            [{"cubo": c, "veces": n} for c, n in zip(limites, filas[elegido]["cubos"])],
+            {
+                "mark": "bar",
+                "encoding": {
+                    "x": {"field": "cubo", "type": "ordinal", "sort": None, "title": "duración"},
+                    "y": {"field": "veces", "type": "quantitative"},
+                },
+            },
+        )
 
-# Solo mostrar el enlace de descarga si el archivo existe
-if os.path.exists("resultados_app.csv"):
-    with open("resultados_app.csv", "rb") as f:
-        data = f.read()
-    b64 = base64.b64encode(data).decode()
-    href = f'<a href="data:file/csv;base64,{b64}" download="resultados_app.csv">Haz clic aquí para descargar el archivo CSV</a>'
-    st.markdown(href, unsafe_allow_html=True)
-else:
-    st.info("Aún no hay archivo de resultados en este servidor. Vuelve a generar datos y luego descárgalos.")
-    st.caption("⚠️ Recuerda: en Streamlit Cloud el archivo se borra cuando el servidor se reinicia o pasa tiempo sin uso.")
+        totales = metricas.totales()
+        if totales:
+            st.write("Peticiones a la IA y tokens")
+            st.dataframe(totales)
+        st.download_button("Descargar métricas (Prometheus)", metricas.texto(), file_name="metricas.prom", mime="text/plain")
+
+
+# calificación en lote de una hoja de respuestas (examen práctico) subida por el docente
+@st.fragment
+def panel_calificacion(clave_docente):
+    with st.expander("📋 Calificar hoja de respuestas (docentes)"):
+        if not acceso_docente(clave_docente, "clave_docente_hoja"):
+            return
+        st.caption(
+            "CSV con una fila por respuesta y columnas adn, enzimas, prediccion y, si se quiere, "
+            "estudiante, pregunta, tamanos (separados por ;) y tolerancia (pb o %)."
+        )
+        archivo = st.file_uploader("Hoja de respuestas", type=["csv"], key="hoja_respuestas")
+        tolerancia = st.text_input("Tolerancia de los tamaños si la hoja no la indica", value=TOLERANCIA)
+        if archivo is None:
+            return
+
+        clave_hoja = (archivo.file_id, tolerancia)
+        if st.button("Calificar hoja"):
+            try:
+                hoja = leer_hoja(archivo.getvalue())
+            except (ErrorHoja, ValueError) as e:
+                st.error(f"No se pudo leer la hoja: {e}")
+                return
+            # moléculas de la sesión y, las que falten, del catálogo
+            moleculas = dict(adn_db)
+            for nombre in hoja["adn"].str.strip().unique():
+                if nombre not in moleculas and nombre in catalogo:
+                    moleculas[nombre] = catalogo.molecula(nombre)
+            with metricas.tramo("calificacion"):
+                calificada = calificar_hoja(hoja, moleculas, tolerancia)
+                estadisticas = dificultad(calificada)
+            st.session_state["hoja_calificada"] = (clave_hoja, calificada, estadisticas)
+
+        guardada = st.session_state.get("hoja_calificada")
+        if not guardada or guardada[0] != clave_hoja:
+            return
+        _, calificada, estadisticas = guardada
+        validas = calificada["error"] == ""
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Respuestas", len(calificada))
+        col2.metric("Con error", int((~validas).sum()))
+        col3.metric("Aciertos", f"{calificada.loc[validas, 'acierto'].mean() * 100:.1f} %" if validas.any() else "—")
+        if not validas.all():
+            st.write("Filas que no se pudieron calificar:")
+            st.dataframe(calificada[~validas].head(20))
+        st.write("Dificultad por pregunta (índice = fracción de aciertos):")
+        st.dataframe(estadisticas)
+        nombre = archivo.name.rsplit(".", 1)[0]
+        st.download_button(
+            "Descargar hoja calificada (CSV)", calificada.to_csv(index=False), file_name=f"{nombre}_calificada.csv", mime="text/csv"
+        )
+        st.download_button(
+            "Descargar dificultad por pregunta (CSV)", estadisticas.to_csv(index=False), file_name=f"{nombre}_dificultad.csv", mime="text/csv"
+        )
+
+clave_docente = secreto("PANEL_DOCENTE_CLAVE")
+if clave_docente:
+    panel_rendimiento(clave_docente)
+    panel_calificacion(clave_docente)
 
 
 st.caption("Prototipo educativo con Streamlit + IA (explicación, retroalimentación, preguntas y tutor).")
@@ -0,0 +1,190 @@
+import argparse
+import json
+import logging
+import os
+import random
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import combinations
+
+from digestion import digerir
+from ia import ErrorIA, cliente_ia, mensajes_preguntas
+from moleculas import adn_db
+
+# banco de preguntas generadas de antemano para cada molécula y combinación de enzimas:
+# la app saca juegos al azar (sin repetir dentro de la sesión) y solo llama a la IA
+# cuando se agotan los de esa configuración
+# uso: python banco.py [--juegos 10] [--hilos 8]  (se puede interrumpir y volver a lanzar)
+
+log = logging.getLogger(__name__)
+
+RUTA_BANCO = "banco_preguntas.db"
+JUEGOS_POR_CONFIGURACION = 10
+
+# más variedad que en la app para que los juegos de una misma configuración no se repitan
+TEMPERATURA = 0.9
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS preguntas (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    clave TEXT NOT NULL,
+    texto TEXT NOT NULL,
+    UNIQUE (clave, texto)
+);
+"""
+
+
+def clave_configuracion(adn, tipo_adn, enzimas, fragmentos):
+    # el orden en que se eligieron las enzimas no cambia el experimento
+    return json.dumps([adn, tipo_adn, sorted(enzimas), list(fragmentos or [])], ensure_ascii=False)
+
+
+def configuraciones(catalogo=adn_db):
+    # (clave, adn, tipo, enzimas, fragmentos) para cada molécula y cada combinación de las
+    # enzimas que ofrece la app (también las que no cortan esa molécula)
+    enzimas = sorted({e for adn in catalogo.values() for e in adn["sitios"]})
+    for nombre, adn in catalogo.items():
+        for n in range(1, len(enzimas) + 1):
+            for combo in combinations(enzimas, n):
+                fragmentos, _ = digerir(adn, combo)
+                clave = clave_configuracion(nombre, adn["tipo"], combo, fragmentos)
+                yield clave, nombre, adn["tipo"], list(combo), fragmentos
+
+
+def juego_valido(texto):
+    return bool(texto) and "P1:" in texto and "R1:" in texto
+
+
+def _version(ruta):
+    # (fecha, tamaño) del archivo y de su -wal: cambia cuando alguien escribe en el banco
+    version = []
+    for archivo in (ruta, ruta + "-wal"):
+        try:
+            estado = os.stat(archivo)
+            version.append((estado.st_mtime_ns, estado.st_size))
+        except OSError:
+            version.append(None)
+    return tuple(version)
+
+
+class BancoPreguntas:
+    # índice en memoria clave -> [(id, texto)], cargado del archivo SQLite y releído solo si el
+    # archivo cambia (p. ej. construir() en otro proceso), sin reiniciar la app
+    def __init__(self, ruta=RUTA_BANCO):
+        self.ruta = ruta
+        self._lock = threading.Lock()
+        self._indice = None
+        self._version = None
+
+    def _conectar(self):
+        con = sqlite3.connect(self.ruta, timeout=30, isolation_level=None)
+        con.execute("PRAGMA journal_mode=WAL")
+        con.executescript(ESQUEMA)
+        return con
+
+    def _cargar(self):
+        version = _version(self.ruta)
+        if self._indice is None or version != self._version:
+            indice = {}
+            con = self._conectar()
+            try:
+                for id_, clave, texto in con.execute("SELECT id, clave, texto FROM preguntas ORDER BY id"):
+                    indice.setdefault(clave, []).append((id_, texto))
+            finally:
+                con.close()
+            self._indice = indice
+            self._version = version
+        return self._indice
+
+    def contar(self, clave):
+        with self._lock:
+            return len(self._cargar().get(clave, ()))
+
+    def disponibles(self, clave, usadas=()):
+        with self._lock:
+            return sum(1 for id_, _ in self._cargar().get(clave, ()) if id_ not in usadas)
+
+    def sacar(self, clave, usadas=()):
+        # (id, texto) al azar entre los juegos que aún no se usaron, o None si no queda ninguno
+        with self._lock:
+            candidatos = [j for j in self._cargar().get(clave, ()) if j[0] not in usadas]
+        return random.choice(candidatos) if candidatos else None
+
+    def agregar(self, clave, texto):
+        # devuelve (id, nuevo); un texto repetido para la misma clave no se guarda dos veces
+        with self._lock:
+            indice = self._cargar()
+            con = self._conectar()
+            try:
+                cur = con.execute("INSERT OR IGNORE INTO preguntas (clave, texto) VALUES (?, ?)", (clave, texto))
+                if cur.rowcount:
+                    indice.setdefault(clave, []).append((cur.lastrowid, texto))
+                    resultado = cur.lastrowid, True
+                else:
+                    fila = con.execute("SELECT id FROM preguntas WHERE clave = ? AND texto = ?", (clave, texto)).fetchone()
+                    resultado = fila[0], False
+            finally:
+                con.close()
+            # lo que se acaba de escribir ya está en el índice: este cambio no obliga a releerlo
+            self._version = _version(self.ruta)
+            return resultado
+
+
+banco_preguntas = BancoPreguntas()
+
+
+def construir(juegos=JUEGOS_POR_CONFIGURACION, hilos=8, ruta=RUTA_BANCO, catalogo=adn_db):
+    # completa hasta `juegos` juegos por configuración; lo ya guardado no se vuelve a pedir
+    cliente = cliente_ia()
+    if cliente is None:
+        raise ErrorIA("No hay clave de la API configurada")
+    banco = BancoPreguntas(ruta)
+    pendientes = []
+    for clave, adn, tipo, enzimas, fragmentos in configuraciones(catalogo):
+        faltan = juegos - banco.contar(clave)
+        pendientes += [(clave, mensajes_preguntas(adn, tipo, enzimas, fragmentos))] * max(faltan, 0)
+    log.info("%d juegos por generar", len(pendientes))
+
+    resumen = {"nuevos": 0, "repetidos": 0, "fallidos": 0}
+    # las peticiones van directo al cliente: sin caché ni agrupación, cada una debe dar un juego distinto
+    pool = ThreadPoolExecutor(max_workers=hilos)
+    try:
+        futuros = {pool.submit(cliente.completar, mensajes, TEMPERATURA, 30): clave for clave, mensajes in pendientes}
+        for i, futuro in enumerate(as_completed(futuros), 1):
+            try:
+                texto = futuro.result()
+            except ErrorIA as e:
+                log.warning("%s", e)
+                resumen["fallidos"] += 1
+                continue
+            if not juego_valido(texto):
+                resumen["fallidos"] += 1
+                continue
+            _, nuevo = banco.agregar(futuros[futuro], texto.strip())
+            resumen["nuevos" if nuevo else "repetidos"] += 1
+            if i % 50 == 0:
+                log.info("%d/%d", i, len(pendientes))
+    finally:
+        # al interrumpir se descarta lo que no empezó; lo guardado se conserva para la próxima vez
+        pool.shutdown(wait=True, cancel_futures=True)
+    return resumen
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera el banco de preguntas de la app")
+    parser.add_argument("--juegos", type=int, default=JUEGOS_POR_CONFIGURACION, help="juegos por configuración")
+    parser.add_argument("--hilos", type=int, default=8, help="peticiones simultáneas")
+    parser.add_argument("--ruta", default=RUTA_BANCO)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    try:
+        resumen = construir(args.juegos, args.hilos, args.ruta)
+    except KeyboardInterrupt:
+        print("interrumpido: lo generado quedó guardado, vuelve a lanzarlo para continuar")
+        return
+    print(f"nuevos: {resumen['nuevos']}  repetidos: {resumen['repetidos']}  fallidos: {resumen['fallidos']}")
+
+
+if __name__ == "__main__":
+    main()
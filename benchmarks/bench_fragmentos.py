@@ -0,0 +1,46 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sesion_streamlit import Servidor, Sesion
+
+# CPU del servidor por interacción: cada cambio de un widget como rerun de toda la página
+# (lo que hacía la app antes de dividirse en fragmentos) frente al rerun de solo su fragmento
+# uso: python benchmarks/bench_fragmentos.py [interacciones]
+
+SLIDER = "¿Qué tan útil te pareció la explicación de la app/IA?"
+TUTOR = "Tu pregunta al tutor"
+
+
+def medir(servidor, sesion, n, solo_fragmento):
+    cpu = servidor.cpu()
+    for i in range(n):
+        sesion.fijar(SLIDER, double_array_value={"data": [1 + i % 5]})
+        sesion.ejecutar(sesion.fragmento(SLIDER) if solo_fragmento else "")
+        sesion.fijar(TUTOR, string_value=f"pregunta {i}")
+        sesion.ejecutar(sesion.fragmento(TUTOR) if solo_fragmento else "")
+    return (servidor.cpu() - cpu) / (2 * n)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    servidor = Servidor()
+    try:
+        sesion = Sesion(servidor.url)
+        for _ in range(3):
+            sesion.ejecutar()
+        completa = medir(servidor, sesion, n, solo_fragmento=False)
+        fragmento = medir(servidor, sesion, n, solo_fragmento=True)
+        sesion.cerrar()
+    finally:
+        servidor.cerrar()
+
+    print(f"interacciones: {2 * n}")
+    print(f"rerun completo:   {completa * 1000:8.2f} ms de CPU por interacción")
+    print(f"rerun fragmento:  {fragmento * 1000:8.2f} ms de CPU por interacción")
+    print(f"reducción:        {(1 - fragmento / completa) * 100:8.1f} %")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from digestion import combinaciones_enzimas, digerir, digerir_lote_plano
+
+# compara digerir() en un bucle contra la digestión en lote con todas las combinaciones
+# de enzimas de un catálogo sintético (uso: python benchmarks/bench_lote.py [moléculas])
+
+
+def catalogo_sintetico(n_moleculas, n_enzimas=8, semilla=0):
+    rnd = random.Random(semilla)
+    moleculas = []
+    for i in range(n_moleculas):
+        longitud = rnd.randint(3000, 12000)
+        posiciones = rnd.sample(range(1, longitud), n_enzimas * 6)
+        sitios = {}
+        for j in range(n_enzimas):
+            n = rnd.randint(1, 6)
+            sitios[f"Enz{j}"], posiciones = posiciones[:n], posiciones[n:]
+        moleculas.append({
+            "tipo": "circular" if i % 2 else "lineal",
+            "longitud": longitud,
+            "sitios": sitios,
+        })
+    return moleculas
+
+
+def mejor_tiempo(funcion, repeticiones=5):
+    tiempos = []
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        resultado = funcion()
+        tiempos.append(time.perf_counter() - t0)
+    return min(tiempos), resultado
+
+
+def main():
+    n_moleculas = int(sys.argv[1]) if len(sys.argv) > 1 else 48
+    trabajos = [(adn, combo) for adn in catalogo_sintetico(n_moleculas) for combo in combinaciones_enzimas(adn)]
+
+    t_bucle, esperado = mejor_tiempo(lambda: [digerir(adn, combo)[0] for adn, combo in trabajos])
+    t_lote, (fragmentos, inicios) = mejor_tiempo(lambda: digerir_lote_plano(trabajos))
+
+    plano = [f for frags in esperado for f in frags]
+    if fragmentos.tolist() != plano or inicios[-1] != len(plano):
+        sys.exit("ERROR: la digestión en lote no coincide con digerir()")
+
+    print(f"trabajos: {len(trabajos)}  fragmentos: {len(plano)}")
+    print(f"digerir() en bucle: {t_bucle * 1000:8.1f} ms")
+    print(f"digerir_lote:       {t_lote * 1000:8.1f} ms")
+    print(f"aceleración:        {t_bucle / t_lote:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from mock_ia import ServidorIA
+from moleculas import adn_db
+from sesion_streamlit import Servidor, Sesion
+
+# prueba de carga: N sesiones simuladas recorren la app real (molécula, enzimas, evaluar,
+# tutor, guardar) contra un servidor de IA local, con cada vez más sesiones simultáneas
+# uso: python benchmarks/carga.py [--sesiones 1,5,10,25] [--latencia 0.8] [--errores 0.05]
+
+MOLECULA = "1. Elige la molécula de ADN"
+ENZIMAS = "2. Elige la(s) enzima(s) de restricción"
+PREDICCION = "¿Cuántos fragmentos creías que iban a salir en la digestión combinada?"
+EVALUAR = "Evaluar mi respuesta con IA"
+TUTOR = "Tu pregunta al tutor"
+PREGUNTAR = "Preguntar a la IA"
+GUARDAR = "Guardar mi resultado"
+
+
+def recorrido(url, numero, vueltas, medidas, semilla=0):
+    # una sesión: [(paso, segundos, error o None)] en `medidas`
+    rnd = random.Random(semilla * 1000 + numero)
+    enzimas = sorted({e for adn in adn_db.values() for e in adn["sitios"]})
+
+    def paso(nombre, accion):
+        try:
+            segundos = accion()
+            errores = sesion.errores()
+            medidas.append((nombre, segundos, errores[0] if errores else None))
+        except Exception as e:
+            medidas.append((nombre, None, f"{type(e).__name__}: {e}"))
+            raise
+
+    try:
+        sesion = Sesion(url)
+        paso("carga", sesion.ejecutar)
+        for vuelta in range(vueltas):
+            sesion.fijar(MOLECULA, string_value=rnd.choice(list(adn_db)))
+            paso("molecula", sesion.ejecutar)
+            elegidas = rnd.sample(enzimas, rnd.randint(1, len(enzimas)))
+            sesion.fijar(ENZIMAS, string_array_value={"data": elegidas})
+            paso("enzimas", sesion.ejecutar)
+            sesion.fijar(PREDICCION, double_value=rnd.randint(1, 4))
+            paso("evaluar", lambda: sesion.pulsar(EVALUAR))
+            sesion.fijar(TUTOR, string_value=f"¿Por qué salen estos fragmentos? (sesión {numero}, vuelta {vuelta})")
+            paso("tutor", lambda: sesion.pulsar(PREGUNTAR))
+            paso("guardar", lambda: sesion.pulsar(GUARDAR))
+        sesion.cerrar()
+    except Exception:
+        # el error ya quedó registrado; la sesión se abandona como lo haría un navegador caído
+        pass
+
+
+def nivel(url, sesiones, vueltas, semilla=0):
+    medidas = []
+    hilos = [
+        threading.Thread(target=recorrido, args=(url, i, vueltas, medidas, semilla))
+        for i in range(sesiones)
+    ]
+    inicio = time.perf_counter()
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    duracion = time.perf_counter() - inicio
+    return medidas, duracion
+
+
+def resumir(medidas, duracion):
+    tiempos = np.array([s for _, s, _ in medidas if s is not None])
+    por_paso = {}
+    for nombre in dict.fromkeys(n for n, _, _ in medidas):
+        t = np.array([s for n, s, _ in medidas if n == nombre and s is not None])
+        if len(t):
+            por_paso[nombre] = {"p50": float(np.percentile(t, 50)), "p95": float(np.percentile(t, 95))}
+    errores = [e for _, _, e in medidas if e]
+    return {
+        "reruns": len(medidas),
+        "p50": float(np.percentile(tiempos, 50)) if len(tiempos) else None,
+        "p95": float(np.percentile(tiempos, 95)) if len(tiempos) else None,
+        "p99": float(np.percentile(tiempos, 99)) if len(tiempos) else None,
+        "reruns_por_segundo": len(tiempos) / duracion,
+        "errores": len(errores),
+        "ejemplos_de_error": sorted(set(errores))[:5],
+        "por_paso": por_paso,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga de la app con sesiones simuladas")
+    parser.add_argument("--sesiones", default="1,5,10,25", help="niveles de concurrencia, separados por comas")
+    parser.add_argument("--vueltas", type=int, default=2, help="recorridos completos por sesión")
+    parser.add_argument("--latencia", type=float, default=0.8, help="segundos hasta el primer token del mock")
+    parser.add_argument("--errores", type=float, default=0.0, help="fracción de respuestas con error del mock")
+    parser.add_argument("--por-minuto", type=int, default=100000, help="OPENAI_PETICIONES_POR_MINUTO de la app")
+    parser.add_argument("--streaming", choices=["si", "no"], default="si")
+    parser.add_argument("--puerto", type=int, default=8599)
+    parser.add_argument("--salida", help="archivo JSON con el resumen")
+    args = parser.parse_args()
+
+    ia = ServidorIA(latencia=args.latencia, errores=args.errores, semilla=0).iniciar()
+    servidor = Servidor(args.puerto, secrets={
+        "OPENAI_API_KEY": "prueba-de-carga",
+        "OPENAI_BASE_URL": ia.url,
+        "OPENAI_PETICIONES_POR_MINUTO": args.por_minuto,
+        "IA_STREAMING": args.streaming == "si",
+    })
+    informe = {"latencia_mock": args.latencia, "errores_mock": args.errores, "niveles": {}}
+    try:
+        print(f"{'sesiones':>8} {'reruns':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'reruns/s':>9} {'errores':>8} {'IA':>5} {'IA err':>7}")
+        for n in [int(x) for x in args.sesiones.split(",")]:
+            peticiones, fallidas = ia.peticiones, ia.fallidas
+            medidas, duracion = nivel(servidor.url, n, args.vueltas)
+            resumen = resumir(medidas, duracion)
+            resumen["peticiones_ia"] = ia.peticiones - peticiones
+            resumen["errores_ia"] = ia.fallidas - fallidas
+            informe["niveles"][n] = resumen
+            print(
+                f"{n:8d} {resumen['reruns']:7d} {(resumen['p50'] or 0) * 1000:8.0f} {(resumen['p95'] or 0) * 1000:8.0f} "
+                f"{(resumen['p99'] or 0) * 1000:8.0f} {resumen['reruns_por_segundo']:9.1f} {resumen['errores']:8d} "
+                f"{resumen['peticiones_ia']:5d} {resumen['errores_ia']:7d}"
+            )
+            for ejemplo in resumen["ejemplos_de_error"]:
+                print(f"         error: {ejemplo[:120]}")
+    finally:
+        servidor.cerrar()
+        ia.cerrar()
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump(informe, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
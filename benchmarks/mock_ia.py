@@ -0,0 +1,120 @@
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# servidor local que imita /chat/completions de OpenAI (con y sin streaming) para las pruebas
+# de carga: latencia y tasa de errores configurables, sin red ni costo
+# uso: python benchmarks/mock_ia.py [--puerto 8765] [--latencia 0.8] [--errores 0.05]
+
+TEXTO = (
+    "P1: ¿Cuántos fragmentos se obtienen con dos cortes en un ADN lineal?\n"
+    "R1: Tres fragmentos.\n"
+    "En un ADN circular cada corte abre la molécula y el número de fragmentos es igual al de cortes."
+)
+
+
+class ServidorIA:
+    def __init__(self, puerto=0, latencia=0.5, variacion=0.25, errores=0.0, entre_tokens=0.02, semilla=None):
+        # latencia: segundos hasta el primer token (± variacion, proporcional); errores: fracción de
+        # peticiones que responden 429, 500 o 503
+        self.latencia = latencia
+        self.variacion = variacion
+        self.errores = errores
+        self.entre_tokens = entre_tokens
+        self.peticiones = 0
+        self.fallidas = 0
+        self._rnd = random.Random(semilla)
+        self._lock = threading.Lock()
+        self.http = ThreadingHTTPServer(("127.0.0.1", puerto), self._manejador())
+        self.http.daemon_threads = True
+        self.puerto = self.http.server_address[1]
+        self.url = f"http://127.0.0.1:{self.puerto}"
+
+    def _sortear(self):
+        with self._lock:
+            self.peticiones += 1
+            falla = self._rnd.random() < self.errores
+            if falla:
+                self.fallidas += 1
+            espera = self.latencia * (1 + self._rnd.uniform(-self.variacion, self.variacion))
+            estado = self._rnd.choice([429, 500, 503])
+        return (estado if falla else 200), espera
+
+    def _manejador(self):
+        servidor = self
+
+        class Manejador(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _json(self, estado, cuerpo):
+                datos = json.dumps(cuerpo).encode("utf-8")
+                self.send_response(estado)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(datos)))
+                self.end_headers()
+                self.wfile.write(datos)
+
+            def do_POST(self):
+                peticion = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                estado, espera = servidor._sortear()
+                time.sleep(espera)
+                if estado != 200:
+                    self._json(estado, {"error": {"message": f"error simulado {estado}"}})
+                    return
+                tokens = [t + " " for t in TEXTO.split(" ")]
+                if not peticion.get("stream"):
+                    time.sleep(servidor.entre_tokens * len(tokens))
+                    self._json(200, {"choices": [{"message": {"role": "assistant", "content": TEXTO}}]})
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                try:
+                    for token in tokens + [None]:
+                        if token is None:
+                            evento = b"data: [DONE]\n\n"
+                        else:
+                            evento = ("data: " + json.dumps({"choices": [{"delta": {"content": token}}]}) + "\n\n").encode("utf-8")
+                        self.wfile.write(b"%x\r\n%s\r\n" % (len(evento), evento))
+                        self.wfile.flush()
+                        time.sleep(servidor.entre_tokens)
+                    self.wfile.write(b"0\r\n\r\n")
+                except OSError:
+                    # el cliente cerró la conexión (respuesta abandonada o cancelada)
+                    pass
+
+        return Manejador
+
+    def iniciar(self):
+        threading.Thread(target=self.http.serve_forever, daemon=True).start()
+        return self
+
+    def cerrar(self):
+        self.http.shutdown()
+        self.http.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor de completions simulado")
+    parser.add_argument("--puerto", type=int, default=8765)
+    parser.add_argument("--latencia", type=float, default=0.5, help="segundos hasta el primer token")
+    parser.add_argument("--errores", type=float, default=0.0, help="fracción de respuestas con error")
+    parser.add_argument("--entre-tokens", type=float, default=0.02)
+    args = parser.parse_args()
+    servidor = ServidorIA(args.puerto, args.latencia, errores=args.errores, entre_tokens=args.entre_tokens)
+    print(f"escuchando en {servidor.url} (OPENAI_BASE_URL)")
+    try:
+        servidor.http.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+from streamlit.proto.Alert_pb2 import Alert
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+from websockets.sync.client import connect
+
+# utilidades para medir la app real: levanta `streamlit run app.py` en un directorio aparte
+# y simula pestañas del navegador hablando el protocolo de Streamlit por websocket
+# (necesita websockets: pip install -r benchmarks/requirements.txt)
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def preparar_directorio(secrets=None):
+    # copia de trabajo con enlaces al código (las bases de datos se crean aquí, no en el repo)
+    directorio = tempfile.mkdtemp(prefix="simulador_")
+    for nombre in os.listdir(RAIZ):
+        if nombre.endswith(".py") or nombre.endswith(".png"):
+            os.symlink(os.path.join(RAIZ, nombre), os.path.join(directorio, nombre))
+    os.makedirs(os.path.join(directorio, ".streamlit"))
+    config = os.path.join(RAIZ, ".streamlit", "config.toml")
+    if os.path.exists(config):
+        shutil.copy(config, os.path.join(directorio, ".streamlit", "config.toml"))
+    with open(os.path.join(directorio, ".streamlit", "secrets.toml"), "w", encoding="utf-8") as f:
+        for clave, valor in (secrets or {}).items():
+            f.write(f"{clave} = {json.dumps(valor)}\n")
+    return directorio
+
+
+class Servidor:
+    def __init__(self, puerto=8599, secrets=None):
+        self.puerto = puerto
+        self.directorio = preparar_directorio(secrets)
+        self.proceso = subprocess.Popen(
+            [
+                sys.executable, "-m", "streamlit", "run", "app.py",
+                "--server.headless", "true",
+                "--server.port", str(puerto),
+                "--browser.gatherUsageStats", "false",
+            ],
+            cwd=self.directorio,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        self.url = f"ws://127.0.0.1:{puerto}/_stcore/stream"
+        self._esperar()
+
+    def _esperar(self, limite=30):
+        fin = time.time() + limite
+        while time.time() < fin:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{self.puerto}/_stcore/health", timeout=1) as r:
+                    if r.status == 200:
+                        return
+            except OSError:
+                time.sleep(0.2)
+        self.cerrar()
+        raise RuntimeError("el servidor de Streamlit no arrancó")
+
+    def cpu(self):
+        # segundos de CPU (usuario + sistema) consumidos por el proceso del servidor (Linux)
+        with open(f"/proc/{self.proceso.pid}/stat") as f:
+            campos = f.read().rsplit(")", 1)[1].split()
+        return (int(campos[11]) + int(campos[12])) / os.sysconf("SC_CLK_TCK")
+
+    def cerrar(self):
+        self.proceso.terminate()
+        try:
+            self.proceso.wait(10)
+        except subprocess.TimeoutExpired:
+            self.proceso.kill()
+        shutil.rmtree(self.directorio, ignore_errors=True)
+
+
+class Sesion:
+    # una pestaña del navegador: guarda el estado de sus widgets y pide reruns
+    def __init__(self, url):
+        self.ws = connect(url, subprotocols=["streamlit"], max_size=None)
+        self.widgets = {}  # etiqueta -> (id, fragmento)
+        self.estados = {}  # id -> WidgetState
+        self.elementos = []
+
+    def ejecutar(self, fragmento="", disparador=None, limite=120):
+        # envía un rerun (de toda la página o de un fragmento) y espera a que el script termine;
+        # devuelve los segundos transcurridos
+        mensaje = BackMsg()
+        estado = mensaje.rerun_script
+        estado.fragment_id = fragmento
+        estado.widget_states.widgets.extend(self.estados.values())
+        if disparador is not None:
+            estado.widget_states.widgets.append(WidgetState(id=disparador, trigger_value=True))
+        inicio = time.perf_counter()
+        self.ws.send(mensaje.SerializeToString())
+        self.elementos = []
+        while True:
+            respuesta = ForwardMsg()
+            respuesta.ParseFromString(self.ws.recv(timeout=limite))
+            tipo = respuesta.WhichOneof("type")
+            if tipo == "delta" and respuesta.delta.WhichOneof("type") == "new_element":
+                elemento = respuesta.delta.new_element
+                clase = elemento.WhichOneof("type")
+                contenido = getattr(elemento, clase)
+                self.elementos.append((clase, contenido))
+                if getattr(contenido, "id", "") and getattr(contenido, "label", ""):
+                    self.widgets[contenido.label] = (contenido.id, respuesta.delta.fragment_id)
+            elif tipo == "script_finished":
+                # un st.rerun() dentro del script corta esta ejecución y empieza otra
+                if respuesta.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                    return time.perf_counter() - inicio
+
+    def fijar(self, etiqueta, **valor):
+        # cambia el valor de un widget (p. ej. int_value=3, string_value="hola")
+        id_ = self.widgets[etiqueta][0]
+        self.estados[id_] = WidgetState(id=id_, **valor)
+
+    def fragmento(self, etiqueta):
+        return self.widgets[etiqueta][1]
+
+    def pulsar(self, etiqueta, solo_fragmento=True):
+        id_, fragmento = self.widgets[etiqueta]
+        return self.ejecutar(fragmento if solo_fragmento else "", disparador=id_)
+
+    def textos(self):
+        # markdown, texto y avisos mostrados en el último rerun
+        return [e.body for _, e in self.elementos if hasattr(e, "body")]
+
+    def errores(self):
+        # excepciones del script y mensajes st.error del último rerun
+        return [
+            e.message if clase == "exception" else e.body
+            for clase, e in self.elementos
+            if clase == "exception" or (clase == "alert" and e.format == Alert.ERROR)
+        ]
+
+    def cerrar(self):
+        self.ws.close()
@@ -0,0 +1,249 @@
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+import resultados
+from calificacion import calificar, dificultad
+from digestion import digerir, digerir_lote_plano, digest_circular, digest_lineal
+from gel import codificar_animacion, generar_gel_multicarril, renderizar_animacion, renderizar_gel
+from moleculas import adn_db
+
+# suite de benchmarks de los caminos calientes con datos sintéticos reproducibles (sin red)
+# uso: python benchmarks/suite.py [--rapido] [--salida res.json] [--comparar anterior.json]
+# sale con código 1 si algún caso supera su umbral (umbrales.json) o empeora respecto a la
+# ejecución anterior más de lo tolerado
+
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+RUTA_UMBRALES = os.path.join(DIRECTORIO, "umbrales.json")
+
+CORTES = [1, 10, 100, 1000, 10000]
+CARRILES = [2, 10, 25, 50]
+FILAS = [1000, 10000, 100000, 1000000]
+HOJA = [1000, 10000, 100000]
+
+# tamaños reducidos para una comprobación rápida
+CORTES_RAPIDO = [1, 100, 10000]
+CARRILES_RAPIDO = [2, 50]
+FILAS_RAPIDO = [1000, 10000]
+HOJA_RAPIDO = [10000]
+
+# por debajo de este tiempo las diferencias con la ejecución anterior se consideran ruido
+PISO_RUIDO = 0.001
+
+
+def medir(funcion, min_repeticiones=3, max_repeticiones=50, tiempo=0.3):
+    # repite hasta juntar `tiempo` segundos (con un mínimo y un máximo de repeticiones)
+    tiempos = []
+    inicio = time.perf_counter()
+    while len(tiempos) < max_repeticiones:
+        t0 = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - t0)
+        if len(tiempos) >= min_repeticiones and time.perf_counter() - inicio >= tiempo:
+            break
+    return {
+        "mediana": statistics.median(tiempos),
+        "minimo": min(tiempos),
+        "repeticiones": len(tiempos),
+    }
+
+
+# datos sintéticos
+
+def molecula(n_cortes, tipo, semilla=0):
+    rnd = random.Random(semilla)
+    longitud = 100 * n_cortes + 1000
+    return {
+        "tipo": tipo,
+        "longitud": longitud,
+        "sitios": {"Enz": sorted(rnd.sample(range(1, longitud), n_cortes))},
+    }
+
+
+def carriles(n, semilla=0):
+    rnd = random.Random(semilla)
+    return {f"Carril {i}": [rnd.randint(100, 10000) for _ in range(rnd.randint(1, 8))] for i in range(n)}
+
+
+def base_resultados(ruta, filas, semilla=0):
+    # base con `filas` registros; se insertan sin el disparador y los resúmenes se
+    # reconstruyen al final (mismo resultado, mucho más rápido para un millón de filas)
+    gen = np.random.default_rng(semilla)
+    dias = np.datetime64("2025-01-01") + gen.integers(0, 365, filas)
+    adn = gen.integers(0, 8, filas)
+    enzimas = gen.choice(["EcoRI", "HindIII", "BamHI", "EcoRI, HindIII", "EcoRI, BamHI"], filas)
+    reales = gen.integers(1, 6, filas)
+    prediccion = gen.integers(0, 6, filas)
+    satisfaccion = gen.integers(1, 6, filas)
+    uso_ia = gen.integers(0, 2, filas)
+    registros = (
+        (f"{d} 10:00:00", "anónimo", f"ADN {a}", e, int(r), int(p), int(r == p), int(s), int(u))
+        for d, a, e, r, p, s, u in zip(dias.astype(str), adn, enzimas, reales, prediccion, satisfaccion, uso_ia)
+    )
+    with resultados.conectar(ruta) as con:
+        con.execute("DROP TRIGGER resultados_resumenes")
+        con.execute("BEGIN")
+        con.executemany(
+            f"INSERT INTO resultados ({', '.join(resultados.COLUMNAS)}) VALUES ({', '.join('?' * len(resultados.COLUMNAS))})",
+            registros,
+        )
+        resultados.reconstruir_resumenes(con)
+        con.execute("COMMIT")
+        con.executescript(resultados._esquema_resumenes())
+
+
+def hoja_respuestas(filas, semilla=0):
+    # hoja de examen: 40 preguntas sobre las moléculas de ejemplo, con tamaños en la mitad de las filas
+    gen = np.random.default_rng(semilla)
+    nombres = list(adn_db)
+    enzimas = ["EcoRI", "HindIII", "BamHI", "EcoRI, HindIII", "EcoRI, BamHI"]
+    pregunta = gen.integers(0, 40, filas)
+    tamanos = np.where(gen.random(filas) < 0.5, "2000; 2000", "")
+    return pd.DataFrame({
+        "estudiante": [f"e{i}" for i in gen.integers(0, 500, filas)],
+        "pregunta": [f"P{q + 1}" for q in pregunta],
+        "adn": [nombres[q % len(nombres)] for q in pregunta],
+        "enzimas": [enzimas[q % len(enzimas)] for q in pregunta],
+        "prediccion": gen.integers(1, 5, filas).astype(str),
+        "tamanos": tamanos,
+    })
+
+
+def registro_nuevo():
+    return {
+        "fecha": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "estudiante": "anónimo",
+        "adn": "ADN 0",
+        "enzimas": "EcoRI",
+        "fragmentos_reales": 2,
+        "prediccion": 2,
+        "acierto": 1,
+        "satisfaccion": 4,
+        "uso_ia": 1,
+    }
+
+
+def panel(ruta):
+    # las mismas lecturas que hace el panel de indicadores de la app
+    resultados.resumen_general(ruta)
+    resultados.resumen_por("resumen_adn", ruta, limite=5)
+    resultados.resumen_por("resumen_enzimas", ruta, limite=5)
+    resultados.resumen_por("resumen_dia", ruta, orden="grupo DESC")
+    resultados.resumen_por("resumen_adn", ruta)
+    resultados.contar_resultados(ruta)
+
+
+# casos
+
+def casos(rapido=False):
+    # genera (nombre, función sin argumentos); los datos se preparan fuera de la medición
+    for n in CORTES_RAPIDO if rapido else CORTES:
+        lineal = molecula(n, "lineal")
+        circular = molecula(n, "circular")
+        cortes_l = lineal["sitios"]["Enz"]
+        cortes_c = circular["sitios"]["Enz"]
+        yield f"digest_lineal/cortes={n}", lambda: digest_lineal(lineal["longitud"], cortes_l)
+        yield f"digest_circular/cortes={n}", lambda: digest_circular(circular["longitud"], cortes_c)
+        yield f"digerir/cortes={n}", lambda: digerir(lineal, ["Enz"])
+        lote = [(lineal, ("Enz",)), (circular, ("Enz",))] * 50
+        yield f"digerir_lote_plano/cortes={n}x100", lambda: digerir_lote_plano(lote)
+
+    for n in CARRILES_RAPIDO if rapido else CARRILES:
+        gel = carriles(n)
+        yield f"generar_gel_multicarril/carriles={n}", lambda: generar_gel_multicarril(gel)
+        yield f"renderizar_gel/carriles={n}", lambda: renderizar_gel(gel)
+        yield f"animacion_gel/carriles={n}", lambda: codificar_animacion(renderizar_animacion(gel))
+
+    for n in HOJA_RAPIDO if rapido else HOJA:
+        hoja = hoja_respuestas(n)
+        yield f"calificar/filas={n}", lambda: dificultad(calificar(hoja, adn_db))
+
+    directorio = tempfile.mkdtemp(prefix="bench_resultados_")
+    try:
+        for n in FILAS_RAPIDO if rapido else FILAS:
+            ruta = os.path.join(directorio, f"resultados_{n}.db")
+            base_resultados(ruta, n)
+            yield f"guardar_resultado/filas={n}", lambda: resultados.guardar_resultado(registro_nuevo(), ruta)
+            yield f"panel/filas={n}", lambda: panel(ruta)
+            if n <= 100000:
+                yield f"exportar_csv/filas={n}", lambda: resultados.exportar("csv", ruta=ruta)
+    finally:
+        resultados.cerrar()
+        shutil.rmtree(directorio, ignore_errors=True)
+
+
+def ejecutar(rapido=False):
+    salida = {
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "plataforma": platform.platform(),
+        "procesador": platform.processor() or platform.machine(),
+        "resultados": {},
+    }
+    for nombre, funcion in casos(rapido):
+        salida["resultados"][nombre] = medir(funcion)
+        print(f"{nombre:45s} {salida['resultados'][nombre]['mediana'] * 1000:10.3f} ms", file=sys.stderr)
+    return salida
+
+
+def revisar(salida, umbrales, anterior=None, tolerancia=1.5):
+    # lista de problemas: umbral absoluto superado o empeoramiento respecto a la ejecución anterior
+    problemas = []
+    for nombre, medida in salida["resultados"].items():
+        limite = umbrales.get(nombre)
+        if limite is not None and medida["mediana"] > limite:
+            problemas.append(f"{nombre}: {medida['mediana'] * 1000:.3f} ms supera el umbral de {limite * 1000:.3f} ms")
+        previa = (anterior or {}).get("resultados", {}).get(nombre)
+        if previa and medida["mediana"] > max(previa["mediana"] * tolerancia, PISO_RUIDO):
+            problemas.append(
+                f"{nombre}: {medida['mediana'] * 1000:.3f} ms frente a {previa['mediana'] * 1000:.3f} ms "
+                f"de la ejecución anterior (x{medida['mediana'] / previa['mediana']:.2f})"
+            )
+    return problemas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks del simulador")
+    parser.add_argument("--rapido", action="store_true", help="solo algunos tamaños")
+    parser.add_argument("--salida", help="archivo JSON de resultados (por defecto, la salida estándar)")
+    parser.add_argument("--comparar", help="JSON de una ejecución anterior")
+    parser.add_argument("--tolerancia", type=float, default=1.5, help="empeoramiento permitido frente a --comparar")
+    parser.add_argument("--umbrales", default=RUTA_UMBRALES)
+    args = parser.parse_args()
+
+    salida = ejecutar(args.rapido)
+    with open(args.umbrales, encoding="utf-8") as f:
+        umbrales = json.load(f)
+    anterior = None
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            anterior = json.load(f)
+    salida["problemas"] = revisar(salida, umbrales, anterior, args.tolerancia)
+
+    texto = json.dumps(salida, indent=2, ensure_ascii=False)
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            f.write(texto + "\n")
+    else:
+        print(texto)
+    for problema in salida["problemas"]:
+        print("REGRESIÓN:", problema, file=sys.stderr)
+    sys.exit(1 if salida["problemas"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+import argparse
+import io
+import logging
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from digestion import digerir_lote_plano
+from sitios import ENZIMAS
+
+# calificación en lote de hojas de respuestas (exámenes prácticos): cada fila es una respuesta
+# con molécula, enzimas, número de fragmentos predicho y, si se pide, sus tamaños con una
+# tolerancia; cada configuración distinta se digiere una sola vez con digerir_lote_plano() y la
+# comparación se hace con arreglos de NumPy sobre todas las filas a la vez
+# uso: python calificacion.py hoja.csv [--salida hoja_calificada.csv] [--dificultad dificultad.csv]
+
+log = logging.getLogger(__name__)
+
+OBLIGATORIAS = ["adn", "enzimas", "prediccion"]
+
+# columnas opcionales de la hoja
+OPCIONALES = ["estudiante", "pregunta", "tamanos", "tolerancia"]
+
+# tolerancia de los tamaños si la hoja no trae la columna: pb ("50") o porcentaje del real ("5%")
+TOLERANCIA = "5%"
+
+# por debajo de este número de filas por proceso no compensa repartir la hoja (enviar cada
+# trozo a otro proceso cuesta más que calificarlo: 10 000 filas se califican en ~0,05 s)
+FILAS_POR_PROCESO = 250_000
+
+# índice de dificultad (fracción de aciertos) que separa fácil / media / difícil
+UMBRAL_FACIL = 0.7
+UMBRAL_DIFICIL = 0.3
+
+_SEPARADORES = re.compile(r"[,;+/\s]+")
+
+
+class ErrorHoja(ValueError):
+    pass
+
+
+def leer_hoja(contenido):
+    # CSV (bytes o ruta) -> DataFrame de texto con las columnas en minúsculas
+    if isinstance(contenido, bytes):
+        contenido = io.BytesIO(contenido)
+    hoja = pd.read_csv(contenido, dtype=str, keep_default_na=False, sep=None, engine="python")
+    hoja.columns = [str(c).strip().lower().replace("tamaños", "tamanos") for c in hoja.columns]
+    faltan = [c for c in OBLIGATORIAS if c not in hoja.columns]
+    if faltan:
+        raise ErrorHoja(f"a la hoja le faltan las columnas: {', '.join(faltan)}")
+    return hoja
+
+
+def _enzimas(texto):
+    return tuple(sorted(set(e for e in _SEPARADORES.split(texto.strip()) if e)))
+
+
+def _tamanos(texto):
+    # "900; 1700, 1761" -> [900, 1700, 1761] ordenados; None si algún valor no es un número
+    try:
+        return sorted(int(float(x)) for x in _SEPARADORES.split(texto.strip()) if x)
+    except ValueError:
+        return None
+
+
+def _tolerancia(texto):
+    # (pb, fracción); None si no se entiende
+    texto = texto.strip().replace(",", ".")
+    try:
+        if texto.endswith("%"):
+            return 0.0, float(texto[:-1]) / 100
+        return float(texto), 0.0
+    except ValueError:
+        return None
+
+
+def _planos(listas):
+    # lista de listas -> (valores concatenados, inicio de cada lista, largo de cada lista)
+    largos = np.fromiter(map(len, listas), np.int64, len(listas))
+    inicios = np.zeros(len(listas), dtype=np.int64)
+    np.cumsum(largos[:-1], out=inicios[1:])
+    valores = np.fromiter((x for lista in listas for x in lista), np.int64, int(largos.sum()))
+    return valores, inicios, largos
+
+
+def _reunir(valores, inicios, largos, codigos):
+    # concatena valores[inicios[c]:inicios[c] + largos[c]] para cada código, sin bucles de Python
+    cuantos = largos[codigos]
+    desde = np.repeat(inicios[codigos] - (np.cumsum(cuantos) - cuantos), cuantos)
+    return valores[desde + np.arange(int(cuantos.sum()))], cuantos
+
+
+def calificar(hoja, moleculas, tolerancia=TOLERANCIA):
+    # hoja: DataFrame de leer_hoja(); moleculas: {nombre: adn} con al menos las de la hoja
+    # devuelve la hoja con las columnas de la calificación añadidas
+    n = len(hoja)
+    calificada = hoja.copy()
+    errores = np.full(n, "", dtype=object)
+
+    # cada texto distinto (molécula, enzimas, tamaños, tolerancia) se interpreta una sola vez
+    cod_adn, nombres = pd.factorize(hoja["adn"].str.strip())
+    cod_enz, textos_enz = pd.factorize(hoja["enzimas"])
+    combos = [_enzimas(t) for t in textos_enz]
+    conocidas = set(ENZIMAS).union(*(m["sitios"] for m in moleculas.values()))
+    combo_invalido = np.array([not c or any(e not in conocidas for e in c) for c in combos], dtype=bool)
+    adn_valido = np.array([nombre in moleculas for nombre in nombres], dtype=bool)
+    errores[~adn_valido[cod_adn]] = "molécula desconocida"
+    errores[(errores == "") & combo_invalido[cod_enz]] = "enzima desconocida"
+
+    prediccion = pd.to_numeric(hoja["prediccion"].str.strip(), errors="coerce").to_numpy()
+    errores[(errores == "") & np.isnan(prediccion)] = "sin predicción"
+    validas = errores == ""
+
+    # configuraciones distintas (molécula, enzimas) de las filas válidas: una digestión por cada una
+    par = cod_adn.astype(np.int64) * len(combos) + cod_enz
+    pares, config = np.unique(par[validas], return_inverse=True)
+    trabajos = [(moleculas[nombres[p // len(combos)]], combos[p % len(combos)]) for p in pares.tolist()]
+    fragmentos, limites = digerir_lote_plano(trabajos) if trabajos else (np.zeros(0, np.int64), np.zeros(1, np.int64))
+    largos_reales = np.diff(limites)
+    # fragmentos de cada configuración ordenados por tamaño (las bandas del gel)
+    de_config = np.repeat(np.arange(len(pares)), largos_reales)
+    fragmentos = fragmentos[np.lexsort((fragmentos, de_config))]
+
+    filas = np.flatnonzero(validas)
+    reales = np.zeros(n, dtype=np.int64)
+    reales[filas] = largos_reales[config]
+    acierto_numero = np.zeros(n, dtype=bool)
+    acierto_numero[filas] = prediccion[filas] == reales[filas]
+
+    # tamaños predichos (solo en las filas que los traen)
+    acierto_tamanos = np.zeros(n, dtype=bool)
+    con_tamanos = np.zeros(n, dtype=bool)
+    if "tamanos" in hoja.columns:
+        cod_tam, textos_tam = pd.factorize(hoja["tamanos"])
+        listas = [_tamanos(t) for t in textos_tam]
+        vacia = np.array([lista == [] for lista in listas], dtype=bool)
+        ilegible = np.array([lista is None for lista in listas], dtype=bool)
+        errores[validas & ilegible[cod_tam]] = "tamaños ilegibles"
+        con_tamanos = validas & ~vacia[cod_tam] & ~ilegible[cod_tam]
+
+        if "tolerancia" in hoja.columns:
+            cod_tol, textos_tol = pd.factorize(hoja["tolerancia"].where(hoja["tolerancia"].str.strip() != "", tolerancia))
+        else:
+            cod_tol, textos_tol = np.zeros(n, dtype=np.int64), [tolerancia]
+        tolerancias = [_tolerancia(t) for t in textos_tol]
+        tol_invalida = np.array([t is None for t in tolerancias], dtype=bool)
+        errores[con_tamanos & tol_invalida[cod_tol]] = "tolerancia ilegible"
+        con_tamanos &= ~tol_invalida[cod_tol]
+        tol_pb = np.array([t[0] if t else 0.0 for t in tolerancias])
+        tol_rel = np.array([t[1] if t else 0.0 for t in tolerancias])
+
+        # solo se comparan tamaño a tamaño las filas con tantos tamaños como fragmentos reales
+        valores, inicios, largos = _planos([lista or [] for lista in listas])
+        comparables = con_tamanos & (largos[cod_tam] == reales)
+        sel = np.flatnonzero(comparables)
+        predichos, cuantos = _reunir(valores, inicios, largos, cod_tam[sel])
+        config_fila = np.zeros(n, dtype=np.int64)
+        config_fila[filas] = config
+        correctos, _ = _reunir(fragmentos, limites[:-1], largos_reales, config_fila[sel])
+        fila_de = np.repeat(sel, cuantos)
+        margen = tol_pb[cod_tol[fila_de]] + tol_rel[cod_tol[fila_de]] * correctos
+        fallos = np.bincount(fila_de[np.abs(predichos - correctos) > margen + 1e-9], minlength=n)
+        acierto_tamanos = comparables & (fallos == 0)
+
+    # las filas con tamaños o tolerancia ilegibles tampoco se califican
+    validas = errores == ""
+    acierto_numero &= validas
+
+    # el texto de las bandas reales se arma una vez por configuración
+    bandas = np.array(
+        ["; ".join(map(str, fragmentos[a:b][::-1].tolist())) for a, b in zip(limites[:-1].tolist(), limites[1:].tolist())] + [""],
+        dtype=object,
+    )
+    config_texto = np.full(n, len(pares), dtype=np.int64)
+    config_texto[filas] = config
+    config_texto[~validas] = len(pares)
+
+    calificada["fragmentos_reales"] = pd.array(reales, dtype="Int64")
+    calificada.loc[~validas, "fragmentos_reales"] = pd.NA
+    calificada["tamanos_reales"] = bandas[config_texto]
+    calificada["acierto_numero"] = acierto_numero.astype(int)
+    calificada["acierto_tamanos"] = np.where(con_tamanos, acierto_tamanos.astype(int), -1)
+    # la respuesta es correcta si acierta el número y, cuando trae tamaños, también los tamaños
+    calificada["acierto"] = (acierto_numero & (acierto_tamanos | ~con_tamanos)).astype(int)
+    calificada["error"] = errores
+    return calificada
+
+
+def _calificar_trozo(argumentos):
+    return calificar(*argumentos)
+
+
+def calificar_hoja(hoja, moleculas, tolerancia=TOLERANCIA, procesos=None):
+    # como calificar(), repartiendo las hojas grandes entre varios procesos
+    procesos = procesos or os.cpu_count() or 1
+    procesos = min(procesos, len(hoja) // FILAS_POR_PROCESO)
+    if procesos <= 1:
+        return calificar(hoja, moleculas, tolerancia)
+    # cada proceso recibe solo las moléculas de su trozo
+    trozos = [hoja.iloc[a:b] for a, b in _cortes(len(hoja), procesos)]
+    argumentos = [
+        (trozo, {m: moleculas[m] for m in trozo["adn"].str.strip().unique() if m in moleculas}, tolerancia)
+        for trozo in trozos
+    ]
+    log.info("calificando %d filas en %d procesos", len(hoja), procesos)
+    with ProcessPoolExecutor(procesos) as pool:
+        return pd.concat(list(pool.map(_calificar_trozo, argumentos)))
+
+
+def _cortes(n, partes):
+    bordes = np.linspace(0, n, partes + 1).astype(int).tolist()
+    return list(zip(bordes[:-1], bordes[1:]))
+
+
+def dificultad(calificada):
+    # estadísticas por pregunta (o por molécula + enzimas si la hoja no numera las preguntas):
+    # índice de dificultad = fracción de aciertos y, si hay estudiante y varias preguntas,
+    # discriminación = correlación entre acertar la pregunta y el puntaje en las demás
+    validas = calificada[calificada["error"] == ""].copy()
+    if "pregunta" in validas.columns:
+        grupo = ["pregunta"]
+    else:
+        grupo = ["adn", "enzimas"]
+    validas["_tamanos"] = validas["acierto_tamanos"].where(validas["acierto_tamanos"] >= 0)
+    estad = validas.groupby(grupo, sort=True).agg(
+        respuestas=("acierto", "size"),
+        acierto_numero=("acierto_numero", "mean"),
+        acierto_tamanos=("_tamanos", "mean"),
+        indice_dificultad=("acierto", "mean"),
+        fragmentos_reales=("fragmentos_reales", "first"),
+    )
+
+    if "estudiante" in validas.columns and len(estad) > 1:
+        # correlación punto-biserial corregida (sin la propia pregunta), con sumas por grupo
+        x = validas["acierto"].astype(float)
+        y = validas.groupby("estudiante")["acierto"].transform("sum") - x
+        sumas = pd.DataFrame({"x": x, "y": y, "xy": x * y, "xx": x * x, "yy": y * y})
+        sumas[grupo] = validas[grupo]
+        s = sumas.groupby(grupo, sort=True).sum()
+        k = estad["respuestas"]
+        cov = s["xy"] / k - s["x"] / k * s["y"] / k
+        var = (s["xx"] / k - (s["x"] / k) ** 2) * (s["yy"] / k - (s["y"] / k) ** 2)
+        estad["discriminacion"] = (cov / np.sqrt(var)).where(var > 0)
+
+    estad["nivel"] = np.select(
+        [estad["indice_dificultad"] >= UMBRAL_FACIL, estad["indice_dificultad"] < UMBRAL_DIFICIL],
+        ["fácil", "difícil"],
+        "media",
+    )
+    return estad.reset_index()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Califica una hoja de respuestas (CSV) contra el motor de digestión")
+    parser.add_argument("hoja", help="CSV con columnas adn, enzimas, prediccion y opcionales estudiante, pregunta, tamanos, tolerancia")
+    parser.add_argument("--salida", help="CSV calificado (por defecto <hoja>_calificada.csv)")
+    parser.add_argument("--dificultad", help="CSV con las estadísticas por pregunta (por defecto <hoja>_dificultad.csv)")
+    parser.add_argument("--tolerancia", default=TOLERANCIA, help="tolerancia de los tamaños: pb (50) o porcentaje (5%%)")
+    parser.add_argument("--procesos", type=int, help="procesos para hojas grandes (por defecto, uno por CPU)")
+    parser.add_argument("--catalogo", help="índice de catalogo.py con más moléculas")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+
+    from moleculas import adn_db
+    moleculas = dict(adn_db)
+    hoja = leer_hoja(args.hoja)
+    if args.catalogo:
+        from catalogo import Catalogo
+        catalogo = Catalogo(args.catalogo)
+        for nombre in hoja["adn"].str.strip().unique():
+            if nombre not in moleculas and nombre in catalogo:
+                moleculas[nombre] = catalogo.molecula(nombre)
+
+    calificada = calificar_hoja(hoja, moleculas, args.tolerancia, args.procesos)
+    base = os.path.splitext(args.hoja)[0]
+    calificada.to_csv(args.salida or f"{base}_calificada.csv", index=False)
+    dificultad(calificada).to_csv(args.dificultad or f"{base}_dificultad.csv", index=False)
+    validas = calificada["error"] == ""
+    print(
+        f"filas: {len(calificada)}  calificadas: {int(validas.sum())}  con error: {int((~validas).sum())}  "
+        f"aciertos: {calificada.loc[validas, 'acierto'].mean() * 100:.1f} %"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,323 @@
+import argparse
+import hashlib
+import json
+import logging
+import mmap
+import os
+import re
+import sqlite3
+import string
+import threading
+
+from sitios import ENZIMAS, buscar_sitios, codificar
+
+# catálogo de moléculas a partir de un directorio de archivos GenBank o FASTA: un índice SQLite
+# guarda nombre, topología, longitud y el mapa de sitios de cada molécula, más la posición de
+# su secuencia dentro del archivo; la app solo lee el índice y la secuencia se lee (con mmap)
+# cuando alguien la pide
+# uso: python catalogo.py plasmidos/ [--indice catalogo.db] [--topologia-fasta circular]
+# (solo se vuelven a leer los archivos nuevos o modificados)
+
+log = logging.getLogger(__name__)
+
+RUTA_INDICE = "catalogo.db"
+
+EXTENSIONES_GENBANK = (".gb", ".gbk", ".genbank")
+EXTENSIONES_FASTA = (".fa", ".fasta", ".fna", ".fas")
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS archivos (
+    ruta TEXT PRIMARY KEY,
+    tamano INTEGER NOT NULL,
+    modificado REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS moleculas (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    nombre TEXT NOT NULL UNIQUE,
+    ruta TEXT NOT NULL,
+    tipo TEXT NOT NULL,
+    longitud INTEGER NOT NULL,
+    sitios TEXT NOT NULL,
+    inicio INTEGER NOT NULL,
+    fin INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS moleculas_ruta ON moleculas (ruta);
+CREATE TABLE IF NOT EXISTS enzimas (
+    nombre TEXT PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS meta (
+    clave TEXT PRIMARY KEY,
+    valor TEXT
+);
+"""
+
+# limpieza de la secuencia sobre bytes: fuera todo lo que no sea letra, y a mayúsculas
+_NO_LETRAS = bytes(c for c in range(256) if chr(c) not in string.ascii_letters)
+_MAYUSCULAS = bytes.maketrans(string.ascii_lowercase.encode(), string.ascii_uppercase.encode())
+
+
+def limpiar_bytes(datos):
+    return datos.translate(_MAYUSCULAS, _NO_LETRAS)
+
+
+def firma_enzimas():
+    # si cambia la tabla de enzimas, los mapas de sitios guardados dejan de valer
+    return hashlib.sha256(json.dumps(ENZIMAS, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+# lectura de archivos: [(nombre, tipo o None, inicio, fin)] con la zona de la secuencia en bytes
+
+def registros_genbank(datos):
+    registros = []
+    for locus in re.finditer(rb"^LOCUS[^\n]*", datos, re.M):
+        final = re.compile(rb"^//", re.M).search(datos, locus.end())
+        fin_registro = final.start() if final else len(datos)
+        cabecera = locus.group().decode("utf-8", "replace").split()
+        tipo = "circular" if "circular" in (c.lower() for c in cabecera) else "lineal"
+        definicion = re.compile(rb"^DEFINITION\s+([^\n]*)", re.M).search(datos, locus.end(), fin_registro)
+        nombre = definicion.group(1).decode("utf-8", "replace").strip().rstrip(".") if definicion else ""
+        nombre = nombre or (cabecera[1] if len(cabecera) > 1 else "secuencia")
+        origen = re.compile(rb"^ORIGIN[^\n]*\n?", re.M).search(datos, locus.end(), fin_registro)
+        if origen is None:
+            continue
+        registros.append((nombre, tipo, origen.end(), fin_registro))
+    return registros
+
+
+def registros_fasta(datos, nombre_archivo):
+    cabeceras = list(re.finditer(rb"^>([^\n]*)", datos, re.M))
+    if not cabeceras:
+        # secuencia sin encabezado: el nombre del archivo
+        return [(os.path.splitext(nombre_archivo)[0], None, 0, len(datos))] if len(datos) else []
+    registros = []
+    for i, cabecera in enumerate(cabeceras):
+        fin = cabeceras[i + 1].start() if i + 1 < len(cabeceras) else len(datos)
+        texto = cabecera.group(1).decode("utf-8", "replace").strip() or "secuencia"
+        minusculas = texto.lower()
+        if "circular" in minusculas or "plasmid" in minusculas or "plásmido" in minusculas:
+            tipo = "circular"
+        elif "linear" in minusculas or "lineal" in minusculas:
+            tipo = "lineal"
+        else:
+            tipo = None
+        registros.append((texto, tipo, cabecera.end(), fin))
+    return registros
+
+
+def _abrir(ruta):
+    with open(ruta, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b""
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class Catalogo:
+    # nombres y enzimas se guardan en memoria y se recargan solo si el índice cambia en disco
+    def __init__(self, ruta=RUTA_INDICE):
+        self.ruta = ruta
+        self._lock = threading.Lock()
+        self._version = None
+        self._nombres = []
+        self._enzimas = []
+        self._moleculas = {}
+
+    def _conectar(self):
+        con = sqlite3.connect(self.ruta, timeout=30, isolation_level=None)
+        con.execute("PRAGMA journal_mode=WAL")
+        con.executescript(ESQUEMA)
+        return con
+
+    def _actualizar(self):
+        # versión del índice en disco (con el WAL, los cambios recientes pueden estar solo en -wal)
+        try:
+            estado = os.stat(self.ruta)
+            version = (estado.st_mtime_ns, estado.st_size)
+        except OSError:
+            version = None
+        try:
+            wal = os.stat(self.ruta + "-wal")
+            version = version and version + (wal.st_mtime_ns, wal.st_size)
+        except OSError:
+            pass
+        if version == self._version:
+            return
+        if version is None:
+            self._nombres, self._enzimas, self._moleculas = [], [], {}
+        else:
+            con = self._conectar()
+            try:
+                self._nombres = [n for (n,) in con.execute("SELECT nombre FROM moleculas ORDER BY nombre")]
+                self._enzimas = [e for (e,) in con.execute("SELECT nombre FROM enzimas ORDER BY nombre")]
+            finally:
+                con.close()
+            self._moleculas = {}
+        self._version = version
+
+    def nombres(self):
+        with self._lock:
+            self._actualizar()
+            return list(self._nombres)
+
+    def enzimas(self):
+        with self._lock:
+            self._actualizar()
+            return list(self._enzimas)
+
+    def __contains__(self, nombre):
+        return self._fila(nombre) is not None
+
+    def _fila(self, nombre):
+        with self._lock:
+            self._actualizar()
+            if nombre not in self._moleculas:
+                if self._version is None:
+                    return None
+                con = self._conectar()
+                try:
+                    fila = con.execute(
+                        "SELECT tipo, longitud, sitios, ruta, inicio, fin FROM moleculas WHERE nombre = ?", (nombre,)
+                    ).fetchone()
+                finally:
+                    con.close()
+                # solo se guardan las moléculas que existen (los nombres los puede escribir cualquiera,
+                # así la caché no pasa del tamaño del índice)
+                if fila is None:
+                    return None
+                self._moleculas[nombre] = fila
+            return self._moleculas[nombre]
+
+    def molecula(self, nombre):
+        # entrada con la forma de adn_db (sin leer la secuencia), o None si no está
+        fila = self._fila(nombre)
+        if fila is None:
+            return None
+        tipo, longitud, sitios, ruta, _, _ = fila
+        return {"tipo": tipo, "longitud": longitud, "sitios": json.loads(sitios), "archivo": os.path.basename(ruta)}
+
+    def secuencia(self, nombre):
+        # la secuencia completa, leída del archivo original con mmap
+        fila = self._fila(nombre)
+        if fila is None:
+            return None
+        _, _, _, ruta, inicio, fin = fila
+        datos = _abrir(ruta)
+        try:
+            return limpiar_bytes(datos[inicio:fin]).decode("ascii")
+        finally:
+            if isinstance(datos, mmap.mmap):
+                datos.close()
+
+    def indexar(self, directorio, topologia_fasta="lineal"):
+        # (re)indexa los archivos nuevos o modificados y quita los que ya no están
+        resumen = {"archivos": 0, "moleculas": 0, "sin_cambios": 0, "quitados": 0}
+        con = self._conectar()
+        try:
+            firma = firma_enzimas()
+            fila = con.execute("SELECT valor FROM meta WHERE clave = 'enzimas'").fetchone()
+            if fila is None or fila[0] != firma:
+                con.execute("DELETE FROM archivos")
+                con.execute("DELETE FROM moleculas")
+            conocidos = {r: (t, m) for r, t, m in con.execute("SELECT ruta, tamano, modificado FROM archivos")}
+
+            rutas = []
+            for raiz, _, archivos in os.walk(directorio):
+                for archivo in sorted(archivos):
+                    if archivo.lower().endswith(EXTENSIONES_GENBANK + EXTENSIONES_FASTA):
+                        rutas.append(os.path.abspath(os.path.join(raiz, archivo)))
+
+            for ruta in sorted(rutas):
+                estado = os.stat(ruta)
+                if conocidos.pop(ruta, None) == (estado.st_size, estado.st_mtime):
+                    resumen["sin_cambios"] += 1
+                    continue
+                con.execute("BEGIN")
+                try:
+                    con.execute("DELETE FROM moleculas WHERE ruta = ?", (ruta,))
+                    resumen["moleculas"] += self._indexar_archivo(con, ruta, topologia_fasta)
+                    con.execute(
+                        "INSERT OR REPLACE INTO archivos (ruta, tamano, modificado) VALUES (?, ?, ?)",
+                        (ruta, estado.st_size, estado.st_mtime),
+                    )
+                    con.execute("COMMIT")
+                except BaseException:
+                    con.execute("ROLLBACK")
+                    raise
+                resumen["archivos"] += 1
+                if resumen["archivos"] % 50 == 0:
+                    log.info("%d archivos leídos", resumen["archivos"])
+
+            # archivos que ya no existen (o que quedaron fuera del directorio indexado)
+            for ruta in conocidos:
+                con.execute("DELETE FROM moleculas WHERE ruta = ?", (ruta,))
+                con.execute("DELETE FROM archivos WHERE ruta = ?", (ruta,))
+                resumen["quitados"] += 1
+
+            enzimas = set()
+            for (sitios,) in con.execute("SELECT sitios FROM moleculas"):
+                enzimas.update(json.loads(sitios))
+            con.execute("BEGIN")
+            con.execute("DELETE FROM enzimas")
+            con.executemany("INSERT INTO enzimas (nombre) VALUES (?)", [(e,) for e in sorted(enzimas)])
+            con.execute("INSERT OR REPLACE INTO meta (clave, valor) VALUES ('enzimas', ?)", (firma,))
+            con.execute("COMMIT")
+        finally:
+            con.close()
+        return resumen
+
+    @staticmethod
+    def _indexar_archivo(con, ruta, topologia_fasta):
+        datos = _abrir(ruta)
+        try:
+            if ruta.lower().endswith(EXTENSIONES_GENBANK):
+                registros = registros_genbank(datos)
+            else:
+                registros = registros_fasta(datos, os.path.basename(ruta))
+            n = 0
+            for nombre, tipo, inicio, fin in registros:
+                tipo = tipo or topologia_fasta
+                secuencia = limpiar_bytes(datos[inicio:fin])
+                if not secuencia:
+                    continue
+                sitios = buscar_sitios(codificar(secuencia), tipo)
+                base = f"{nombre} ({len(secuencia)} pb, {tipo})"
+                # nombres repetidos (el mismo plásmido en dos archivos): se añade el archivo
+                nombre_final = base
+                k = 1
+                while con.execute("SELECT 1 FROM moleculas WHERE nombre = ?", (nombre_final,)).fetchone():
+                    k += 1
+                    sufijo = os.path.basename(ruta) if k == 2 else f"{os.path.basename(ruta)} #{k - 1}"
+                    nombre_final = f"{base} [{sufijo}]"
+                con.execute(
+                    "INSERT INTO moleculas (nombre, ruta, tipo, longitud, sitios, inicio, fin) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (nombre_final, ruta, tipo, len(secuencia), json.dumps(sitios), inicio, fin),
+                )
+                n += 1
+            return n
+        finally:
+            if isinstance(datos, mmap.mmap):
+                datos.close()
+
+
+catalogo = Catalogo()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Indexa un directorio de archivos GenBank o FASTA para la app")
+    parser.add_argument("directorio")
+    parser.add_argument("--indice", default=RUTA_INDICE)
+    parser.add_argument(
+        "--topologia-fasta", choices=["lineal", "circular"], default="lineal",
+        help="topología de los FASTA cuyo encabezado no dice 'circular', 'plasmid' o 'linear'",
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    resumen = Catalogo(args.indice).indexar(args.directorio, args.topologia_fasta)
+    print(
+        f"archivos leídos: {resumen['archivos']}  moléculas: {resumen['moleculas']}  "
+        f"sin cambios: {resumen['sin_cambios']}  quitados: {resumen['quitados']}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+from collections.abc import Sequence
+from functools import lru_cache
+
+import numpy as np
+
+# funciones de digestión (una molécula, una lista de enzimas)
+# los cortes se guardan ordenados y sin repetir: dos enzimas que cortan en la misma posición dan
+# un solo corte; en ADN lineal un corte en 0 o en el extremo no separa nada y se ignora, y en
+# ADN circular la posición 0 y la longitud son el mismo punto
+
+# pasos de la explicación que se muestran por página
+PASOS_POR_PAGINA = 50
+
+
+class Digestion:
+    # resultado de una digestión: cortes y fragmentos en arreglos de NumPy (en orden de posición);
+    # la explicación paso a paso se redacta solo para los fragmentos que se piden
+    def __init__(self, longitud, cortes, tipo="lineal"):
+        self.longitud = int(longitud)
+        self.tipo = tipo
+        pos = np.asarray(cortes, dtype=np.int64).reshape(-1)
+        self.sitios = len(pos)
+        if tipo == "lineal":
+            pos = pos[(pos > 0) & (pos < self.longitud)]
+        else:
+            pos = pos % self.longitud
+        self.en_extremos = self.sitios - len(pos)
+        self.cortes = np.unique(pos)
+        self.coincidentes = len(pos) - len(self.cortes)
+
+        n = len(self.cortes)
+        if n == 0:
+            self.fragmentos = np.zeros(0, dtype=np.int64)
+        elif tipo == "lineal":
+            self.fragmentos = np.diff(self.cortes, prepend=0, append=self.longitud)
+        elif n == 1:
+            # un solo corte linealiza la molécula
+            self.fragmentos = np.array([self.longitud], dtype=np.int64)
+        else:
+            # el último segmento cruza el origen
+            self.fragmentos = np.append(np.diff(self.cortes), self.longitud - self.cortes[-1] + self.cortes[0])
+        self.pasos = Pasos(self)
+
+    def __len__(self):
+        return len(self.fragmentos)
+
+    def tolist(self):
+        return self.fragmentos.tolist()
+
+    def paso(self, i):
+        frag = int(self.fragmentos[i])
+        cortes = self.cortes
+        if self.tipo == "lineal":
+            inicio = int(cortes[i - 1]) if i > 0 else 0
+            fin = int(cortes[i]) if i < len(cortes) else self.longitud
+            return f"Fragmento desde {inicio} pb hasta {fin} pb → {frag} pb"
+        if len(cortes) == 1:
+            return f"ADN circular con 1 corte en {int(cortes[0])} pb → se linealiza → 1 fragmento de {self.longitud} pb"
+        actual = int(cortes[i])
+        siguiente = int(cortes[(i + 1) % len(cortes)])
+        if siguiente > actual:
+            return f"Segmento entre {actual} pb y {siguiente} pb → {frag} pb"
+        if siguiente == 0:
+            return f"Segmento entre {actual} pb y el fin ({self.longitud} pb) → {frag} pb"
+        return f"Segmento entre {actual} pb y fin ({self.longitud}) + inicio hasta {siguiente} pb → {frag} pb"
+
+    def paginas(self, tam=PASOS_POR_PAGINA):
+        return max(1, -(-len(self) // tam))
+
+    def pagina(self, numero, tam=PASOS_POR_PAGINA):
+        # pasos de la página `numero` (desde 1)
+        return self.pasos[(numero - 1) * tam:numero * tam]
+
+    def avisos(self):
+        # sitios que no se convierten en un corte propio
+        avisos = []
+        if self.coincidentes:
+            avisos.append(f"{self.coincidentes} sitio(s) coinciden con otro en la misma posición y cuentan como un solo corte.")
+        if self.en_extremos:
+            avisos.append(f"{self.en_extremos} sitio(s) están en un extremo de la molécula lineal y no producen fragmentos.")
+        return avisos
+
+
+class Pasos(Sequence):
+    # lista de solo lectura de los pasos de una digestión; cada texto se arma al pedirlo
+    def __init__(self, digestion):
+        self.digestion = digestion
+
+    def __len__(self):
+        return len(self.digestion)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self.digestion.paso(j) for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("paso fuera de rango")
+        return self.digestion.paso(i)
+
+
+def digest_lineal(longitud, cortes):
+    d = Digestion(longitud, cortes, "lineal")
+    return d.tolist(), d.pasos
+
+
+def digest_circular(longitud, cortes):
+    d = Digestion(longitud, cortes, "circular")
+    return d.tolist(), d.pasos
+
+
+def resultado_digestion(adn, enzimas):
+    cortes = []
+    for e in enzimas:
+        cortes.extend(adn["sitios"].get(e, []))
+    return Digestion(adn["longitud"], cortes, "lineal" if adn["tipo"] == "lineal" else "circular")
+
+
+def digerir(adn, enzimas):
+    # (fragmentos, pasos); sin cortes, ([], [])
+    d = resultado_digestion(adn, enzimas)
+    return d.tolist(), d.pasos
+
+
+# digestión en lote: muchos trabajos (molécula, enzimas) a la vez con operaciones de NumPy
+# los fragmentos salen en el mismo orden que digerir() (orden de posición, no de tamaño)
+
+# límite de celdas de la matriz trabajos x cortes que se arma de una vez
+MAX_CELDAS_LOTE = 4_000_000
+
+
+@lru_cache(maxsize=256)
+def _subconjuntos(enzimas):
+    return [
+        tuple(e for i, e in enumerate(enzimas) if mascara >> i & 1)
+        for mascara in range(1, 2 ** len(enzimas))
+    ]
+
+
+def combinaciones_enzimas(adn):
+    # todos los subconjuntos no vacíos de las enzimas con sitio en la molécula;
+    # moléculas con las mismas enzimas comparten las mismas tuplas
+    return list(_subconjuntos(tuple(sorted(adn["sitios"].keys()))))
+
+
+def _cortes_ordenados(adn):
+    # todos los cortes de la molécula ordenados una vez, con el índice de la enzima que los produce
+    # (con las mismas reglas que Digestion para los extremos)
+    enzimas = sorted(adn["sitios"].keys())
+    pos = np.asarray([p for e in enzimas for p in adn["sitios"][e]], dtype=np.int64)
+    idx = np.asarray([i for i, e in enumerate(enzimas) for _ in adn["sitios"][e]], dtype=np.int64)
+    if adn["tipo"] == "lineal":
+        dentro = (pos > 0) & (pos < adn["longitud"])
+        pos, idx = pos[dentro], idx[dentro]
+    else:
+        pos = pos % adn["longitud"]
+    orden = np.argsort(pos, kind="stable")
+    return pos[orden], idx[orden]
+
+
+def _fragmentos_molecula(adn, mascaras):
+    # fragmentos de una molécula para varios subconjuntos de enzimas dados como máscaras de bits;
+    # devuelve los fragmentos de todas las filas seguidos y cuántos corresponden a cada fila
+    longitud = adn["longitud"]
+    pos, idx = _cortes_ordenados(adn)
+
+    # como los cortes ya están ordenados, los elegidos de cada fila salen en orden sin volver a ordenar
+    usa_enzima = (mascaras[:, None] >> np.arange(len(adn["sitios"]))[None, :]) & 1 == 1
+    fila, col = np.nonzero(usa_enzima[:, idx])
+    c = pos[col]
+    # sitios de dos enzimas en la misma posición: un solo corte
+    repetido = np.zeros(len(c), dtype=bool)
+    repetido[1:] = (c[1:] == c[:-1]) & (fila[1:] == fila[:-1])
+    if repetido.any():
+        fila, c = fila[~repetido], c[~repetido]
+    n_cortes = np.bincount(fila, minlength=len(mascaras))
+    con_cortes = n_cortes > 0
+    fin = np.cumsum(n_cortes)
+    ultimo = fin[con_cortes] - 1
+    primero = ultimo - n_cortes[con_cortes] + 1
+
+    if adn["tipo"] == "lineal":
+        # cada fila con cortes lleva un fragmento más que cortes: se abre un hueco por fila
+        validos = np.where(con_cortes, n_cortes + 1, 0)
+        desplazado = np.arange(len(c)) + (np.cumsum(con_cortes) - con_cortes)[fila]
+        frags = np.empty(len(c) + con_cortes.sum(), dtype=np.int64)
+        anterior = np.empty_like(c)
+        anterior[1:] = c[:-1]
+        anterior[primero] = 0
+        frags[desplazado] = c - anterior
+        # el último fragmento va del último corte hasta el final
+        frags[desplazado[ultimo] + 1] = longitud - c[ultimo]
+    else:
+        validos = n_cortes
+        frags = np.empty(len(c), dtype=np.int64)
+        frags[:-1] = np.diff(c)
+        # el último segmento cruza el origen: del último corte al final y del inicio al primer corte
+        # (sobrescribe la diferencia con la fila siguiente)
+        frags[ultimo] = longitud - c[ultimo] + c[primero]
+    return frags, validos
+
+
+def digerir_lote_plano(trabajos):
+    # trabajos: lista de (adn, enzimas) -> (fragmentos concatenados, inicio de cada trabajo)
+    # el trabajo i ocupa fragmentos[inicios[i]:inicios[i + 1]]
+    n = len(trabajos)
+
+    # se numeran las moléculas y las combinaciones distintas sin bucles de Python por trabajo
+    # (primero por identidad del objeto; solo los objetos distintos se comparan por contenido)
+    adn_col = [adn for adn, _ in trabajos]
+    enz_col = [enzimas for _, enzimas in trabajos]
+    _, primero, mol = np.unique(np.fromiter(map(id, adn_col), np.int64, n), return_index=True, return_inverse=True)
+    # las moléculas se numeran en el orden en que aparecen
+    aparicion = np.argsort(primero)
+    rango = np.empty_like(aparicion)
+    rango[aparicion] = np.arange(len(aparicion))
+    mol = rango[mol.reshape(-1)]
+    adns = [adn_col[i] for i in primero[aparicion].tolist()]
+    _, primero, objeto = np.unique(np.fromiter(map(id, enz_col), np.int64, n), return_index=True, return_inverse=True)
+    claves = [tuple(enz_col[i]) for i in primero.tolist()]
+    combos = {c: i for i, c in enumerate(dict.fromkeys(claves))}
+    combo = np.fromiter(map(combos.__getitem__, claves), np.int64, len(claves))[objeto.reshape(-1)]
+
+    # la máscara de bits depende solo de las enzimas de la molécula (su firma) y de la combinación
+    firmas = {}
+    firma_mol = np.array([firmas.setdefault(tuple(sorted(adn["sitios"])), len(firmas)) for adn in adns], dtype=np.int64)
+    lista_firmas = list(firmas)
+    lista_combos = list(combos)
+    pares, par_inv = np.unique(firma_mol[mol] * len(combos) + combo, return_inverse=True)
+    bits = [{e: 1 << j for j, e in enumerate(firma)} for firma in lista_firmas]
+    tabla = np.zeros(len(pares), dtype=np.int64)
+    for k, par in enumerate(pares.tolist()):
+        bit = bits[par // len(combos)]
+        tabla[k] = sum(bit.get(e, 0) for e in set(lista_combos[par % len(combos)]))
+    mascaras = tabla[par_inv.reshape(-1)]
+
+    # trabajos agrupados por molécula
+    orden = np.argsort(mol, kind="stable")
+    limites = np.concatenate([[0], np.cumsum(np.bincount(mol, minlength=len(adns)))])
+
+    resultados = []
+    conteos = np.zeros(n, dtype=np.int64)
+    for m, adn in enumerate(adns):
+        miembros = orden[limites[m]:limites[m + 1]]
+        ancho = sum(len(v) for v in adn["sitios"].values()) + 1
+        paso = max(1, MAX_CELDAS_LOTE // ancho)
+        for a in range(0, len(miembros), paso):
+            trozo = miembros[a:a + paso]
+            frags, validos = _fragmentos_molecula(adn, mascaras[trozo])
+            conteos[trozo] = validos
+            resultados.append((trozo, frags, validos))
+
+    inicios = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(conteos, out=inicios[1:])
+    if np.array_equal(orden, np.arange(n)):
+        # trabajos ya agrupados por molécula (el caso normal): basta con concatenar
+        return np.concatenate([f for _, f, _ in resultados] or [np.zeros(0, np.int64)]), inicios
+
+    # si no, cada bloque se copia a su lugar en el orden original de los trabajos
+    fragmentos = np.empty(inicios[-1], dtype=np.int64)
+    for trozo, frags, validos in resultados:
+        local = np.cumsum(validos) - validos
+        fragmentos[np.repeat(inicios[trozo] - local, validos) + np.arange(len(frags))] = frags
+    return fragmentos, inicios
+
+
+def digerir_lote(trabajos):
+    # igual que [digerir(adn, enzimas)[0] for adn, enzimas in trabajos], pero con arreglos de NumPy
+    if not trabajos:
+        return []
+    fragmentos, inicios = digerir_lote_plano(trabajos)
+    return np.split(fragmentos, inicios[1:-1])
+
+
+def digerir_catalogo(adn_db):
+    # clave de respuestas: (nombre, enzimas, fragmentos) para cada molécula y cada combinación de sus enzimas
+    nombres = []
+    trabajos = []
+    for nombre, adn in adn_db.items():
+        for combo in combinaciones_enzimas(adn):
+            nombres.append(nombre)
+            trabajos.append((adn, combo))
+    return [(nombre, combo, frags) for nombre, (_, combo), frags in zip(nombres, trabajos, digerir_lote(trabajos))]
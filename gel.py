@@ -0,0 +1,320 @@
+import hashlib
+import io
+import json
+import threading
+import zlib
+from collections import OrderedDict
+from functools import lru_cache
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+
+MARCADOR = [10000, 8000, 6000, 5000, 4000, 3000, 2000, 1000]
+
+
+# desplazamiento vertical de cada carril; crc32 es estable entre procesos (hash() no lo es),
+# así la misma configuración siempre da la misma imagen
+def desplazamiento_carril(nombre):
+    return (zlib.crc32(nombre.encode("utf-8")) % 8) - 4
+
+
+# función para generar imagen de gel
+def generar_gel_multicarril(diccionario_carriles, ancho_carril=120, alto=400, espacio=20, scale=2):
+    ancho_carril *= scale
+    alto *= scale
+    espacio *= scale
+
+    carriles = {"Marcador": MARCADOR}
+    carriles.update(diccionario_carriles)
+
+    n = len(carriles)
+    ancho_total = n * ancho_carril + (n + 1) * espacio
+    img = Image.new("RGB", (ancho_total, alto), "black")
+    draw = ImageDraw.Draw(img)
+
+    try:
+        small_font = ImageFont.truetype("arial.ttf", 12 * scale)
+    except:
+        small_font = ImageFont.load_default()
+
+    max_pb_global = max(max(frag) for frag in carriles.values() if frag)
+
+    x_actual = espacio
+    for nombre, fragmentos in carriles.items():
+        x1 = x_actual
+        x2 = x_actual + ancho_carril
+
+        draw.rectangle(
+            [x1 + ancho_carril*0.3, 30*scale, x2 - ancho_carril*0.3, alto - 30*scale],
+            outline="grey",
+            width=1*scale
+        )
+
+        if fragmentos:
+            for f in sorted(fragmentos, reverse=True):
+                rel = f / max_pb_global
+                y = int(50*scale + (1 - rel) * (alto - 80*scale))
+
+                if nombre not in ("Marcador", "Combinada"):
+                    y += desplazamiento_carril(nombre) * scale
+
+                draw.rectangle([x1 + 15*scale, y - 4*scale, x2 - 15*scale, y + 4*scale], fill="white")
+
+                if nombre == "Marcador":
+                    draw.text((x2 + 5*scale, y - 6*scale), f"{f}", fill="white", font=small_font)
+
+        draw.text((x1 + 5*scale, alto - 25*scale), nombre[:10], fill="white", font=small_font)
+
+        x_actual += ancho_carril + espacio
+
+    return img
+
+
+# gel compuesto como un solo arreglo de NumPy, dibujado directamente al ancho en que se muestra.
+# La migración es lineal en log10(pb) (como en un gel real), la intensidad es proporcional a la
+# masa de ADN (tamaño x número de copias), cada banda tiene un perfil gaussiano y los fragmentos
+# que caen en la misma fila se suman en una sola banda.
+def migracion(fragmentos, pb_max, pb_min, y_pozo, y_frente):
+    rel = (np.log10(pb_max) - np.log10(np.clip(fragmentos, pb_min, pb_max))) / (np.log10(pb_max) - np.log10(pb_min))
+    return y_pozo + rel * (y_frente - y_pozo)
+
+
+@lru_cache(maxsize=8)
+def _fuente(tamano):
+    try:
+        return ImageFont.truetype("arial.ttf", tamano)
+    except:
+        return ImageFont.load_default()
+
+
+@lru_cache(maxsize=512)
+def _texto(texto, tamano):
+    # cada etiqueta se rasteriza una vez y se reutiliza como máscara de NumPy
+    fuente = _fuente(tamano)
+    x0, y0, x1, y1 = fuente.getbbox(texto)
+    lienzo = Image.new("L", (max(1, x1), max(1, y1)), 0)
+    ImageDraw.Draw(lienzo).text((0, 0), texto, fill=255, font=fuente)
+    return np.asarray(lienzo)
+
+
+def _pegar_texto(gris, texto, x, y, tamano):
+    mascara = _texto(texto, tamano)
+    x, y = int(round(x)), int(round(y))
+    alto, ancho = gris.shape[-2:]
+    y0, x0 = max(y, 0), max(x, 0)
+    y1, x1 = min(y + mascara.shape[0], alto), min(x + mascara.shape[1], ancho)
+    if y1 <= y0 or x1 <= x0:
+        return
+    recorte = mascara[y0 - y:y1 - y, x0 - x:x1 - x]
+    np.maximum(gris[..., y0:y1, x0:x1], recorte, out=gris[..., y0:y1, x0:x1])
+
+
+def _disposicion(diccionario_carriles, ancho, ancho_carril, alto, espacio, pb_min):
+    # geometría del gel y posición final de cada banda, compartida por el gel fijo y la animación
+    carriles = {"Marcador": MARCADOR}
+    carriles.update(diccionario_carriles)
+    nombres = list(carriles)
+    n = len(nombres)
+
+    # mismas proporciones que generar_gel_multicarril, escaladas al ancho final
+    g = {"nombres": nombres, "n": n, "ancho": ancho, "ancho_carril": ancho_carril, "pb_min": pb_min}
+    g["escala"] = escala = ancho / (n * ancho_carril + (n + 1) * espacio)
+    g["alto_px"] = alto_px = max(1, round(alto * escala))
+    g["y_pozo"] = 50 * escala
+    g["y_frente"] = alto_px - 30 * escala
+    g["sigma"] = max(0.8, 2.5 * escala)
+    g["tam_letra"] = max(8, int(24 * escala))
+    g["x0"] = espacio * escala + np.arange(n) * (ancho_carril + espacio) * escala
+
+    # todas las bandas en arreglos planos: carril, tamaño y fila final
+    tamanos = [np.asarray(carriles[nombre], dtype=np.float64) for nombre in nombres]
+    g["carril"] = np.repeat(np.arange(n), [len(t) for t in tamanos])
+    g["pb"] = pb = np.concatenate(tamanos)
+    g["pb_max"] = max(pb.max(), MARCADOR[0])
+    y = migracion(pb, g["pb_max"], pb_min, g["y_pozo"], g["y_frente"])
+    jitter = np.array([0 if nombre in ("Marcador", "Combinada") else desplazamiento_carril(nombre) for nombre in nombres])
+    g["y"] = y + jitter[g["carril"]] * escala
+    return g
+
+
+def _perfiles(g, y):
+    # y: filas de las bandas con forma (..., bandas) -> perfil de intensidad (..., carriles, alto)
+    n, alto_px, carril, pb = g["n"], g["alto_px"], g["carril"], g["pb"]
+    lotes = y.shape[:-1]
+    y = y.reshape(-1, len(pb))
+    visibles = (pb > 0) & (y >= 0) & (y < alto_px)
+
+    # masa acumulada por carril y fila (los fragmentos que comigran se suman aquí)
+    lote = np.nonzero(visibles)[0]
+    fila = np.rint(y[visibles]).astype(np.int64)
+    pesos = np.broadcast_to(pb, y.shape)[visibles]
+    indices = (lote * n + np.broadcast_to(carril, y.shape)[visibles]) * alto_px + fila
+    masa = np.bincount(indices, weights=pesos, minlength=len(y) * n * alto_px)
+    masa = masa.reshape(len(y), n, alto_px)
+
+    # desenfoque gaussiano vertical de todos los carriles (y cuadros) a la vez
+    sigma = g["sigma"]
+    radio = int(np.ceil(3 * sigma))
+    perfil = np.zeros_like(masa)
+    for d in range(-radio, radio + 1):
+        peso = np.exp(-0.5 * (d / sigma) ** 2)
+        if d >= 0:
+            perfil[..., d:] += peso * masa[..., :alto_px - d]
+        else:
+            perfil[..., :d] += peso * masa[..., -d:]
+    return perfil.reshape(lotes + (n, alto_px))
+
+
+def _brillo(perfil, referencia):
+    # el tono se satura como la fluorescencia
+    return ((1.0 - np.exp(-2.5 * perfil / referencia)) * 255).astype(np.uint8)
+
+
+def _referencia(perfil):
+    # la banda más intensa del marcador (o la más intensa del gel si el marcador no se ve)
+    return perfil[0].max() if perfil[0].max() > 0 else max(perfil.max(), 1.0)
+
+
+def _pintar(g, brillo):
+    # brillo (..., carriles, alto) -> imagen en gris (..., alto, ancho); cada columna de banda
+    # copia el perfil de su carril
+    n, ancho, escala, ancho_carril, x0 = g["n"], g["ancho"], g["escala"], g["ancho_carril"], g["x0"]
+    columna_carril = np.full(ancho, -1)
+    for i in range(n):
+        columna_carril[int(round(x0[i] + 15 * escala)):int(round(x0[i] + (ancho_carril - 15) * escala))] = i
+    dentro = columna_carril >= 0
+    gris = np.zeros(brillo.shape[:-2] + (g["alto_px"], ancho), dtype=np.uint8)
+    gris[..., dentro] = np.swapaxes(brillo[..., columna_carril[dentro], :], -1, -2)
+    return gris
+
+
+def _decorar(g, gris, marcador=True):
+    # contorno de cada carril en gris y etiquetas (tamaños del marcador y nombre de cada carril)
+    n, escala, ancho_carril, x0, alto_px, tam_letra = g["n"], g["escala"], g["ancho_carril"], g["x0"], g["alto_px"], g["tam_letra"]
+    medio = np.uint8(128)
+    arriba, abajo = int(30 * escala), int(alto_px - 30 * escala)
+    for i in range(n):
+        izq = int(x0[i] + ancho_carril * escala * 0.3)
+        der = int(x0[i] + ancho_carril * escala * 0.7)
+        for x in (izq, der):
+            np.maximum(gris[..., arriba:abajo + 1, x], medio, out=gris[..., arriba:abajo + 1, x])
+        for yb in (arriba, abajo):
+            np.maximum(gris[..., yb, izq:der + 1], medio, out=gris[..., yb, izq:der + 1])
+
+    if marcador:
+        _etiquetas_marcador(g, gris)
+    for i, nombre in enumerate(g["nombres"]):
+        _pegar_texto(gris, nombre[:10], x0[i] + 5 * escala, alto_px - 25 * escala, tam_letra)
+    return gris
+
+
+def _etiquetas_marcador(g, gris):
+    x_marcador = g["x0"][0] + g["ancho_carril"] * g["escala"] + 2
+    y_marcador = migracion(np.array(MARCADOR, dtype=np.float64), g["pb_max"], g["pb_min"], g["y_pozo"], g["y_frente"])
+    for f, yf in zip(MARCADOR, y_marcador):
+        _pegar_texto(gris, f"{f}", x_marcador, yf - _texto(f"{f}", g["tam_letra"]).shape[0] / 2, g["tam_letra"])
+
+
+def renderizar_gel(diccionario_carriles, ancho=500, ancho_carril=120, alto=400, espacio=20, pb_min=100):
+    g = _disposicion(diccionario_carriles, ancho, ancho_carril, alto, espacio, pb_min)
+    perfil = _perfiles(g, g["y"])
+    gris = _decorar(g, _pintar(g, _brillo(perfil, _referencia(perfil))))
+    return Image.fromarray(np.repeat(gris[:, :, None], 3, axis=2), "RGB")
+
+
+# animación de la corrida: cada banda sale del pozo y avanza a velocidad constante hasta su
+# posición final, así las bandas se van separando con el tiempo; todos los cuadros se calculan
+# juntos como un solo arreglo (cuadros, alto, ancho) y se codifican una vez
+CUADROS = 36
+MINUTOS_CORRIDA = 45
+DURACION_CUADRO_MS = 80
+PAUSA_FINAL_MS = 1500
+
+
+def renderizar_animacion(diccionario_carriles, cuadros=CUADROS, ancho=500, ancho_carril=120, alto=400, espacio=20, pb_min=100):
+    g = _disposicion(diccionario_carriles, ancho, ancho_carril, alto, espacio, pb_min)
+    t = np.linspace(0.0, 1.0, cuadros)
+    y = g["y_pozo"] + t[:, None] * (g["y"] - g["y_pozo"])
+    perfil = _perfiles(g, y)
+    # misma referencia en todos los cuadros (la del gel terminado): el brillo no parpadea
+    gris = _decorar(g, _pintar(g, _brillo(perfil, _referencia(perfil[-1]))), marcador=False)
+    # los tamaños del marcador solo valen con el gel terminado: van en el último cuadro
+    _etiquetas_marcador(g, gris[-1])
+    for k, tk in enumerate(t):
+        texto = f"{round(tk * MINUTOS_CORRIDA)} min"
+        _pegar_texto(gris[k], texto, ancho - _texto(texto, g["tam_letra"]).shape[1] - 4, 4, g["tam_letra"])
+    return gris
+
+
+def codificar_animacion(cuadros, formato="GIF"):
+    # cuadros en gris -> bytes GIF o WEBP animados (se repiten sin fin, con una pausa al final)
+    imagenes = [Image.fromarray(c, "L") for c in cuadros]
+    duraciones = [DURACION_CUADRO_MS] * (len(imagenes) - 1) + [PAUSA_FINAL_MS]
+    # en GIF, sin optimize: la paleta ya es de grises y optimizarla multiplica por 5 el tiempo
+    # a cambio de un archivo apenas un 7 % más chico
+    extra = {"lossless": True} if formato == "WEBP" else {"optimize": False}
+    buffer = io.BytesIO()
+    imagenes[0].save(
+        buffer, format=formato, save_all=True, append_images=imagenes[1:], duration=duraciones, loop=0, **extra
+    )
+    return buffer.getvalue()
+
+
+# caché LRU de imágenes ya codificadas, compartida por todas las sesiones del proceso
+class CacheLRU:
+    def __init__(self, max_entradas=256, max_bytes=64 * 1024 * 1024):
+        self.max_entradas = max_entradas
+        self.max_bytes = max_bytes
+        self.aciertos = 0
+        self.fallos = 0
+        self._datos = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def obtener(self, clave):
+        with self._lock:
+            valor = self._datos.get(clave)
+            if valor is None:
+                self.fallos += 1
+                return None
+            self._datos.move_to_end(clave)
+            self.aciertos += 1
+            return valor
+
+    def guardar(self, clave, valor):
+        with self._lock:
+            if clave in self._datos:
+                self._bytes -= len(self._datos.pop(clave))
+            self._datos[clave] = valor
+            self._bytes += len(valor)
+            while self._datos and (len(self._datos) > self.max_entradas or self._bytes > self.max_bytes):
+                _, viejo = self._datos.popitem(last=False)
+                self._bytes -= len(viejo)
+
+    def __len__(self):
+        return len(self._datos)
+
+
+cache_geles = CacheLRU()
+
+
+def clave_gel(diccionario_carriles, **opciones):
+    # forma canónica: carriles en su orden de aparición, fragmentos ordenados y enteros
+    contenido = {
+        "carriles": [[nombre, sorted(int(f) for f in frags)] for nombre, frags in diccionario_carriles.items()],
+        "opciones": sorted(opciones.items()),
+    }
+    return hashlib.sha256(json.dumps(contenido, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def gel_png(diccionario_carriles, **opciones):
+    # bytes PNG del gel; solo se dibuja y codifica si la configuración no está en la caché
+    clave = clave_gel(diccionario_carriles, **opciones)
+    png = cache_geles.obtener(clave)
+    if png is None:
+        buffer = io.BytesIO()
+        renderizar_gel(diccionario_carriles, **opciones).save(buffer, format="PNG")
+        png = buffer.getvalue()
+        cache_geles.guardar(clave, png)
+    return png
@@ -0,0 +1,654 @@
+import hashlib
+import json
+import logging
+import random
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import requests
+import streamlit as st
+from requests.adapters import HTTPAdapter
+
+from metricas import metricas
+
+MODELO = "gpt-4o-mini"
+URL_BASE = "https://api.openai.com/v1"
+
+# lo más que se respeta un Retry-After del servidor antes de reintentar (segundos)
+MAX_ESPERA = 20.0
+
+log = logging.getLogger(__name__)
+
+
+# caché persistente de respuestas de la IA: la clave es un hash del prompt normalizado
+# (modelo, temperatura y mensajes con los espacios colapsados); cada entrada caduca a las
+# ttl_segundos y, si se supera el tamaño máximo, se descartan las menos usadas recientemente
+class CacheRespuestas:
+    def __init__(self, ruta="cache_ia.db", ttl_segundos=7 * 24 * 3600, max_entradas=5000, max_bytes=50 * 1024 * 1024):
+        self.ruta = ruta
+        self.ttl_segundos = ttl_segundos
+        self.max_entradas = max_entradas
+        self.max_bytes = max_bytes
+        self.aciertos = 0
+        self.fallos = 0
+        self._lock = threading.Lock()
+        # una sola conexión para todos los hilos (cada rerun de Streamlit corre en uno nuevo),
+        # usada de a un hilo por vez; la tabla se crea al abrirla
+        self._con = None
+        self._lock_con = threading.Lock()
+
+    @contextmanager
+    def _conexion(self):
+        with self._lock_con:
+            if self._con is None:
+                con = sqlite3.connect(self.ruta, timeout=30, isolation_level=None, check_same_thread=False)
+                con.execute("PRAGMA journal_mode=WAL")
+                con.execute(
+                    "CREATE TABLE IF NOT EXISTS respuestas ("
+                    "clave TEXT PRIMARY KEY, respuesta TEXT, creada REAL, usada REAL, bytes INTEGER)"
+                )
+                con.execute("CREATE INDEX IF NOT EXISTS respuestas_usada ON respuestas (usada)")
+                self._con = con
+            yield self._con
+
+    @staticmethod
+    def clave(messages, temperature, modelo=MODELO):
+        normalizado = {
+            "modelo": modelo,
+            "temperatura": round(float(temperature), 3),
+            "mensajes": [[m["role"], " ".join(str(m["content"]).split())] for m in messages],
+        }
+        return hashlib.sha256(json.dumps(normalizado, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+    def obtener(self, clave):
+        ahora = time.time()
+        with self._conexion() as con:
+            fila = con.execute("SELECT respuesta, creada FROM respuestas WHERE clave = ?", (clave,)).fetchone()
+            if fila is None or ahora - fila[1] > self.ttl_segundos:
+                with self._lock:
+                    self.fallos += 1
+                return None
+            con.execute("UPDATE respuestas SET usada = ? WHERE clave = ?", (ahora, clave))
+        with self._lock:
+            self.aciertos += 1
+        return fila[0]
+
+    def guardar(self, clave, respuesta):
+        ahora = time.time()
+        with self._conexion() as con:
+            con.execute(
+                "INSERT OR REPLACE INTO respuestas (clave, respuesta, creada, usada, bytes) VALUES (?, ?, ?, ?, ?)",
+                (clave, respuesta, ahora, ahora, len(respuesta.encode("utf-8"))),
+            )
+            self._recortar(con, ahora)
+
+    def _recortar(self, con, ahora):
+        con.execute("DELETE FROM respuestas WHERE creada < ?", (ahora - self.ttl_segundos,))
+        n, total = con.execute("SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM respuestas").fetchone()
+        if n <= self.max_entradas and total <= self.max_bytes:
+            return
+        # se conservan las más usadas recientemente hasta quedar dentro de ambos límites
+        con.execute(
+            "DELETE FROM respuestas WHERE clave IN ("
+            "SELECT clave FROM (SELECT clave, ROW_NUMBER() OVER (ORDER BY usada DESC) AS pos, "
+            "SUM(bytes) OVER (ORDER BY usada DESC) AS acumulado FROM respuestas) "
+            "WHERE pos > ? OR acumulado > ?)",
+            (self.max_entradas, self.max_bytes),
+        )
+
+    def estadisticas(self):
+        with self._conexion() as con:
+            n, total = con.execute("SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM respuestas").fetchone()
+        return {"aciertos": self.aciertos, "fallos": self.fallos, "entradas": n, "bytes": total}
+
+
+cache_ia = CacheRespuestas()
+
+
+class ErrorIA(Exception):
+    pass
+
+
+# limitador de tasa (cubeta de fichas) compartido por todas las sesiones del proceso
+class LimitadorTasa:
+    def __init__(self, por_minuto, rafaga=None):
+        self.tasa = por_minuto / 60.0
+        self.capacidad = rafaga or max(1.0, self.tasa)
+        self._fichas = self.capacidad
+        self._ultimo = time.monotonic()
+        self._lock = threading.Lock()
+
+    def esperar(self):
+        while True:
+            with self._lock:
+                ahora = time.monotonic()
+                self._fichas = min(self.capacidad, self._fichas + (ahora - self._ultimo) * self.tasa)
+                self._ultimo = ahora
+                if self._fichas >= 1:
+                    self._fichas -= 1
+                    return
+                falta = (1 - self._fichas) / self.tasa
+            time.sleep(falta)
+
+
+# cliente HTTP único para todas las llamadas a la IA: conexiones persistentes (keep-alive),
+# concurrencia acotada, límite de peticiones por minuto y reintentos con espera exponencial
+# aleatoria ante 429/5xx o fallos de conexión; cada llamada queda medida en metricas
+# (tramo "ia", con su estado final) junto con los intentos HTTP y los tokens
+class ClienteIA:
+    def __init__(self, api_key, url_base=URL_BASE, max_concurrentes=8, por_minuto=500,
+                 reintentos=4, espera_base=0.5, espera_max=8.0):
+        self.url = url_base.rstrip("/") + "/chat/completions"
+        self.reintentos = reintentos
+        self.espera_base = espera_base
+        self.espera_max = espera_max
+        self.sesion = requests.Session()
+        adaptador = HTTPAdapter(pool_connections=1, pool_maxsize=max_concurrentes)
+        self.sesion.mount("https://", adaptador)
+        self.sesion.mount("http://", adaptador)
+        self.sesion.headers.update({
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json"
+        })
+        self.limitador = LimitadorTasa(por_minuto)
+        self._cupos = threading.BoundedSemaphore(max_concurrentes)
+
+    def _espera(self, intento, retry_after=None):
+        espera = random.uniform(0, min(self.espera_max, self.espera_base * 2 ** intento))
+        try:
+            return max(espera, min(float(retry_after), MAX_ESPERA))
+        except (TypeError, ValueError):
+            return espera
+
+    @staticmethod
+    def _intento(resp):
+        # estado de un intento HTTP para las métricas
+        estado = "conexion" if resp is None else str(resp.status_code)
+        metricas.sumar("ia_peticiones", estado=estado)
+        return estado
+
+    @staticmethod
+    def _tokens(uso, partes=0):
+        # tokens informados por la API; en streaming, sin ellos, cada parte cuenta como uno de salida
+        uso = uso or {}
+        if uso.get("prompt_tokens"):
+            metricas.sumar("ia_tokens", uso["prompt_tokens"], tipo="entrada")
+        if uso.get("completion_tokens") or partes:
+            metricas.sumar("ia_tokens", uso.get("completion_tokens") or partes, tipo="salida")
+
+    def completar(self, messages, temperature=0.4, timeout=15):
+        body = {
+            "model": MODELO,
+            "messages": messages,
+            "temperature": temperature
+        }
+        with metricas.tramo("ia", modo="completa") as tramo:
+            for intento in range(self.reintentos + 1):
+                self.limitador.esperar()
+                retry_after = None
+                # el cupo se ocupa solo durante la petición, no mientras se espera para reintentar
+                with self._cupos:
+                    try:
+                        resp = self.sesion.post(self.url, json=body, timeout=timeout)
+                    except requests.RequestException as e:
+                        resp = None
+                        error = ErrorIA(f"No se pudo conectar a la API: {e}")
+                if resp is None:
+                    tramo["estado"] = self._intento(None)
+                else:
+                    tramo["estado"] = self._intento(resp)
+                    if resp.status_code == 429 or resp.status_code >= 500:
+                        retry_after = resp.headers.get("Retry-After")
+                        error = ErrorIA(f"Error de la API: HTTP {resp.status_code}")
+                    else:
+                        try:
+                            data = resp.json()
+                        except ValueError:
+                            tramo["estado"] = "respuesta_no_valida"
+                            raise ErrorIA(f"Error de la API: respuesta no válida (HTTP {resp.status_code})")
+                        try:
+                            if "error" in data:
+                                tramo["estado"] = "error_api"
+                                raise ErrorIA(f"Error de la API: {data['error'].get('message')}")
+                            texto = data["choices"][0]["message"]["content"]
+                        except (AttributeError, KeyError, IndexError, TypeError):
+                            texto = None
+                        if not isinstance(texto, str):
+                            tramo["estado"] = "respuesta_no_valida"
+                            raise ErrorIA(f"Error de la API: respuesta inesperada (HTTP {resp.status_code})")
+                        self._tokens(data.get("usage"))
+                        tramo["estado"] = "ok"
+                        return texto
+                if intento < self.reintentos:
+                    time.sleep(self._espera(intento, retry_after))
+            raise error
+
+    def completar_stream(self, messages, temperature=0.4, timeout=15):
+        # genera el texto por partes a medida que llega (eventos SSE de chat/completions);
+        # los reintentos solo ocurren antes del primer token
+        body = {
+            "model": MODELO,
+            "messages": messages,
+            "temperature": temperature,
+            "stream": True
+        }
+        with metricas.tramo("ia", modo="stream") as tramo:
+            inicio = time.perf_counter()
+            for intento in range(self.reintentos + 1):
+                self.limitador.esperar()
+                retry_after = None
+                # el cupo se ocupa durante la petición y la lectura de la respuesta, pero no
+                # mientras se espera para reintentar
+                self._cupos.acquire()
+                conectada = False
+                try:
+                    try:
+                        resp = self.sesion.post(self.url, json=body, timeout=timeout, stream=True)
+                    except requests.RequestException as e:
+                        tramo["estado"] = self._intento(None)
+                        error = ErrorIA(f"No se pudo conectar a la API: {e}")
+                    else:
+                        tramo["estado"] = self._intento(resp)
+                        if resp.status_code == 429 or resp.status_code >= 500:
+                            retry_after = resp.headers.get("Retry-After")
+                            error = ErrorIA(f"Error de la API: HTTP {resp.status_code}")
+                            resp.close()
+                        elif resp.status_code != 200:
+                            try:
+                                mensaje = resp.json().get("error", {}).get("message")
+                            except ValueError:
+                                mensaje = f"HTTP {resp.status_code}"
+                            resp.close()
+                            raise ErrorIA(f"Error de la API: {mensaje}")
+                        else:
+                            conectada = True
+                            break
+                finally:
+                    if not conectada:
+                        self._cupos.release()
+                if intento < self.reintentos:
+                    time.sleep(self._espera(intento, retry_after))
+            else:
+                raise error
+
+            with resp:
+                partes = 0
+                uso = None
+                try:
+                    for linea in resp.iter_lines(chunk_size=None):
+                        if not linea.startswith(b"data:"):
+                            continue
+                        dato = linea[5:].strip()
+                        if dato == b"[DONE]":
+                            break
+                        try:
+                            evento = json.loads(dato)
+                            uso = evento.get("usage") or uso
+                            opciones = evento.get("choices")
+                            delta = opciones[0].get("delta", {}).get("content") if opciones else None
+                            valido = delta is None or isinstance(delta, str)
+                        except (ValueError, AttributeError, KeyError, IndexError, TypeError):
+                            valido = False
+                        if not valido:
+                            tramo["estado"] = "respuesta_no_valida"
+                            raise ErrorIA(f"Error de la API: respuesta inesperada ({dato[:80].decode('utf-8', 'replace')})")
+                        if delta:
+                            if not partes:
+                                registrar_primer_token(time.perf_counter() - inicio)
+                            partes += 1
+                            yield delta
+                except requests.RequestException as e:
+                    tramo["estado"] = "cortada"
+                    raise ErrorIA(f"Se cortó la respuesta de la API: {e}")
+                except GeneratorExit:
+                    tramo["estado"] = "abandonada"
+                    raise
+                finally:
+                    self._cupos.release()
+                    self._tokens(uso, partes)
+                tramo["estado"] = "ok"
+
+
+# tiempo hasta el primer token de las respuestas en streaming (últimas 1000)
+tiempos_primer_token = deque(maxlen=1000)
+
+
+def registrar_primer_token(segundos):
+    tiempos_primer_token.append(segundos)
+    metricas.observar("ia_primer_token", segundos)
+    log.info("primer token en %.3f s", segundos)
+
+
+def secreto(nombre, defecto=None):
+    # valor de .streamlit/secrets.toml; sin archivo de secrets la app funciona sin IA
+    try:
+        return st.secrets.get(nombre, defecto)
+    except Exception:
+        return defecto
+
+
+_clientes = {}
+_clientes_lock = threading.Lock()
+
+
+def cliente_ia():
+    # un cliente por configuración (clave y URL); None si no hay clave configurada
+    api_key = secreto("OPENAI_API_KEY")
+    if not api_key:
+        return None
+    url_base = secreto("OPENAI_BASE_URL", URL_BASE)
+    with _clientes_lock:
+        cliente = _clientes.get((api_key, url_base))
+        if cliente is None:
+            cliente = _clientes[(api_key, url_base)] = ClienteIA(
+                api_key,
+                url_base,
+                max_concurrentes=int(secreto("OPENAI_MAX_CONCURRENTES", 8)),
+                por_minuto=float(secreto("OPENAI_PETICIONES_POR_MINUTO", 500)),
+            )
+        return cliente
+
+
+class _Vuelo:
+    # una petición en curso: la respuesta se va acumulando y quien espera la repite por partes
+    def __init__(self):
+        self.partes = []
+        self.seguidores = 0
+        self.terminado = False
+        self.error = None
+        self.cond = threading.Condition()
+
+    def agregar(self, parte):
+        with self.cond:
+            self.partes.append(parte)
+            self.cond.notify_all()
+
+    def terminar(self, error=None):
+        with self.cond:
+            self.terminado = True
+            self.error = error
+            self.cond.notify_all()
+
+    def seguir(self):
+        i = 0
+        while True:
+            with self.cond:
+                while i >= len(self.partes) and not self.terminado:
+                    self.cond.wait()
+                nuevas = self.partes[i:]
+                terminado, error = self.terminado, self.error
+            i += len(nuevas)
+            yield from nuevas
+            if terminado:
+                if error is not None:
+                    raise ErrorIA(str(error))
+                return
+
+
+class VuelosIA:
+    # peticiones idénticas simultáneas que admiten caché (de cualquier sesión): la primera va a
+    # la API y las demás esperan su resultado en lugar de repetir la llamada
+    def __init__(self):
+        self._vuelos = {}
+        self._lock = threading.Lock()
+        self.llamadas = 0
+        self.coalescidas = 0
+
+    def unirse(self, clave):
+        # devuelve (vuelo, es_el_primero)
+        with self._lock:
+            vuelo = self._vuelos.get(clave)
+            if vuelo is not None:
+                self.coalescidas += 1
+                vuelo.seguidores += 1
+                log.info("petición idéntica en curso, se espera su respuesta (%d en total)", self.coalescidas)
+                return vuelo, False
+            vuelo = self._vuelos[clave] = _Vuelo()
+            self.llamadas += 1
+            return vuelo, True
+
+    def terminar(self, clave, vuelo, error=None):
+        # se quita antes de avisar, así una petición posterior ya va a la caché o a la API
+        with self._lock:
+            if self._vuelos.get(clave) is vuelo:
+                del self._vuelos[clave]
+        vuelo.terminar(error)
+
+    def estadisticas(self):
+        with self._lock:
+            return {
+                "llamadas": self.llamadas,
+                "coalescidas": self.coalescidas,
+                "en_curso": len(self._vuelos),
+            }
+
+
+vuelos_ia = VuelosIA()
+
+
+def completar(messages, temperature=0.4, timeout=15, usar_cache=False):
+    # texto de la IA (de la caché si se pide y está); lanza ErrorIA si no hay clave o la llamada falla
+    cliente = cliente_ia()
+    if cliente is None:
+        raise ErrorIA("No hay clave de la API configurada")
+    if not usar_cache:
+        # quien no usa la caché quiere una respuesta propia (otra muestra del modelo): no se comparte
+        return cliente.completar(messages, temperature, timeout)
+    clave = CacheRespuestas.clave(messages, temperature)
+    guardada = cache_ia.obtener(clave)
+    if guardada is not None:
+        return guardada
+    vuelo, primero = vuelos_ia.unirse(clave)
+    if not primero:
+        return "".join(vuelo.seguir())
+    error = ErrorIA("La petición se interrumpió")
+    try:
+        texto = cliente.completar(messages, temperature, timeout)
+        vuelo.agregar(texto)
+        cache_ia.guardar(clave, texto)
+        error = None
+        return texto
+    except ErrorIA as e:
+        error = e
+        raise
+    finally:
+        vuelos_ia.terminar(clave, vuelo, error)
+
+
+def completar_stream(messages, temperature=0.4, timeout=15, usar_cache=False):
+    # como completar(), pero genera el texto por partes; un acierto de caché sale de una vez
+    cliente = cliente_ia()
+    if cliente is None:
+        raise ErrorIA("No hay clave de la API configurada")
+    if not usar_cache:
+        yield from cliente.completar_stream(messages, temperature, timeout)
+        return
+    clave = CacheRespuestas.clave(messages, temperature)
+    guardada = cache_ia.obtener(clave)
+    if guardada is not None:
+        yield guardada
+        return
+    vuelo, primero = vuelos_ia.unirse(clave)
+    if not primero:
+        yield from vuelo.seguir()
+        return
+    error = ErrorIA("La petición se interrumpió")
+    fuente = cliente.completar_stream(messages, temperature, timeout)
+    try:
+        for parte in fuente:
+            vuelo.agregar(parte)
+            yield parte
+        error = None
+    except ErrorIA as e:
+        error = e
+        raise
+    except GeneratorExit:
+        # quien hizo la petición la abandonó; si otras sesiones la esperan, se termina de leer para ellas
+        if vuelo.seguidores:
+            try:
+                for parte in fuente:
+                    vuelo.agregar(parte)
+                error = None
+            except ErrorIA as e:
+                error = e
+        raise
+    finally:
+        fuente.close()
+        if error is None:
+            cache_ia.guardar(clave, "".join(vuelo.partes))
+        vuelos_ia.terminar(clave, vuelo, error)
+
+
+# separa una respuesta que se cortó a mitad de camino del texto de respaldo que la sigue
+AVISO_CORTE = "\n\n---\n\n*La respuesta de la IA se cortó. En resumen:*\n\n"
+
+
+def con_respaldo(partes, respaldo):
+    # si la IA no está disponible o falla, el texto de respaldo ocupa su lugar; si ya se había
+    # mostrado parte de la respuesta, el respaldo va aparte, después de un aviso del corte
+    enviado = False
+    try:
+        for parte in partes:
+            enviado = True
+            yield parte
+    except ErrorIA as e:
+        log.warning("respuesta en streaming: %s", e)
+        yield AVISO_CORTE + respaldo if enviado else respaldo
+
+
+# función para explicar con IA
+EXPLICACION_BASE = (
+    "La(s) enzima(s) seleccionada(s) reconoce(n) sitios específicos en el ADN. "
+    "Cada corte genera un fragmento nuevo. En ADN lineal: fragmentos = cortes + 1. "
+    "En ADN circular: fragmentos = número de cortes (si es 1, se ve una sola banda). "
+    "El carril marcador sirve para comparar tamaños."
+)
+
+
+def _prompt_explicacion(tipo_adn, enzimas, fragmentos, prediccion_estudiante=None):
+    feedback_part = ""
+    if prediccion_estudiante is not None:
+        feedback_part = f"""
+El estudiante predijo {prediccion_estudiante} fragmentos.
+El resultado real fue {len(fragmentos)} fragmentos.
+Da retroalimentación breve, amable, diciendo si acertó o en qué se equivocó.
+"""
+
+    return f"""
+Eres un docente de biología molecular. Explica este resultado de digestión.
+- Tipo de ADN: {tipo_adn}
+- Enzimas usadas: {', '.join(enzimas) if enzimas else 'no especificadas'}
+- Fragmentos obtenidos (pb): {fragmentos}
+{feedback_part}
+Incluye por qué el marcador ayuda a estimar tamaños.
+Usa lenguaje sencillo para estudiantes de ciencias de la salud.
+"""
+
+
+def explicar_con_ia(tipo_adn, enzimas, fragmentos, prediccion_estudiante=None, usar_cache=True):
+    prompt = _prompt_explicacion(tipo_adn, enzimas, fragmentos, prediccion_estudiante)
+    try:
+        return completar([{"role": "user", "content": prompt}], 0.4, timeout=10, usar_cache=usar_cache)
+    except ErrorIA as e:
+        # si no hay clave, o hay error de cuota o modelo (tras los reintentos), devolvemos el base
+        log.warning("explicar_con_ia: %s", e)
+        return EXPLICACION_BASE
+
+
+def partes_explicacion(tipo_adn, enzimas, fragmentos, prediccion_estudiante=None, usar_cache=True):
+    # la explicación por partes, sin respaldo (lanza ErrorIA)
+    prompt = _prompt_explicacion(tipo_adn, enzimas, fragmentos, prediccion_estudiante)
+    return completar_stream([{"role": "user", "content": prompt}], 0.4, timeout=10, usar_cache=usar_cache)
+
+
+def explicar_con_ia_stream(tipo_adn, enzimas, fragmentos, prediccion_estudiante=None, usar_cache=True):
+    partes = partes_explicacion(tipo_adn, enzimas, fragmentos, prediccion_estudiante, usar_cache)
+    return con_respaldo(partes, EXPLICACION_BASE)
+
+
+# preguntas de práctica generadas por IA
+PREGUNTAS_BASE = (
+    "P1: ¿Cuántos fragmentos se obtienen si hay dos cortes en un ADN lineal?\n"
+    "R1: Se obtienen 3 fragmentos.\n"
+    "P2: ¿Para qué sirve el marcador de peso molecular?\n"
+    "R2: Para estimar el tamaño de los fragmentos.\n"
+    "P3: Si una enzima no tiene sitio en el ADN elegido, ¿qué ocurre?\n"
+    "R3: No hay digestión con esa enzima."
+)
+
+
+def mensajes_preguntas(adn, tipo_adn, enzimas, fragmentos):
+    contexto = f"""
+ADN seleccionado: {adn}
+Tipo de ADN: {tipo_adn}
+Enzimas usadas: {', '.join(enzimas) if enzimas else 'ninguna'}
+Fragmentos obtenidos: {fragmentos if fragmentos else 'sin cortes'}
+"""
+    return [
+        {
+            "role": "system",
+            "content": "Eres un profesor de biología molecular que crea ejercicios cortos y claros."
+        },
+        {
+            "role": "user",
+            "content": f"""
+Con el siguiente contexto de una práctica de digestión con enzimas de restricción:
+
+{contexto}
+
+Genera de 3 a 4 preguntas diferentes cada vez.
+- Mezcla tipos de pregunta: definición, aplicación, '¿qué pasaría si...?', e interpretación del gel.
+- Después de cada pregunta escribe la respuesta correcta en una línea aparte.
+- Usa este formato exactamente:
+
+P1: ...
+R1: ...
+P2: ...
+R2: ...
+P3: ...
+R3: ...
+P4: ...
+R4: ...
+
+No expliques, solo preguntas y respuestas.
+"""
+        }
+    ]
+
+
+def partes_preguntas(adn, tipo_adn, enzimas, fragmentos):
+    return completar_stream(mensajes_preguntas(adn, tipo_adn, enzimas, fragmentos), 0.4, timeout=15)
+
+
+# función para llamar a OpenAI
+def call_openai(messages, temperature=0.4, usar_cache=False):
+    if cliente_ia() is None:
+        return None  # indicamos que no hay IA
+    try:
+        return completar(messages, temperature, timeout=15, usar_cache=usar_cache)
+    except ErrorIA as e:
+        st.error(str(e))
+        return None
+
+
+def call_openai_stream(messages, respaldo, temperature=0.4, usar_cache=False):
+    # versión en streaming de call_openai(): sin clave o ante un error sale el texto de respaldo
+    # (separado con AVISO_CORTE si ya había llegado parte de la respuesta)
+    enviado = False
+    try:
+        for parte in completar_stream(messages, temperature, timeout=15, usar_cache=usar_cache):
+            enviado = True
+            yield parte
+    except ErrorIA as e:
+        if cliente_ia() is not None:
+            st.error(str(e))
+        yield AVISO_CORTE + respaldo if enviado else respaldo
+
+
+def streaming_activo():
+    # las respuestas del tutor y de la retroalimentación se muestran a medida que llegan
+    # salvo que se desactive con IA_STREAMING = false en los secrets
+    return bool(secreto("IA_STREAMING", True))
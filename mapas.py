@@ -0,0 +1,259 @@
+import time
+from itertools import combinations
+
+from digestion import digerir
+
+# ejercicio inverso: a partir de las bandas de cada enzima sola y de todas juntas, ubicar los
+# sitios de corte (problema de la doble digestión); la búsqueda avanza de corte en corte
+# eligiendo el largo del próximo fragmento de cada enzima (los cortes de la combinada son los
+# de todas las enzimas, así que sus bandas se miran como huecos entre cortes seguidos), con
+# poda por sumas de los fragmentos combinados que quedan, memoria de los estados sin salida y
+# un tiempo máximo
+# se usan las reglas de digerir(): cortes repetidos cuentan una vez y en ADN circular un solo
+# corte linealiza la molécula
+
+LIMITE_SEGUNDOS = 1.0
+
+# cada cuántos nodos se mira el reloj
+NODOS_POR_CONTROL = 1024
+
+# byte de un largo alcanzable en la tabla de sumas de la combinada
+UNO = ord("1")
+
+
+class TiempoAgotado(Exception):
+    pass
+
+
+def digestiones(adn, enzimas):
+    # {(enzima,): bandas, ..., (todas las enzimas): bandas} ordenadas, tal como las da digerir()
+    enzimas = sorted(enzimas)
+    resultado = {(e,): sorted(digerir(adn, [e])[0]) for e in enzimas}
+    resultado[tuple(enzimas)] = sorted(digerir(adn, enzimas)[0])
+    return resultado
+
+
+def calificar_mapa(longitud, tipo, digestiones, propuesta):
+    # (acierto, {combinación: (coincide, bandas que da la propuesta)}); la propuesta es
+    # {enzima: [posiciones]} y se digiere con digerir() igual que una molécula del catálogo
+    adn = {"tipo": tipo, "longitud": longitud, "sitios": propuesta}
+    detalle = {}
+    for combo, esperado in digestiones.items():
+        obtenido = sorted(digerir(adn, list(combo))[0])
+        detalle[combo] = (obtenido == sorted(esperado), obtenido)
+    return all(ok for ok, _ in detalle.values()), detalle
+
+
+def _canonico(cortes, longitud, circular):
+    # representante de los mapas equivalentes: en lineal, el mapa o su espejo; en circular,
+    # además cualquier giro (se toma con un corte de la primera enzima en 0)
+    if not circular:
+        espejo = tuple(tuple(sorted(longitud - x for x in c)) for c in cortes)
+        return min(cortes, espejo)
+    candidatos = []
+    for origen in cortes[0]:
+        for signo in (1, -1):
+            candidatos.append(tuple(tuple(sorted(signo * (x - origen) % longitud for x in c)) for c in cortes))
+    return min(candidatos)
+
+
+def resolver_mapa(longitud, tipo, digestiones, limite=LIMITE_SEGUNDOS):
+    # todos los mapas {enzima: [posiciones]} compatibles con las bandas, sin repetir espejos ni
+    # giros; devuelve (mapas, completo): completo es False si se agotó el tiempo y la lista
+    # puede estar incompleta
+    enzimas = sorted(combo[0] for combo in digestiones if len(combo) == 1)
+    if not enzimas:
+        raise ValueError("hace falta la digestión de cada enzima por separado")
+    combinada = digestiones.get(tuple(enzimas))
+    if combinada is None:
+        raise ValueError("hace falta la digestión con todas las enzimas juntas")
+    for combo in [(e,) for e in enzimas] + [tuple(enzimas)]:
+        bandas = digestiones[combo]
+        if not bandas or sum(bandas) != longitud or min(bandas) <= 0:
+            raise ValueError(f"las bandas de {'+'.join(combo)} deben sumar {longitud} pb")
+
+    n = len(enzimas)
+    circular = tipo == "circular"
+    valores_c = sorted(set(combinada))
+    cuenta_c = [combinada.count(v) for v in valores_c]
+    valores = [sorted(set(digestiones[(e,)])) for e in enzimas]
+    cuenta = [[digestiones[(e,)].count(v) for v in valores[i]] for i, e in enumerate(enzimas)]
+
+    # en circular el origen se pone en un corte de la enzima con menos cortes, justo al inicio
+    # de su fragmento más largo: todo mapa tiene un giro así y se evitan los giros repetidos
+    ancla = min(range(n), key=lambda i: len(digestiones[(enzimas[i],)]))
+
+    # por enzima: dónde empezó (None si en circular todavía no cortó) y dónde cae su próximo
+    # corte, ya elegido el largo del fragmento en curso; el fragmento que cierra la vuelta
+    # termina en longitud + primer corte
+    primeros = [None] * n if circular else [0] * n
+    siguientes = [None] * n
+    cortes = [[] for _ in range(n)]
+    soluciones = {}
+    muertos = set()
+    memoria_sumas = {}
+    nodos = 0
+    fin = time.perf_counter() + limite
+
+    def mayor_restante(i):
+        for j in range(len(valores[i]) - 1, -1, -1):
+            if cuenta[i][j]:
+                return valores[i][j]
+        return 0
+
+    def sumas_combinadas():
+        # sumas[x] es 1 si el largo x se puede armar con los fragmentos combinados que quedan
+        clave = tuple(cuenta_c)
+        sumas = memoria_sumas.get(clave)
+        if sumas is None:
+            bits = 1
+            tope = (1 << (longitud + 1)) - 1
+            for v, c in zip(valores_c, cuenta_c):
+                for _ in range(c):
+                    bits = (bits | bits << v) & tope
+            sumas = bin(bits)[:1:-1].encode().ljust(longitud + 1, b"0")
+            memoria_sumas[clave] = sumas
+        return sumas
+
+    def registrar():
+        mapa = tuple(tuple(c) for c in cortes)
+        canonico = _canonico(mapa, longitud, circular)
+        soluciones.setdefault(canonico, canonico)
+
+    def elegir(pendientes, k, p):
+        # elige el largo del fragmento que empieza en p para cada enzima pendiente y sigue
+        # la búsqueda; cada corte de la combinada es corte de alguna enzima, así que las
+        # bandas combinadas solo se miran como huecos entre cortes consecutivos
+        if k == len(pendientes):
+            return buscar(p)
+        i = pendientes[k]
+        encontrado = False
+        for j, v in enumerate(valores[i]):
+            if not cuenta[i][j]:
+                continue
+            if circular and i == ancla and p == 0 and v != valores[i][-1]:
+                continue
+            cuenta[i][j] -= 1
+            siguientes[i] = p + v
+            try:
+                encontrado = elegir(pendientes, k + 1, p) or encontrado
+            finally:
+                cuenta[i][j] += 1
+                siguientes[i] = None
+        return encontrado
+
+    def cortar(q, quienes):
+        # las enzimas de quienes cortan en q; las que no habían empezado empiezan ahí
+        empiezan = [i for i in quienes if primeros[i] is None]
+        guardado = [siguientes[i] for i in quienes]
+        for i in empiezan:
+            primeros[i] = q
+        for i in quienes:
+            cortes[i].append(q)
+        try:
+            return elegir(quienes, 0, q)
+        finally:
+            for i in empiezan:
+                primeros[i] = None
+            for i, s in zip(quienes, guardado):
+                cortes[i].pop()
+                siguientes[i] = s
+
+    def buscar(p):
+        nonlocal nodos
+        nodos += 1
+        if nodos % NODOS_POR_CONTROL == 0 and time.perf_counter() > fin:
+            raise TiempoAgotado()
+        clave = (p, tuple(siguientes), tuple(primeros), tuple(cuenta_c), tuple(map(tuple, cuenta)))
+        if clave in muertos:
+            return False
+
+        # cortes que le faltan a cada enzima antes de volver al final: no pueden ser más que
+        # los que le quedan a la combinada
+        quedan_c = sum(cuenta_c)
+        sin_empezar = [i for i in range(n) if primeros[i] is None]
+        for i in range(n):
+            faltan = sum(cuenta[i]) + (1 if primeros[i] == 0 else 0)
+            if faltan > quedan_c:
+                muertos.add(clave)
+                return False
+
+        # cada fragmento de una enzima es una suma de fragmentos seguidos de la combinada: lo
+        # que falta del fragmento en curso y los que quedan (salvo el que cruza el origen)
+        # tienen que salir de sumas de los fragmentos combinados que quedan
+        sumas = sumas_combinadas()
+        for i in range(n):
+            if siguientes[i] is not None and siguientes[i] <= longitud and sumas[siguientes[i] - p] != UNO:
+                muertos.add(clave)
+                return False
+            sobran = 0 if primeros[i] == 0 else 1
+            for j, v in enumerate(valores[i]):
+                if cuenta[i][j] and sumas[v] != UNO:
+                    sobran -= cuenta[i][j]
+                    if sobran < 0:
+                        muertos.add(clave)
+                        return False
+
+        m = min(s for s in siguientes if s is not None)
+        encontrado = False
+        # el próximo corte es el más cercano de los ya elegidos o, antes, el primero de alguna
+        # enzima que todavía no cortó (el fragmento que cruza el origen es más largo que el
+        # tramo hasta su primer corte)
+        for j, c in enumerate(valores_c):
+            if not cuenta_c[j]:
+                continue
+            q = p + c
+            if q > m:
+                break
+            if q == m:
+                forzadas = [i for i in range(n) if siguientes[i] == q]
+            else:
+                forzadas = []
+                if not sin_empezar:
+                    continue
+            cuenta_c[j] -= 1
+            try:
+                if q == longitud:
+                    if quedan_c == 1 and not sin_empezar and not any(map(any, cuenta)):
+                        registrar()
+                        encontrado = True
+                    continue
+                pueden = [i for i in sin_empezar if q < mayor_restante(i)]
+                for r in range(len(pueden) + 1):
+                    for extra in combinations(pueden, r):
+                        if not forzadas and not extra:
+                            continue
+                        encontrado = cortar(q, forzadas + list(extra)) or encontrado
+            finally:
+                cuenta_c[j] += 1
+        if not encontrado:
+            muertos.add(clave)
+        return encontrado
+
+    completo = True
+    try:
+        if not circular:
+            elegir(list(range(n)), 0, 0)
+        else:
+            otras = [i for i in range(n) if i != ancla]
+            for r in range(len(otras) + 1):
+                for extra in combinations(otras, r):
+                    cortar(0, [ancla] + list(extra))
+    except TiempoAgotado:
+        completo = False
+
+    mapas = [{e: list(c) for e, c in zip(enzimas, canonico)} for canonico in sorted(soluciones)]
+    return mapas, completo
+
+
+def mismo_mapa(a, b, longitud, tipo):
+    # True si dos mapas {enzima: [posiciones]} son iguales salvo espejo (y giro en circular)
+    enzimas = sorted(a)
+    if sorted(b) != enzimas:
+        return False
+    circular = tipo == "circular"
+    cortes_a = tuple(tuple(sorted(set(x % longitud if circular else x for x in a[e]))) for e in enzimas)
+    cortes_b = tuple(tuple(sorted(set(x % longitud if circular else x for x in b[e]))) for e in enzimas)
+    if not cortes_a[0] or not cortes_b[0]:
+        return cortes_a == cortes_b
+    return _canonico(cortes_a, longitud, circular) == _canonico(cortes_b, longitud, circular)
@@ -0,0 +1,185 @@
+import logging
+import os
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# tiempos de las etapas de la app (digestión, gel, IA, guardado, panel) en histogramas de
+# cubos fijos: registrar una medida es una búsqueda binaria y una suma, así que puede quedar
+# activo siempre; los datos son del proceso (todas las sesiones) y se pierden al reiniciarlo
+
+log = logging.getLogger(__name__)
+
+PREFIJO = "simulador"
+
+# límites superiores de los cubos, en segundos
+LIMITES = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+AYUDA = {
+    "duracion_segundos": "Duración de cada etapa de la app en segundos",
+    "ia_peticiones_total": "Peticiones HTTP a la API de IA (incluidos los reintentos) por estado",
+    "ia_tokens_total": "Tokens de la IA (entrada según la API; salida según la API o partes recibidas en streaming)",
+}
+
+
+class Histograma:
+    def __init__(self, limites=LIMITES):
+        self.limites = limites
+        self.conteos = [0] * (len(limites) + 1)  # el último es +Inf
+        self.suma = 0.0
+        self.cuenta = 0
+        self.maximo = 0.0
+
+    def observar(self, valor):
+        self.conteos[bisect_left(self.limites, valor)] += 1
+        self.suma += valor
+        self.cuenta += 1
+        self.maximo = max(self.maximo, valor)
+
+    def cuantil(self, q):
+        # interpolación lineal dentro del cubo, como histogram_quantile de Prometheus
+        if not self.cuenta:
+            return None
+        objetivo = q * self.cuenta
+        acumulado = 0
+        for i, n in enumerate(self.conteos):
+            if acumulado + n >= objetivo and n:
+                if i == len(self.limites):
+                    return self.maximo
+                inferior = self.limites[i - 1] if i else 0.0
+                return min(inferior + (self.limites[i] - inferior) * (objetivo - acumulado) / n, self.maximo)
+            acumulado += n
+        return self.maximo
+
+
+def _etiquetas(etiquetas):
+    return tuple(sorted((k, str(v)) for k, v in etiquetas.items()))
+
+
+def _formato(etiquetas, extra=()):
+    pares = list(etiquetas) + list(extra)
+    if not pares:
+        return ""
+    escapar = lambda v: v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+    return "{" + ",".join(f'{k}="{escapar(v)}"' for k, v in pares) + "}"
+
+
+class Metricas:
+    def __init__(self, limites=LIMITES):
+        self.limites = limites
+        self.histogramas = {}  # etiquetas -> Histograma (una sola métrica: duracion_segundos)
+        self.contadores = {}  # (nombre, etiquetas) -> valor
+        self._lock = threading.Lock()
+        self._exportador = None
+
+    def observar(self, tramo, segundos, **etiquetas):
+        clave = _etiquetas({"tramo": tramo, **etiquetas})
+        with self._lock:
+            histograma = self.histogramas.get(clave)
+            if histograma is None:
+                histograma = self.histogramas[clave] = Histograma(self.limites)
+            histograma.observar(segundos)
+
+    def sumar(self, nombre, valor=1, **etiquetas):
+        clave = (nombre, _etiquetas(etiquetas))
+        with self._lock:
+            self.contadores[clave] = self.contadores.get(clave, 0) + valor
+
+    @contextmanager
+    def tramo(self, nombre, **etiquetas):
+        # mide el bloque; quien lo usa puede añadir etiquetas al diccionario que recibe
+        # (sirve también como decorador); si el bloque lanza una excepción sin haber fijado
+        # su "estado", queda como "error"
+        inicio = time.perf_counter()
+        try:
+            yield etiquetas
+        except BaseException:
+            etiquetas.setdefault("estado", "error")
+            raise
+        finally:
+            etiquetas.setdefault("estado", "ok")
+            self.observar(nombre, time.perf_counter() - inicio, **etiquetas)
+
+    def resumen(self):
+        # una fila por tramo y etiquetas, con cuantiles estimados a partir de los cubos
+        with self._lock:
+            copia = [(dict(k), h.cuenta, h.suma, h.maximo, list(h.conteos)) for k, h in self.histogramas.items()]
+        filas = []
+        for etiquetas, cuenta, suma, maximo, conteos in sorted(copia, key=lambda c: (c[0]["tramo"], sorted(c[0].items()))):
+            h = Histograma(self.limites)
+            h.cuenta, h.suma, h.maximo, h.conteos = cuenta, suma, maximo, conteos
+            filas.append({
+                "tramo": etiquetas.pop("tramo"),
+                **etiquetas,
+                "n": cuenta,
+                "media_ms": suma / cuenta * 1000,
+                "p50_ms": h.cuantil(0.5) * 1000,
+                "p95_ms": h.cuantil(0.95) * 1000,
+                "p99_ms": h.cuantil(0.99) * 1000,
+                "max_ms": maximo * 1000,
+                "cubos": conteos,
+            })
+        return filas
+
+    def totales(self):
+        with self._lock:
+            return [{"métrica": n, **dict(e), "valor": v} for (n, e), v in sorted(self.contadores.items())]
+
+    def texto(self):
+        # formato de exposición de texto de Prometheus
+        with self._lock:
+            histogramas = [(k, list(h.conteos), h.suma, h.cuenta) for k, h in sorted(self.histogramas.items())]
+            contadores = sorted(self.contadores.items())
+        lineas = []
+        nombre = f"{PREFIJO}_duracion_segundos"
+        lineas.append(f"# HELP {nombre} {AYUDA['duracion_segundos']}")
+        lineas.append(f"# TYPE {nombre} histogram")
+        for etiquetas, conteos, suma, cuenta in histogramas:
+            acumulado = 0
+            for limite, n in zip(list(self.limites) + ["+Inf"], conteos):
+                acumulado += n
+                lineas.append(f"{nombre}_bucket{_formato(etiquetas, [('le', str(limite))])} {acumulado}")
+            lineas.append(f"{nombre}_sum{_formato(etiquetas)} {suma:.6f}")
+            lineas.append(f"{nombre}_count{_formato(etiquetas)} {cuenta}")
+        anterior = None
+        for (contador, etiquetas), valor in contadores:
+            nombre = f"{PREFIJO}_{contador}_total"
+            if contador != anterior:
+                lineas.append(f"# HELP {nombre} {AYUDA.get(contador + '_total', contador)}")
+                lineas.append(f"# TYPE {nombre} counter")
+                anterior = contador
+            lineas.append(f"{nombre}{_formato(etiquetas)} {valor}")
+        return "\n".join(lineas) + "\n"
+
+    def escribir(self, ruta):
+        # se escribe en un temporal y se reemplaza, así el recolector nunca lee un archivo a medias
+        directorio = os.path.dirname(os.path.abspath(ruta))
+        descriptor, temporal = tempfile.mkstemp(dir=directorio, prefix=".metricas_")
+        try:
+            with os.fdopen(descriptor, "w", encoding="utf-8") as f:
+                f.write(self.texto())
+            os.replace(temporal, ruta)
+        except BaseException:
+            os.unlink(temporal)
+            raise
+
+    def exportar_cada(self, ruta, segundos=15):
+        # hilo de fondo que reescribe el archivo periódicamente (uno por proceso)
+        with self._lock:
+            if self._exportador is not None:
+                return
+            self._exportador = threading.Thread(target=self._exportar, args=(ruta, segundos), daemon=True)
+        self._exportador.start()
+
+    def _exportar(self, ruta, segundos):
+        while True:
+            try:
+                self.escribir(ruta)
+            except OSError as e:
+                log.warning("no se pudieron escribir las métricas en %s: %s", ruta, e)
+            time.sleep(segundos)
+
+
+metricas = Metricas()
@@ -0,0 +1,43 @@
+# Base de datos de ADN y sitios de corte
+adn_db = {
+    "ADN lineal 4000 pb (1 sitio EcoRI)": {
+        "tipo": "lineal",
+        "longitud": 4000,
+        "sitios": {"EcoRI": [2000]},
+    },
+    "ADN lineal 4000 pb (2 sitios EcoRI)": {
+        "tipo": "lineal",
+        "longitud": 4000,
+        "sitios": {"EcoRI": [1000, 3000]},
+    },
+    "ADN circular 5000 pb (2 sitios EcoRI)": {
+        "tipo": "circular",
+        "longitud": 5000,
+        "sitios": {"EcoRI": [1200, 3700]},
+    },
+    "ADN lineal 6000 pb (2 sitios HindIII)": {
+        "tipo": "lineal",
+        "longitud": 6000,
+        "sitios": {"HindIII": [1500, 4500]},
+    },
+    "ADN circular 8000 pb (3 sitios BamHI)": {
+        "tipo": "circular",
+        "longitud": 8000,
+        "sitios": {"BamHI": [1000, 4000, 7000]},
+    },
+    "ADN lineal 5000 pb (1 sitio HindIII, 1 sitio EcoRI)": {
+        "tipo": "lineal",
+        "longitud": 5000,
+        "sitios": {"HindIII": [1200], "EcoRI": [3800]},
+    },
+    "ADN circular 7000 pb (1 sitio BamHI)": {
+        "tipo": "circular",
+        "longitud": 7000,
+        "sitios": {"BamHI": [3500]},
+    },
+    "Plásmido pBR322 (4361 pb, 2 sitios EcoRI y 1 HindIII)": {
+        "tipo": "circular",
+        "longitud": 4361,
+        "sitios": {"EcoRI": [600, 3200], "HindIII": [1500]},
+    },
+}
@@ -0,0 +1,102 @@
+import logging
+import threading
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as TiempoAgotado
+
+from ia import ErrorIA, cliente_ia, secreto
+
+# precarga opcional del contenido de IA: en cuanto la selección de molécula y enzimas se
+# queda quieta, la explicación y las preguntas se piden en segundo plano y los botones
+# muestran el resultado al instante (o se unen a la petición que ya está en curso)
+
+log = logging.getLogger(__name__)
+
+# segundos que la selección debe quedarse igual antes de gastar una petición
+ESPERA = 1.0
+
+# lo más que un botón espera a una precarga en curso antes de hacer su propia petición
+# (la espera inicial más el timeout de las llamadas a la IA)
+ESPERA_TOMA = ESPERA + 15
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def precarga_activa():
+    return bool(secreto("IA_PRECARGA", False)) and cliente_ia() is not None
+
+
+def pool():
+    # un solo grupo de hilos para todas las sesiones del proceso
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(
+                max_workers=int(secreto("IA_PRECARGA_HILOS", 8)),
+                thread_name_prefix="precarga",
+            )
+        return _pool
+
+
+class Precarga:
+    # una petición en segundo plano para una configuración (clave) concreta
+    def __init__(self, clave, funcion, args, espera=ESPERA):
+        self.clave = clave
+        self.usada = False
+        self.cancelada = threading.Event()
+        self.futuro = pool().submit(self._ejecutar, funcion, args, espera)
+
+    def _ejecutar(self, funcion, args, espera):
+        if self.cancelada.wait(espera):
+            return None
+        partes = funcion(*args)
+        texto = []
+        try:
+            for parte in partes:
+                if self.cancelada.is_set():
+                    # se corta la conexión para no seguir generando tokens
+                    return None
+                texto.append(parte)
+        except ErrorIA as e:
+            log.warning("precarga: %s", e)
+            return None
+        finally:
+            partes.close()
+        return "".join(texto)
+
+    def cancelar(self):
+        self.cancelada.set()
+        self.futuro.cancel()
+
+
+def lanzar(estado, nombre, clave, funcion, *args):
+    # pide en segundo plano funcion(*args) (un generador de texto) si la configuración cambió;
+    # la precarga anterior con otra clave se cancela
+    actual = estado.get(nombre)
+    if actual is not None:
+        if actual.clave == clave:
+            return actual
+        actual.cancelar()
+    estado[nombre] = Precarga(clave, funcion, args)
+    return estado[nombre]
+
+
+def tomar(estado, nombre, clave, espera=0):
+    # texto precargado para esta configuración (cada precarga se usa una sola vez); con espera,
+    # una precarga que aún está en curso se aguarda hasta esos segundos en lugar de repetir la
+    # petición (las que no usan la caché de la IA no se unen solas a la que ya está en vuelo)
+    actual = estado.get(nombre)
+    if actual is None or actual.clave != clave or actual.usada:
+        return None
+    try:
+        texto = actual.futuro.result(timeout=espera)
+    except (TiempoAgotado, CancelledError):
+        return None
+    actual.usada = True
+    return texto
+
+
+def cancelar_todas(estado):
+    for precarga in estado.values():
+        precarga.cancelar()
+    estado.clear()
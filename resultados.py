@@ -0,0 +1,301 @@
+import io
+import os
+import sqlite3
+import threading
+from contextlib import closing, contextmanager
+from datetime import timedelta
+
+import pandas as pd
+
+# almacén de resultados de los estudiantes en SQLite (modo WAL): cada guardado es un INSERT,
+# sin releer ni reescribir el archivo, y varias sesiones pueden escribir a la vez sin pisarse
+
+RUTA_DB = "resultados_app.db"
+RUTA_CSV = "resultados_app.csv"
+
+COLUMNAS = [
+    "fecha",
+    "estudiante",
+    "adn",
+    "enzimas",
+    "fragmentos_reales",
+    "prediccion",
+    "acierto",
+    "satisfaccion",
+    "uso_ia",
+]
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS resultados (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    fecha TEXT,
+    estudiante TEXT,
+    adn TEXT,
+    enzimas TEXT,
+    fragmentos_reales INTEGER,
+    prediccion INTEGER,
+    acierto INTEGER,
+    satisfaccion INTEGER,
+    uso_ia INTEGER
+);
+CREATE INDEX IF NOT EXISTS resultados_fecha ON resultados (fecha);
+CREATE TABLE IF NOT EXISTS meta (
+    clave TEXT PRIMARY KEY,
+    valor TEXT
+);
+"""
+
+# agregados que se mantienen al insertar cada registro (disparador de SQLite), para que el panel
+# lea resúmenes de tamaño fijo en lugar de recorrer todo el historial
+METRICAS = ["acierto", "satisfaccion", "uso_ia"]
+
+# tabla de resumen -> expresión de agrupación sobre el registro insertado
+RESUMENES = {
+    "resumen_total": "1",
+    "resumen_dia": "substr({r}.fecha, 1, 10)",
+    "resumen_adn": "{r}.adn",
+    "resumen_enzimas": "{r}.enzimas",
+}
+
+
+def _esquema_resumenes():
+    columnas = ",\n    ".join(
+        f"n_{m} INTEGER NOT NULL DEFAULT 0,\n    suma_{m} REAL NOT NULL DEFAULT 0" for m in METRICAS
+    )
+    tablas = "".join(
+        f"""
+CREATE TABLE IF NOT EXISTS {tabla} (
+    grupo TEXT PRIMARY KEY,
+    registros INTEGER NOT NULL DEFAULT 0,
+    {columnas}
+);"""
+        for tabla in RESUMENES
+    )
+    destino = ", ".join(["grupo", "registros"] + [f"n_{m}, suma_{m}" for m in METRICAS])
+    valores = ", ".join(["1"] + [f"NEW.{m} IS NOT NULL, COALESCE(NEW.{m}, 0)" for m in METRICAS])
+    suma = ", ".join(
+        ["registros = registros + 1"]
+        + [f"n_{m} = n_{m} + excluded.n_{m}, suma_{m} = suma_{m} + excluded.suma_{m}" for m in METRICAS]
+    )
+    cuerpo = "".join(
+        f"""
+    INSERT INTO {tabla} ({destino})
+    SELECT {expr.format(r="NEW")}, {valores} WHERE {expr.format(r="NEW")} IS NOT NULL
+    ON CONFLICT(grupo) DO UPDATE SET {suma};"""
+        for tabla, expr in RESUMENES.items()
+    )
+    disparador = f"""
+CREATE TRIGGER IF NOT EXISTS resultados_resumenes AFTER INSERT ON resultados BEGIN{cuerpo}
+END;
+"""
+    return tablas + disparador
+
+
+def reconstruir_resumenes(con):
+    # recalcula los resúmenes desde cero (bases creadas antes de que existieran)
+    agregados = ", ".join(["COUNT(*)"] + [f"COUNT({m}), COALESCE(SUM({m}), 0)" for m in METRICAS])
+    destino = ", ".join(["grupo", "registros"] + [f"n_{m}, suma_{m}" for m in METRICAS])
+    for tabla, expr in RESUMENES.items():
+        grupo = expr.format(r="resultados")
+        con.execute(f"DELETE FROM {tabla}")
+        con.execute(
+            f"INSERT INTO {tabla} ({destino}) SELECT {grupo}, {agregados} FROM resultados "
+            f"WHERE {grupo} IS NOT NULL GROUP BY {grupo}"
+        )
+
+
+def _preparar(con):
+    con.executescript(ESQUEMA + _esquema_resumenes())
+    con.execute("BEGIN IMMEDIATE")
+    try:
+        if not con.execute("SELECT 1 FROM meta WHERE clave = 'resumenes'").fetchone():
+            reconstruir_resumenes(con)
+            con.execute("INSERT INTO meta (clave, valor) VALUES ('resumenes', '1')")
+        con.execute("COMMIT")
+    except Exception:
+        con.execute("ROLLBACK")
+        raise
+
+
+def _abrir(ruta):
+    con = sqlite3.connect(ruta, timeout=30, isolation_level=None, check_same_thread=False)
+    con.execute("PRAGMA journal_mode=WAL")
+    con.execute("PRAGMA synchronous=NORMAL")
+    return con
+
+
+# una sola conexión por archivo para todo el proceso: Streamlit ejecuta cada rerun en un hilo
+# nuevo, así que una conexión por hilo no se reutilizaría; el esquema se prepara al abrirla y
+# los hilos la usan de a uno
+_conexiones = {}
+_lock = threading.RLock()
+
+
+def _compartida(ruta):
+    with _lock:
+        con = _conexiones.get(ruta)
+        if con is None:
+            con = _abrir(ruta)
+            _preparar(con)
+            _conexiones[ruta] = con
+        return con
+
+
+@contextmanager
+def conectar(ruta=RUTA_DB):
+    with _lock:
+        yield _compartida(ruta)
+
+
+def cerrar():
+    # cierra las conexiones compartidas (antes de borrar o reemplazar los archivos)
+    with _lock:
+        for con in _conexiones.values():
+            con.close()
+        _conexiones.clear()
+
+
+def migrar_csv(ruta_csv=RUTA_CSV, ruta=RUTA_DB):
+    # copia una sola vez los registros del CSV antiguo; el CSV no se borra
+    with conectar(ruta) as con:
+        if not os.path.exists(ruta_csv):
+            return 0
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            if con.execute("SELECT 1 FROM meta WHERE clave = 'csv_migrado'").fetchone():
+                con.execute("ROLLBACK")
+                return 0
+            df = pd.read_csv(ruta_csv)
+            for col in COLUMNAS:
+                if col not in df.columns:
+                    df[col] = None
+            filas = df[COLUMNAS].astype(object).where(df[COLUMNAS].notna(), None).values.tolist()
+            con.executemany(
+                f"INSERT INTO resultados ({', '.join(COLUMNAS)}) VALUES ({', '.join('?' * len(COLUMNAS))})",
+                filas,
+            )
+            con.execute("INSERT INTO meta (clave, valor) VALUES ('csv_migrado', ?)", (os.path.abspath(ruta_csv),))
+            con.execute("COMMIT")
+            return len(filas)
+        except Exception:
+            con.execute("ROLLBACK")
+            raise
+
+
+def guardar_resultado(registro, ruta=RUTA_DB):
+    with conectar(ruta) as con:
+        con.execute(
+            f"INSERT INTO resultados ({', '.join(COLUMNAS)}) VALUES ({', '.join('?' * len(COLUMNAS))})",
+            [registro.get(col) for col in COLUMNAS],
+        )
+
+
+def contar_resultados(ruta=RUTA_DB):
+    with conectar(ruta) as con:
+        fila = con.execute("SELECT registros FROM resumen_total").fetchone()
+    return fila[0] if fila else 0
+
+
+def _medias(fila):
+    # fila = (registros, n_acierto, suma_acierto, ...) -> medias de cada métrica
+    medias = {"registros": fila[0]}
+    for i, m in enumerate(METRICAS):
+        n, suma = fila[1 + 2 * i], fila[2 + 2 * i]
+        medias[m] = suma / n if n else 0
+    return medias
+
+
+def resumen_general(ruta=RUTA_DB):
+    columnas = ", ".join(["registros"] + [f"n_{m}, suma_{m}" for m in METRICAS])
+    with conectar(ruta) as con:
+        fila = con.execute(f"SELECT {columnas} FROM resumen_total").fetchone()
+    return _medias(fila or (0,) * (1 + 2 * len(METRICAS)))
+
+
+def resumen_por(tabla, ruta=RUTA_DB, limite=None, orden="registros DESC, grupo"):
+    # DataFrame con registros y medias por grupo (día, molécula o combinación de enzimas)
+    columnas = ", ".join(["grupo", "registros"] + [f"n_{m}, suma_{m}" for m in METRICAS])
+    consulta = f"SELECT {columnas} FROM {tabla} ORDER BY {orden}"
+    if limite:
+        consulta += f" LIMIT {int(limite)}"
+    with conectar(ruta) as con:
+        filas = con.execute(consulta).fetchall()
+    return pd.DataFrame([{"grupo": f[0], **_medias(f[1:])} for f in filas], columns=["grupo", "registros"] + METRICAS)
+
+
+def leer_resultados(ruta=RUTA_DB):
+    with conectar(ruta) as con:
+        return pd.read_sql_query(f"SELECT {', '.join(COLUMNAS)} FROM resultados ORDER BY id", con)
+
+
+def rango_fechas(ruta=RUTA_DB):
+    # primer y último día con registros (desde el resumen diario, sin recorrer los registros)
+    with conectar(ruta) as con:
+        return con.execute("SELECT MIN(grupo), MAX(grupo) FROM resumen_dia").fetchone()
+
+
+# tipos de cada columna para Parquet (el esquema no depende de lo que traiga cada bloque)
+TIPOS_PARQUET = {
+    "fecha": "string",
+    "estudiante": "string",
+    "adn": "string",
+    "enzimas": "string",
+    "fragmentos_reales": "int64",
+    "prediccion": "int64",
+    "acierto": "int64",
+    "satisfaccion": "int64",
+    "uso_ia": "int64",
+}
+
+
+def exportar(formato="csv", desde=None, hasta=None, columnas=None, ruta=RUTA_DB, filas_por_bloque=50_000):
+    # genera el archivo por bloques, filtrando por fechas (desde/hasta inclusive) y columnas;
+    # solo se aceptan nombres de COLUMNAS, que son los únicos que llegan a la consulta
+    if columnas is not None:
+        desconocidas = set(columnas) - set(COLUMNAS)
+        if desconocidas:
+            raise ValueError(f"columnas desconocidas: {', '.join(sorted(desconocidas))}")
+    columnas = [c for c in COLUMNAS if columnas is None or c in columnas]
+    if not columnas:
+        raise ValueError("hay que elegir al menos una columna")
+    condiciones, parametros = [], []
+    if desde is not None:
+        condiciones.append("fecha >= ?")
+        parametros.append(desde.isoformat())
+    if hasta is not None:
+        condiciones.append("fecha < ?")
+        parametros.append((hasta + timedelta(days=1)).isoformat())
+    consulta = f"SELECT {', '.join(columnas)} FROM resultados"
+    if condiciones:
+        consulta += " WHERE " + " AND ".join(condiciones)
+    consulta += " ORDER BY id"
+    enteros = {c: "Int64" for c in columnas if TIPOS_PARQUET[c] == "int64"}
+
+    # conexión propia mientras dura la exportación, para no frenar los guardados de las sesiones
+    # (con WAL, la lectura ve una foto fija de la base); la compartida se abre antes para que el
+    # esquema esté preparado y esta no sea la última en cerrarse
+    _compartida(ruta)
+    buffer = io.BytesIO()
+    with closing(_abrir(ruta)) as con:
+        bloques = pd.read_sql_query(consulta, con, params=parametros, chunksize=filas_por_bloque, dtype=enteros)
+        if formato == "parquet":
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            esquema = pa.schema([(c, getattr(pa, TIPOS_PARQUET[c])()) for c in columnas])
+            with pq.ParquetWriter(buffer, esquema, compression="zstd") as escritor:
+                for bloque in bloques:
+                    escritor.write_table(pa.Table.from_pandas(bloque, schema=esquema, preserve_index=False))
+        else:
+            encabezado = True
+            for bloque in bloques:
+                buffer.write(bloque.to_csv(index=False, header=encabezado).encode("utf-8"))
+                encabezado = False
+            if encabezado:
+                buffer.write((",".join(columnas) + "\n").encode("utf-8"))
+    return buffer.getvalue()
+
+
+def exportar_csv(ruta=RUTA_DB):
+    # mismas columnas que el antiguo resultados_app.csv
+    return exportar("csv", ruta=ruta)
@@ -0,0 +1,140 @@
+import re
+import numpy as np
+
+# búsqueda de sitios de restricción a partir de secuencias reales (FASTA o texto plano)
+
+# tabla de enzimas: secuencia de reconocimiento (IUPAC) y posición del corte en la hebra superior
+ENZIMAS = {
+    "EcoRI": ("GAATTC", 1),
+    "HindIII": ("AAGCTT", 1),
+    "BamHI": ("GGATCC", 1),
+    "PstI": ("CTGCAG", 5),
+    "SalI": ("GTCGAC", 1),
+    "SmaI": ("CCCGGG", 3),
+    "XbaI": ("TCTAGA", 1),
+    "NotI": ("GCGGCCGC", 2),
+    "EcoRV": ("GATATC", 3),
+    "HincII": ("GTYRAC", 3),
+    "AvaI": ("CYCGRG", 1),
+    "HaeIII": ("GGCC", 2),
+}
+
+# cada base IUPAC como máscara de bits A=1, C=2, G=4, T=8
+IUPAC = {
+    "A": 1, "C": 2, "G": 4, "T": 8, "U": 8,
+    "R": 5, "Y": 10, "S": 6, "W": 9, "K": 12, "M": 3,
+    "B": 14, "D": 13, "H": 11, "V": 7, "N": 15,
+}
+
+COMPLEMENTO = str.maketrans("ACGTURYSWKMBDHVN", "TGCAAYRSWMKVHDBN")
+
+_TABLA_BITS = np.zeros(256, dtype=np.uint8)
+for _base, _bits in IUPAC.items():
+    _TABLA_BITS[ord(_base)] = _bits
+    _TABLA_BITS[ord(_base.lower())] = _bits
+
+
+def leer_fasta(texto):
+    # devuelve [(nombre, secuencia)]; si no hay encabezado '>' se toma como secuencia plana
+    registros = []
+    nombre = None
+    partes = []
+    for linea in texto.splitlines():
+        linea = linea.strip()
+        if not linea:
+            continue
+        if linea.startswith(">"):
+            if nombre is not None or partes:
+                registros.append((nombre or "secuencia", "".join(partes)))
+            nombre = linea[1:].strip() or "secuencia"
+            partes = []
+        else:
+            partes.append(linea)
+    if nombre is not None or partes:
+        registros.append((nombre or "secuencia", "".join(partes)))
+    return [(n, limpiar_secuencia(s)) for n, s in registros]
+
+
+def limpiar_secuencia(secuencia):
+    # quita números, espacios y cualquier cosa que no sea una base
+    return re.sub(r"[^A-Za-z]", "", secuencia).upper()
+
+
+def complemento_inverso(sitio):
+    return sitio.translate(COMPLEMENTO)[::-1]
+
+
+def codificar(secuencia):
+    # la secuencia completa pasa una sola vez a un arreglo de máscaras de bits
+    if isinstance(secuencia, str):
+        secuencia = secuencia.encode("ascii", "ignore")
+    return _TABLA_BITS[np.frombuffer(secuencia, dtype=np.uint8)]
+
+
+def _coincidencias(compatibles, patron, n):
+    # posiciones i < n donde cada base de la secuencia es aceptada por la del patrón
+    # (una N o una base ambigua de la secuencia solo cuenta si todo lo que puede ser lo acepta
+    # el patrón: un tramo de N sin secuenciar no es una fila de sitios)
+    ok = None
+    for k, base in enumerate(patron):
+        mascara = IUPAC[base]
+        if mascara == 15:
+            continue
+        tramo = compatibles[mascara][k:k + n]
+        ok = tramo.copy() if ok is None else np.logical_and(ok, tramo, out=ok)
+    if ok is None:
+        return np.arange(n)
+    return np.flatnonzero(ok)
+
+
+def buscar_sitios(secuencia, tipo="lineal", enzimas=None):
+    # devuelve {"EcoRI": [cortes], ...} con el mismo formato que adn_db["sitios"]
+    tabla = ENZIMAS if enzimas is None else {e: ENZIMAS[e] for e in enzimas}
+    bits = secuencia if isinstance(secuencia, np.ndarray) else codificar(secuencia)
+    longitud = len(bits)
+    if longitud == 0 or not tabla:
+        return {}
+
+    largo_max = max(len(sitio) for sitio, _ in tabla.values())
+    if tipo == "circular":
+        # se añade el inicio al final para encontrar sitios que cruzan el origen
+        bits = np.resize(bits, longitud + largo_max - 1)
+
+    # compatibilidad de cada posición con cada máscara usada, calculada una sola vez
+    # y compartida por todos los patrones; las posiciones sin base (0) no coinciden con nada
+    compatibles = {}
+    for sitio, _ in tabla.values():
+        for base in sitio + complemento_inverso(sitio):
+            mascara = IUPAC[base]
+            if mascara not in compatibles:
+                compatibles[mascara] = ((bits & ~np.uint8(mascara)) == 0) & (bits != 0)
+
+    sitios = {}
+    for enz, (sitio, corte) in tabla.items():
+        m = len(sitio)
+        n = longitud if tipo == "circular" else longitud - m + 1
+        if n <= 0:
+            continue
+        cortes = _coincidencias(compatibles, sitio, n) + corte
+        inverso = complemento_inverso(sitio)
+        if inverso != sitio:
+            cortes = np.concatenate([cortes, _coincidencias(compatibles, inverso, n) + (m - corte)])
+        if tipo == "circular":
+            cortes %= longitud
+        else:
+            # un corte justo en un extremo no separa nada
+            cortes = cortes[(cortes > 0) & (cortes < longitud)]
+        cortes = np.unique(cortes)
+        if len(cortes):
+            sitios[enz] = cortes.tolist()
+    return sitios
+
+
+def molecula_desde_secuencia(secuencia, tipo="lineal", enzimas=None):
+    # arma una entrada con la forma de adn_db lista para digerir()
+    secuencia = limpiar_secuencia(secuencia)
+    return {
+        "tipo": tipo,
+        "longitud": len(secuencia),
+        "sitios": buscar_sitios(secuencia, tipo, enzimas),
+    }
@@ -0,0 +1,122 @@
+import math
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from calificacion import calificar, dificultad, leer_hoja
+
+# EcoRI sola: 2600 y 1761 pb; EcoRI + HindIII: 1761, 1700 y 900 pb
+MOLECULAS = {"P": {"tipo": "circular", "longitud": 4361, "sitios": {"EcoRI": [600, 3200], "HindIII": [1500]}}}
+
+COLUMNAS = ["estudiante", "pregunta", "adn", "enzimas", "prediccion", "tamanos", "tolerancia"]
+
+
+def hoja(*filas, columnas=COLUMNAS):
+    return pd.DataFrame([dict(zip(columnas, f)) for f in filas], columns=columnas, dtype=str)
+
+
+def por_estudiante(calificada):
+    return calificada.set_index("estudiante")
+
+
+def test_filas_con_error_no_se_califican():
+    c = por_estudiante(calificar(hoja(
+        ("a", "1", "Q", "EcoRI", "2", "", ""),
+        ("b", "1", "P", "XyzI", "2", "", ""),
+        ("c", "1", "P", "EcoRI", "", "", ""),
+        ("d", "1", "P", "EcoRI", "2", "2600; abc", ""),
+        ("e", "1", "P", "EcoRI", "2", "2600; 1761", "mucho"),
+    ), MOLECULAS))
+    assert c["error"].to_dict() == {
+        "a": "molécula desconocida",
+        "b": "enzima desconocida",
+        "c": "sin predicción",
+        "d": "tamaños ilegibles",
+        "e": "tolerancia ilegible",
+    }
+    assert (c["acierto"] == 0).all() and (c["acierto_numero"] == 0).all()
+    assert c["fragmentos_reales"].isna().all()
+    assert (c["tamanos_reales"] == "").all()
+
+
+def test_sin_tamanos_se_califica_solo_el_numero():
+    c = por_estudiante(calificar(hoja(
+        ("a", "1", "P", "EcoRI", "2", "", ""),
+        ("b", "1", "P", "EcoRI", "3", "", ""),
+    ), MOLECULAS))
+    assert c.loc["a", ["acierto_numero", "acierto_tamanos", "acierto"]].tolist() == [1, -1, 1]
+    assert c.loc["b", ["acierto_numero", "acierto_tamanos", "acierto"]].tolist() == [0, -1, 0]
+    assert c.loc["a", "tamanos_reales"] == "2600; 1761"
+
+    # sin la columna de tamaños pasa lo mismo
+    sin_columna = calificar(hoja(("a", "1", "P", "EcoRI", "2"), columnas=COLUMNAS[:5]), MOLECULAS)
+    assert sin_columna["acierto_tamanos"].tolist() == [-1]
+    assert sin_columna["acierto"].tolist() == [1]
+
+
+def test_tolerancia_vacia_usa_la_de_la_hoja():
+    # 950 pb en lugar de 900 es un 5,6 % de error: falla con el 5 % por defecto y pasa con 60 pb
+    c = por_estudiante(calificar(hoja(
+        ("a", "2", "P", "EcoRI+HindIII", "3", "900;1700;1761", ""),
+        ("b", "2", "P", "EcoRI+HindIII", "3", "950;1700;1761", ""),
+        ("c", "2", "P", "EcoRI+HindIII", "3", "950;1700;1761", "60"),
+        ("d", "2", "P", "EcoRI+HindIII", "3", "950;1700;1761", "6%"),
+        ("e", "2", "P", "EcoRI+HindIII", "3", "900;1700", ""),
+    ), MOLECULAS))
+    assert c["error"].eq("").all()
+    assert c["acierto_numero"].tolist() == [1, 1, 1, 1, 1]
+    assert c["acierto_tamanos"].tolist() == [1, 0, 1, 1, 0]
+    assert c["acierto"].tolist() == [1, 0, 1, 1, 0]
+
+    # sin la columna de tolerancia vale la que se pasa a calificar()
+    sin_columna = calificar(hoja(("b", "2", "P", "EcoRI+HindIII", "3", "950;1700;1761"), columnas=COLUMNAS[:6]), MOLECULAS, "50")
+    assert sin_columna["acierto"].tolist() == [1]
+
+
+def test_leer_hoja_normaliza_las_columnas():
+    contenido = "Estudiante;ADN;Enzimas;Prediccion;Tamaños\na;P;EcoRI;2;2600 1761\n".encode()
+    c = calificar(leer_hoja(contenido), MOLECULAS)
+    assert c["acierto"].tolist() == [1]
+    assert c["acierto_tamanos"].tolist() == [1]
+
+
+def test_dificultad_ignora_errores_y_filas_sin_tamanos():
+    c = calificar(hoja(
+        ("a", "1", "P", "EcoRI", "2", "", ""),
+        ("b", "1", "P", "EcoRI", "", "", ""),
+        ("a", "2", "P", "EcoRI+HindIII", "3", "900;1700;1761", ""),
+        ("b", "2", "P", "EcoRI+HindIII", "3", "950;1700;1761", ""),
+        ("c", "2", "P", "EcoRI+HindIII", "3", "900;1700;1761", ""),
+        ("d", "2", "P", "EcoRI+HindIII", "2", "", ""),
+    ), MOLECULAS)
+    d = dificultad(c).set_index("pregunta")
+    assert d.loc["1", "respuestas"] == 1
+    assert d.loc["1", "indice_dificultad"] == 1.0
+    assert math.isnan(d.loc["1", "acierto_tamanos"])
+    assert d.loc["1", "nivel"] == "fácil"
+    assert d.loc["2", "respuestas"] == 4
+    assert d.loc["2", "indice_dificultad"] == 0.5
+    assert d.loc["2", "acierto_numero"] == 0.75
+    # la fila sin tamaños no cuenta en el promedio de tamaños
+    assert d.loc["2", "acierto_tamanos"] == 2 / 3
+    assert d.loc["2", "nivel"] == "media"
+    assert d.loc["2", "fragmentos_reales"] == 3
+    assert "discriminacion" in d.columns
+
+
+def test_dificultad_sin_preguntas_agrupa_por_configuracion():
+    c = calificar(hoja(
+        ("P", "EcoRI", "2"),
+        ("P", "EcoRI", "1"),
+        ("P", "EcoRI", "1"),
+        ("P", "EcoRI+HindIII", "3"),
+        columnas=["adn", "enzimas", "prediccion"],
+    ), MOLECULAS)
+    d = dificultad(c).set_index(["adn", "enzimas"])
+    assert d.loc[("P", "EcoRI"), "nivel"] == "media"
+    assert abs(d.loc[("P", "EcoRI"), "indice_dificultad"] - 1 / 3) < 1e-9
+    assert d.loc[("P", "EcoRI+HindIII"), "nivel"] == "fácil"
+    assert "discriminacion" not in d.columns
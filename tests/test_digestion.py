@@ -0,0 +1,73 @@
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import digestion
+from digestion import digerir, digerir_lote, digerir_lote_plano
+
+
+def moleculas(rnd, cantidad):
+    # sitios en los extremos, repetidos y compartidos entre enzimas, y enzimas sin sitio
+    adns = []
+    for _ in range(cantidad):
+        longitud = rnd.randint(1, 60)
+        tipo = rnd.choice(["lineal", "circular"])
+        sitios = {}
+        for e in rnd.sample(["A", "B", "C", "D"], rnd.randint(1, 4)):
+            sitios[e] = sorted(rnd.choice([0, longitud, rnd.randint(0, longitud)]) for _ in range(rnd.randint(0, 5)))
+        adns.append({"tipo": tipo, "longitud": longitud, "sitios": sitios})
+    return adns
+
+
+def trabajos_al_azar(rnd, adns, cantidad):
+    trabajos = []
+    for _ in range(cantidad):
+        adn = rnd.choice(adns)
+        enzimas = rnd.sample(["A", "B", "C", "D", "E"], rnd.randint(1, 3))
+        trabajos.append((adn, enzimas))
+    return trabajos
+
+
+def comparar(trabajos):
+    fragmentos, inicios = digerir_lote_plano(trabajos)
+    assert len(inicios) == len(trabajos) + 1
+    for i, (adn, enzimas) in enumerate(trabajos):
+        assert fragmentos[inicios[i]:inicios[i + 1]].tolist() == digerir(adn, enzimas)[0], (adn, enzimas)
+    assert [f.tolist() for f in digerir_lote(trabajos)] == [digerir(adn, e)[0] for adn, e in trabajos]
+
+
+def test_lote_plano_igual_a_digerir_con_trabajos_mezclados():
+    rnd = random.Random(1)
+    for _ in range(20):
+        comparar(trabajos_al_azar(rnd, moleculas(rnd, 8), 60))
+
+
+def test_lote_plano_igual_a_digerir_con_trabajos_agrupados():
+    # el caso normal: los trabajos de cada molécula juntos, con listas de enzimas compartidas
+    rnd = random.Random(2)
+    adns = moleculas(rnd, 10)
+    combos = [["A"], ["A", "B"], ["C", "D", "A"], ["E"]]
+    comparar([(adn, combo) for adn in adns for combo in combos])
+
+
+def test_lote_plano_en_trozos(monkeypatch):
+    # con un tope de celdas chico cada molécula se digiere en varios trozos
+    monkeypatch.setattr(digestion, "MAX_CELDAS_LOTE", 8)
+    rnd = random.Random(3)
+    comparar(trabajos_al_azar(rnd, moleculas(rnd, 5), 80))
+
+
+def test_lote_vacio():
+    fragmentos, inicios = digerir_lote_plano([])
+    assert fragmentos.tolist() == [] and inicios.tolist() == [0]
+    assert digerir_lote([]) == []
+
+
+def test_reglas_de_digerir():
+    lineal = {"tipo": "lineal", "longitud": 10, "sitios": {"A": [0, 4, 10], "B": [4, 7]}}
+    assert digerir(lineal, ["A", "B"])[0] == [4, 3, 3]
+    circular = {"tipo": "circular", "longitud": 10, "sitios": {"A": [3], "B": [10, 6]}}
+    assert digerir(circular, ["A"])[0] == [10]
+    assert digerir(circular, ["A", "B"])[0] == [3, 3, 4]
@@ -0,0 +1,191 @@
+import os
+import sys
+import threading
+import time
+from functools import partial
+
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.join(RAIZ, "benchmarks"))
+
+import ia
+from ia import CacheRespuestas, ClienteIA, ErrorIA, VuelosIA
+from mock_ia import ServidorIA
+
+MENSAJES = [{"role": "system", "content": "Sos docente."}, {"role": "user", "content": "¿Cuántos fragmentos?"}]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = CacheRespuestas(str(tmp_path / "cache.db"))
+    yield cache
+    if cache._con is not None:
+        cache._con.close()
+
+
+@pytest.fixture
+def reloj(monkeypatch):
+    # time.time() de ia.py avanza un segundo por llamada, para ordenar los usos sin dormir
+    ahora = [1_000_000.0]
+
+    def tiempo():
+        ahora[0] += 1
+        return ahora[0]
+
+    monkeypatch.setattr(ia.time, "time", tiempo)
+    return ahora
+
+
+def test_clave_normaliza_espacios_y_temperatura():
+    otra = [{"role": "system", "content": "  Sos\n docente. "}, {"role": "user", "content": "¿Cuántos   fragmentos?"}]
+    assert CacheRespuestas.clave(MENSAJES, 0.4) == CacheRespuestas.clave(otra, 0.40001)
+    assert CacheRespuestas.clave(MENSAJES, 0.4) != CacheRespuestas.clave(MENSAJES, 0.5)
+    assert CacheRespuestas.clave(MENSAJES, 0.4) != CacheRespuestas.clave(MENSAJES, 0.4, modelo="otro")
+    cambiado = [MENSAJES[0], {"role": "assistant", "content": "¿Cuántos fragmentos?"}]
+    assert CacheRespuestas.clave(MENSAJES, 0.4) != CacheRespuestas.clave(cambiado, 0.4)
+
+
+def test_guardar_y_obtener(cache):
+    clave = CacheRespuestas.clave(MENSAJES, 0.4)
+    assert cache.obtener(clave) is None
+    cache.guardar(clave, "tres fragmentos")
+    assert cache.obtener(clave) == "tres fragmentos"
+    assert cache.estadisticas() == {"aciertos": 1, "fallos": 1, "entradas": 1, "bytes": len("tres fragmentos")}
+
+
+def test_entradas_vencidas(cache, reloj):
+    cache.ttl_segundos = 10
+    cache.guardar("a", "vieja")
+    reloj[0] += 5
+    assert cache.obtener("a") == "vieja"
+    reloj[0] += 10
+    assert cache.obtener("a") is None
+    # al guardar otra se borran las vencidas
+    cache.guardar("b", "nueva")
+    assert cache.estadisticas()["entradas"] == 1
+
+
+def test_se_descartan_las_menos_usadas(cache, reloj):
+    cache.max_entradas = 3
+    for clave in "abc":
+        cache.guardar(clave, clave * 10)
+    cache.obtener("a")
+    cache.guardar("d", "d" * 10)
+    assert [cache.obtener(c) is not None for c in "abcd"] == [True, False, True, True]
+
+    # con un tope de bytes se conservan las más recientes que entran
+    cache.max_bytes = 25
+    cache.obtener("c")
+    cache.guardar("e", "e" * 10)
+    assert [cache.obtener(c) is not None for c in "acde"] == [False, True, False, True]
+    assert cache.estadisticas()["bytes"] <= 25
+
+
+@pytest.fixture
+def servidor(monkeypatch, cache):
+    # la IA es el servidor simulado de benchmarks/, con caché y vuelos propios de la prueba
+    servidor = ServidorIA(latencia=0.3, variacion=0, entre_tokens=0.002, semilla=0).iniciar()
+    cliente = ClienteIA("prueba", servidor.url, reintentos=0)
+
+    def cliente_ia():
+        return cliente
+
+    monkeypatch.setattr(ia, "cliente_ia", cliente_ia)
+    monkeypatch.setattr(ia, "cache_ia", cache)
+    monkeypatch.setattr(ia, "vuelos_ia", VuelosIA())
+    yield servidor
+    servidor.cerrar()
+
+
+def en_paralelo(n, funcion):
+    # resultados (o excepciones) de n llamadas a funcion() que arrancan juntas
+    salida = [None] * n
+    largada = threading.Barrier(n)
+
+    def correr(i):
+        largada.wait()
+        try:
+            salida[i] = funcion()
+        except Exception as e:
+            salida[i] = e
+
+    hilos = [threading.Thread(target=correr, args=(i,)) for i in range(n)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join(30)
+    return salida
+
+
+def en_segundo_plano(funcion):
+    # corre funcion() en otro hilo; devuelve con qué esperar su resultado
+    salida = []
+
+    def correr():
+        salida.append(funcion())
+
+    hilo = threading.Thread(target=correr)
+    hilo.start()
+
+    def resultado():
+        hilo.join(30)
+        return salida[0]
+
+    return resultado
+
+
+def test_completar_identicas_hacen_una_sola_llamada(servidor):
+    textos = en_paralelo(5, partial(ia.completar, MENSAJES, usar_cache=True))
+    assert servidor.peticiones == 1
+    assert len(set(textos)) == 1 and isinstance(textos[0], str)
+    assert ia.vuelos_ia.estadisticas() == {"llamadas": 1, "coalescidas": 4, "en_curso": 0}
+    # la siguiente sale de la caché
+    assert ia.completar(MENSAJES, usar_cache=True) == textos[0]
+    assert servidor.peticiones == 1
+
+
+def test_sin_cache_cada_una_llama(servidor):
+    en_paralelo(3, partial(ia.completar, MENSAJES, usar_cache=False))
+    assert servidor.peticiones == 3
+    assert ia.vuelos_ia.estadisticas()["llamadas"] == 0
+
+
+def texto_stream():
+    return "".join(ia.completar_stream(MENSAJES, usar_cache=True))
+
+
+def test_stream_identicas_reciben_el_mismo_texto(servidor):
+    textos = en_paralelo(4, texto_stream)
+    assert servidor.peticiones == 1
+    assert len(set(textos)) == 1 and textos[0]
+    assert ia.cache_ia.obtener(CacheRespuestas.clave(MENSAJES, 0.4)) == textos[0]
+
+
+def test_stream_abandonado_se_termina_para_quien_espera(servidor):
+    servidor.entre_tokens = 0.01
+    primero = ia.completar_stream(MENSAJES, usar_cache=True)
+    inicio = next(primero)
+    seguidor = en_segundo_plano(texto_stream)
+    limite = time.monotonic() + 10
+    while ia.vuelos_ia.estadisticas()["coalescidas"] < 1 and time.monotonic() < limite:
+        time.sleep(0.005)
+    primero.close()
+    texto = seguidor()
+    assert texto.startswith(inicio)
+    assert ia.cache_ia.obtener(CacheRespuestas.clave(MENSAJES, 0.4)) == texto
+    assert servidor.peticiones == 1
+
+
+def test_un_error_llega_a_todos_y_no_se_guarda(servidor):
+    servidor.errores = 1.0
+    salida = en_paralelo(3, partial(ia.completar, MENSAJES, usar_cache=True))
+    assert all(isinstance(s, ErrorIA) for s in salida)
+    assert servidor.peticiones == 1
+    assert ia.vuelos_ia.estadisticas()["en_curso"] == 0
+    assert ia.cache_ia.estadisticas()["entradas"] == 0
+    # después del error la misma petición vuelve a la API
+    servidor.errores = 0.0
+    assert ia.completar(MENSAJES, usar_cache=True)
+    assert servidor.peticiones == 2
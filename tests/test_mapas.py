@@ -0,0 +1,68 @@
+import os
+import random
+import sys
+from itertools import combinations, product
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mapas import _canonico, calificar_mapa, digestiones, resolver_mapa
+
+
+def bandas_de(cortes, longitud, circular):
+    # fragmentos ordenados de una digestión, contados a mano
+    cortes = sorted(set(cortes))
+    if circular:
+        if len(cortes) < 2:
+            return [longitud]
+        return sorted([b - a for a, b in zip(cortes, cortes[1:])] + [longitud - cortes[-1] + cortes[0]])
+    puntos = [0] + cortes + [longitud]
+    return sorted(b - a for a, b in zip(puntos, puntos[1:]))
+
+
+def por_fuerza(longitud, tipo, bandas):
+    # (enzimas, todos los mapas con las bandas de cada enzima sola, mapas que además dan la
+    # combinada sin espejos ni giros), probando cada juego de posiciones
+    enzimas = sorted(combo[0] for combo in bandas if len(combo) == 1)
+    circular = tipo == "circular"
+    posiciones = range(longitud) if circular else range(1, longitud)
+    candidatos = []
+    for e in enzimas:
+        cortes = len(bandas[(e,)]) if circular else len(bandas[(e,)]) - 1
+        candidatos.append([
+            c for c in combinations(posiciones, cortes)
+            if bandas_de(c, longitud, circular) == bandas[(e,)]
+        ])
+    todos = list(product(*candidatos))
+    validos = set()
+    for cortes in todos:
+        if bandas_de([x for c in cortes for x in c], longitud, circular) == bandas[tuple(enzimas)]:
+            validos.add(_canonico(cortes, longitud, circular))
+    return enzimas, todos, validos
+
+
+def casos(cantidad, semilla):
+    rnd = random.Random(semilla)
+    for _ in range(cantidad):
+        tipo = rnd.choice(["lineal", "circular"])
+        longitud = rnd.randint(8, 18)
+        enzimas = ["A", "B", "C"][:rnd.randint(1, 3)]
+        sitios = {e: sorted(rnd.sample(range(1, longitud), rnd.randint(1, 3))) for e in enzimas}
+        yield longitud, tipo, digestiones({"tipo": tipo, "longitud": longitud, "sitios": sitios}, enzimas)
+
+
+def test_resolver_mapa_da_los_mismos_mapas_que_la_fuerza_bruta():
+    for longitud, tipo, bandas in casos(150, 1):
+        enzimas, _, validos = por_fuerza(longitud, tipo, bandas)
+        mapas, completo = resolver_mapa(longitud, tipo, bandas, limite=10)
+        assert completo
+        assert {tuple(tuple(m[e]) for e in enzimas) for m in mapas} == validos, (longitud, tipo, bandas)
+
+
+def test_calificar_mapa_coincide_con_la_fuerza_bruta():
+    for longitud, tipo, bandas in casos(30, 2):
+        enzimas, todos, validos = por_fuerza(longitud, tipo, bandas)
+        # una muestra de los candidatos (son miles en algunos casos) más todos los válidos
+        muestra = todos[::max(1, len(todos) // 100)] + sorted(validos)
+        for cortes in muestra:
+            acierto, _ = calificar_mapa(longitud, tipo, bandas, dict(zip(enzimas, map(list, cortes))))
+            assert acierto == (_canonico(cortes, longitud, tipo == "circular") in validos), (longitud, tipo, cortes)
@@ -0,0 +1,144 @@
+import io
+import os
+import random
+import sys
+import threading
+from datetime import date
+
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import resultados
+from resultados import COLUMNAS, RESUMENES, conectar, exportar, guardar_resultado, migrar_csv, reconstruir_resumenes
+
+
+@pytest.fixture
+def ruta(tmp_path):
+    yield str(tmp_path / "resultados.db")
+    resultados.cerrar()
+
+
+def registros_al_azar(semilla, cantidad):
+    # con métricas y grupos faltantes, que el disparador no debe contar
+    rnd = random.Random(semilla)
+    for _ in range(cantidad):
+        yield {
+            "fecha": rnd.choice([None, f"2026-0{rnd.randint(1, 3)}-1{rnd.randint(0, 9)} 1{rnd.randint(0, 9)}:00:00"]),
+            "estudiante": rnd.choice(["ana", "beto", None]),
+            "adn": rnd.choice(["pBR322", "lambda", None]),
+            "enzimas": rnd.choice(["EcoRI", "EcoRI, HindIII", None]),
+            "fragmentos_reales": rnd.randint(1, 5),
+            "prediccion": rnd.randint(1, 5),
+            "acierto": rnd.choice([0, 1, None]),
+            "satisfaccion": rnd.choice([1, 2, 3, 4, 5, None]),
+            "uso_ia": rnd.choice([0, 1, None]),
+        }
+
+
+def test_guardados_desde_varios_hilos(ruta):
+    # cada rerun de Streamlit corre en su hilo: ningún registro se pierde ni se mezcla
+    def guardar(hilo):
+        for i in range(25):
+            guardar_resultado({"estudiante": f"h{hilo}", "prediccion": i, "acierto": 1}, ruta)
+
+    hilos = [threading.Thread(target=guardar, args=(h,)) for h in range(8)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    df = resultados.leer_resultados(ruta)
+    assert list(df.columns) == COLUMNAS
+    assert len(df) == 200 and resultados.contar_resultados(ruta) == 200
+    for _, grupo in df.groupby("estudiante"):
+        assert grupo["prediccion"].tolist() == list(range(25))
+    assert df["fecha"].isna().all()
+
+
+def leer_resumenes(con):
+    return {tabla: con.execute(f"SELECT * FROM {tabla} ORDER BY grupo").fetchall() for tabla in RESUMENES}
+
+
+def test_disparador_coincide_con_reconstruir_resumenes(ruta):
+    for registro in registros_al_azar(1, 300):
+        guardar_resultado(registro, ruta)
+    with conectar(ruta) as con:
+        incrementales = leer_resumenes(con)
+        reconstruir_resumenes(con)
+        assert leer_resumenes(con) == incrementales
+    assert sum(fila[1] for fila in incrementales["resumen_total"]) == 300
+
+
+def test_resumen_general_coincide_con_los_registros(ruta):
+    registros = list(registros_al_azar(2, 200))
+    for registro in registros:
+        guardar_resultado(registro, ruta)
+    df = pd.DataFrame(registros, columns=COLUMNAS)
+    general = resultados.resumen_general(ruta)
+    assert general["registros"] == 200
+    for m in resultados.METRICAS:
+        assert general[m] == pytest.approx(df[m].mean())
+    por_adn = resultados.resumen_por("resumen_adn", ruta).set_index("grupo")
+    esperado = df.dropna(subset=["adn"]).groupby("adn")
+    assert por_adn["registros"].to_dict() == esperado.size().to_dict()
+    assert por_adn["acierto"].to_dict() == pytest.approx(esperado["acierto"].mean().fillna(0).to_dict())
+
+
+def test_migrar_csv_pasa_por_el_disparador(ruta, tmp_path):
+    csv = tmp_path / "resultados.csv"
+    pd.DataFrame(list(registros_al_azar(3, 50))).to_csv(csv, index=False)
+    assert migrar_csv(str(csv), ruta) == 50
+    assert migrar_csv(str(csv), ruta) == 0
+    with conectar(ruta) as con:
+        incrementales = leer_resumenes(con)
+        reconstruir_resumenes(con)
+        assert leer_resumenes(con) == incrementales
+    assert resultados.contar_resultados(ruta) == 50
+
+
+def guardar_dias(ruta, *fechas):
+    for i, fecha in enumerate(fechas):
+        guardar_resultado({"fecha": fecha, "estudiante": f"e{i}", "acierto": i % 2, "satisfaccion": None}, ruta)
+
+
+def test_exportar_incluye_los_dos_extremos(ruta):
+    guardar_dias(ruta, "2026-03-09 23:59:59", "2026-03-10 00:00:00", "2026-03-11 23:59:59", "2026-03-12 00:00:00")
+    df = pd.read_csv(io.BytesIO(exportar("csv", date(2026, 3, 10), date(2026, 3, 11), ruta=ruta)))
+    assert df["fecha"].tolist() == ["2026-03-10 00:00:00", "2026-03-11 23:59:59"]
+    assert len(pd.read_csv(io.BytesIO(exportar("csv", desde=date(2026, 3, 11), ruta=ruta)))) == 2
+    assert len(pd.read_csv(io.BytesIO(exportar("csv", hasta=date(2026, 3, 9), ruta=ruta)))) == 1
+
+
+def test_exportar_valida_las_columnas(ruta):
+    guardar_dias(ruta, "2026-03-10 12:00:00")
+    with pytest.raises(ValueError, match="desconocidas: id, nota"):
+        exportar("csv", columnas=["fecha", "nota", "id"], ruta=ruta)
+    with pytest.raises(ValueError, match="al menos una columna"):
+        exportar("csv", columnas=[], ruta=ruta)
+    # las columnas salen en el orden de COLUMNAS, no en el pedido
+    datos = exportar("csv", columnas=["acierto", "fecha"], ruta=ruta)
+    assert datos.decode().splitlines() == ["fecha,acierto", "2026-03-10 12:00:00,0"]
+
+
+def test_exportar_rango_vacio(ruta):
+    guardar_dias(ruta, "2026-03-10 12:00:00")
+    vacio = (date(2027, 1, 1), date(2027, 1, 31))
+    assert exportar("csv", *vacio, ruta=ruta).decode() == ",".join(COLUMNAS) + "\n"
+    tabla = pd.read_parquet(io.BytesIO(exportar("parquet", *vacio, columnas=["fecha", "acierto"], ruta=ruta)))
+    assert list(tabla.columns) == ["fecha", "acierto"]
+    assert len(tabla) == 0
+
+
+def test_exportar_por_bloques_da_lo_mismo(ruta):
+    for registro in registros_al_azar(4, 40):
+        guardar_resultado(registro, ruta)
+    entero = exportar("csv", ruta=ruta)
+    assert exportar("csv", ruta=ruta, filas_por_bloque=7) == entero
+    # en Parquet los enteros con faltantes siguen siendo enteros en todos los bloques
+    tabla = pq.read_table(io.BytesIO(exportar("parquet", ruta=ruta, filas_por_bloque=7)))
+    csv = pd.read_csv(io.BytesIO(entero))
+    assert tabla.num_rows == 40
+    assert str(tabla.schema.field("satisfaccion").type) == "int64"
+    assert tabla.column("satisfaccion").to_pylist() == [None if pd.isna(x) else int(x) for x in csv["satisfaccion"]]
@@ -0,0 +1,25 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sitios import buscar_sitios
+
+
+def test_tramo_de_n_no_es_sitio():
+    # 100 bases sin secuenciar no deben dar ~95 sitios por enzima
+    assert buscar_sitios("N" * 100) == {}
+
+
+def test_bases_ambiguas_de_la_secuencia_no_coinciden():
+    assert buscar_sitios("AAAGANTTCAAA", enzimas=["EcoRI"]) == {}
+    assert buscar_sitios("AAAGRATTCAAA", enzimas=["EcoRI"]) == {}
+
+
+def test_sitio_real_junto_a_n():
+    assert buscar_sitios("A" * 50 + "N" * 100 + "GAATTC" + "T" * 50, enzimas=["EcoRI"]) == {"EcoRI": [151]}
+
+
+def test_patron_degenerado_sigue_coincidiendo():
+    # HincII (GTYRAC) reconoce GTCGAC y GTTAAC
+    assert buscar_sitios("AAGTCGACAAGTTAACAA", enzimas=["HincII"]) == {"HincII": [5, 13]}